@@ -0,0 +1,126 @@
+"""
+Primary/replica database routing.
+
+Reads go to a replica (DATABASE_REPLICAS, configured from
+DATABASE_REPLICA_URLS in settings), chosen at random once per request so
+that one response never mixes replicas that have replicated to different
+points; writes, migrations and reads that need fresh data go to 'default'.
+With no replicas configured everything uses 'default', exactly as before.
+
+Read-your-writes: PrimaryPinningMiddleware pins the whole request to the
+primary for unsafe methods (POST/PUT/PATCH/DELETE), and answers them with a
+signed, timestamped X-DB-Primary header. The client
+(client/src/services/taskService.js) sends the header back with its
+requests, and those are pinned to the primary for
+DATABASE_REPLICA_STICKY_SECONDS after the write, long enough for the replicas
+to catch up with it. A header rather than a cookie, because the React client
+is served from another origin and does not send credentials.
+
+To try it locally with two SQLite files:
+
+    python manage.py migrate
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py runserver
+
+Writes then land in db.sqlite3 only, and GET /api/tasks/ shows them only for
+the client that made them, until the header expires.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+PRIMARY = 'default'
+
+_use_primary = ContextVar('use_primary', default=False)
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Routes every read in the block to the primary database.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+@contextmanager
+def use_replica(alias):
+    """
+    Routes every replica read in the block to the given replica.
+    """
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        # Inside a transaction on the primary, reads must see its uncommitted writes.
+        if not replicas or _use_primary.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return _replica.get() or random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def _sticky_signer():
+    # Built per use, so SECRET_KEY is only needed once requests are served and
+    # changes to it (or SECRET_KEY_FALLBACKS rotation) take effect.
+    return signing.TimestampSigner(salt='ai_todo_project.db_router.primary')
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pins requests that write, and the same client's requests shortly after a
+    write, to the primary database, and every other request to one replica.
+    """
+    UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def recently_wrote(self, request):
+        token = request.headers.get(settings.DATABASE_REPLICA_STICKY_HEADER)
+        if not token:
+            return False
+        try:
+            _sticky_signer().unsign(token, max_age=settings.DATABASE_REPLICA_STICKY_SECONDS)
+        except signing.BadSignature:  # also raised when expired
+            return False
+        return True
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return self.get_response(request)
+
+        writes = request.method in self.UNSAFE_METHODS
+        if not (writes or self.recently_wrote(request)):
+            with use_replica(random.choice(replicas)):
+                return self.get_response(request)
+
+        with use_primary():
+            response = self.get_response(request)
+        if writes:
+            response[settings.DATABASE_REPLICA_STICKY_HEADER] = _sticky_signer().sign('primary')
+        return response
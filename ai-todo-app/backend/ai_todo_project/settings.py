@@ -1,8 +1,10 @@
 import os
 from pathlib import Path
-import dj_database_url
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +43,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Add CORS middleware, preferably very high
     'django.middleware.common.CommonMiddleware',
+    'ai_todo_project.db_router.PrimaryPinningMiddleware', # Read-your-writes for the read replicas
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -70,11 +73,19 @@ ASGI_APPLICATION = 'ai_todo_project.asgi.application' # Enable ASGI for async vi
 
 # Database configuration
 # Get from .env using dj-database-url for flexibility
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3') # Default to SQLite if env var not set
+# See ai_todo_project/database.py for connection reuse, health checks, SQLite pragmas and pooling
 DATABASES = {
-    'default': dj_database_url.parse(DATABASE_URL)
+    'default': database_config('sqlite:///db.sqlite3') # Default to SQLite if DATABASE_URL is not set
 }
 
+# Read replicas (optional), see ai_todo_project/db_router.py
+# Set DATABASE_REPLICA_URLS to a comma-separated list of replica URLs; each request's safe reads go to one random replica.
+DATABASES.update(replica_configs())
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['ai_todo_project.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICA_STICKY_HEADER = 'X-DB-Primary' # sent back by the client after a write, see db_router.py
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', '5')) # keep a client's reads on the primary this long after it writes (> replication lag)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -145,4 +156,22 @@ DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 # CORS Headers settings
 CORS_ALLOW_ALL_ORIGINS = False # Set to False for production, then use CORS_ALLOWED_ORIGINS
-CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') # Get from .env
\ No newline at end of file
+CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') # Get from .env
+CORS_ALLOW_HEADERS = (*default_headers, DATABASE_REPLICA_STICKY_HEADER) # the client echoes the read-your-writes header
+CORS_EXPOSE_HEADERS = [DATABASE_REPLICA_STICKY_HEADER] # and must be able to read it from write responses
+
+# Speech-to-text (see tasks/asr.py)
+# ASR_BACKEND is 'transformers' (float32, the original pipeline) or 'quantized' (int8 dynamic quantization).
+# Run `python manage.py export_quantized_asr` once so the quantized backend starts from the exported int8 weights.
+ASR_BACKEND = os.getenv('ASR_BACKEND', 'transformers')
+ASR_MODEL = os.getenv('ASR_MODEL', 'openai/whisper-base')
+ASR_QUANTIZED_PATH = os.getenv('ASR_QUANTIZED_PATH', os.path.join(BASE_DIR, 'models', 'whisper-base-int8.pt'))
+ASR_THREADS = int(os.getenv('ASR_THREADS', '0')) # torch intra-op threads per process, 0 = torch default
+ASR_SAMPLES_DIR = os.getenv('ASR_SAMPLES_DIR', os.path.join(BASE_DIR, 'tasks', 'asr_samples')) # clips + reference transcripts for benchmark_asr
+
+
+# Due-date reminders (see tasks/reminders.py), run with `python manage.py run_reminders`
+REMINDER_NOTIFIER = os.getenv('REMINDER_NOTIFIER', 'tasks.reminders.ConsoleNotifier') # dotted path to a tasks.reminders.Notifier subclass
+REMINDER_TIME = os.getenv('REMINDER_TIME', '09:00') # local time (TIME_ZONE) on the due date
+REMINDER_LOOKAHEAD_HOURS = int(os.getenv('REMINDER_LOOKAHEAD_HOURS', '48')) # only reminders this far ahead are held in memory
+REMINDER_POLL_SECONDS = int(os.getenv('REMINDER_POLL_SECONDS', '30')) # how often changes made by other processes are picked up
@@ -0,0 +1,40 @@
+# Gunicorn configuration for the AI To-Do backend.
+# Started from the backend directory, gunicorn picks this file up automatically:
+#
+#     gunicorn ai_todo_project.wsgi
+#
+# With GUNICORN_PRELOAD=True (the default) the Whisper and spaCy models are
+# loaded once in the master and shared copy-on-write by every worker, so eight
+# workers cost about one copy of the weights instead of eight (see
+# tasks/preload.py). Run `python manage.py measure_worker_memory` to check.
+# With GUNICORN_PRELOAD=False every worker loads its own copy at boot.
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '8'))
+# Transcribing a long voice note on CPU can take a while.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Recycled workers are forked from the master again, so they share the models too.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported, before any fork.
+    if preload_app:
+        from tasks.preload import preload_models
+        preload_models()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from tasks.preload import after_fork
+        after_fork()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        # Load at boot rather than on the first request, so the memory cost is visible up front.
+        from tasks import ai_integration  # noqa: F401
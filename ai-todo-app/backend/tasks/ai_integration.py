@@ -3,28 +3,25 @@ import spacy
 from datetime import datetime, timedelta, date
 import re
 import asyncio
-import io # NEW: For handling in-memory audio files
 
-# NEW: Imports for Whisper STT
-from transformers import pipeline
-import torch
-import torchaudio
-import soundfile as sf # Used for reading audio files if torchaudio has issues with specific formats
+# Speech-to-text backends (float32 transformers or int8 quantized), see tasks/asr.py
+from .asr import configure_threads, get_backend, load_audio
 
-# --- Initialize Whisper Pipeline (Load model once at startup) ---
+# --- Initialize ASR backend (Load model once at startup) ---
 # This will download the model the first time it runs.
-# Choose a model size: "tiny", "base", "small", "medium", "large"
-# "tiny" or "base" are good for CPU. "small" or "medium" might be slow on CPU.
-# Requires significant RAM (e.g., "small" is ~1GB, "medium" is ~3GB)
-print("Loading Whisper ASR pipeline (this may take a moment)...")
-whisper_pipeline = None # Initialize as None
+# Choose the model with ASR_MODEL ("openai/whisper-tiny", "openai/whisper-base", ...)
+# and the backend with ASR_BACKEND ("transformers" or "quantized").
+# "quantized" needs roughly a quarter of the memory for the Linear weights and is
+# faster on CPU; run `manage.py benchmark_asr` to compare accuracy on your clips.
+print("Loading ASR backend (this may take a moment)...")
+asr_backend = None # Initialize as None
 try:
-    # device=0 for GPU, device=-1 for CPU
-    # Use a smaller model like "base" or "small" for CPU-only or limited RAM
-    whisper_pipeline = pipeline("automatic-speech-recognition", model="openai/whisper-base", device=-1)
-    print("Whisper ASR pipeline loaded successfully.")
+    configure_threads()
+    asr_backend = get_backend()
+    asr_backend.load()
+    print(f"ASR backend '{asr_backend.name}' loaded successfully.")
 except Exception as e:
-    print(f"Error loading Whisper pipeline: {e}. Speech-to-Text will not work.")
+    print(f"Error loading ASR backend: {e}. Speech-to-Text will not work.")
 
 
 # Load spaCy model for NLP
@@ -40,36 +37,19 @@ except OSError:
 # --- Speech-to-Text Transcription (Self-Hosted Whisper) ---
 async def transcribe_audio(audio_file_content: bytes, audio_mime_type: str) -> str:
     """
-    Transcribes audio content using a self-hosted Whisper model.
+    Transcribes audio content using the configured self-hosted ASR backend.
     Expects audio_file_content as bytes (raw audio data).
     """
-    if not whisper_pipeline:
-        raise Exception("Whisper ASR pipeline not loaded. Cannot transcribe audio.")
+    if not asr_backend:
+        raise Exception("ASR backend not loaded. Cannot transcribe audio.")
 
     try:
-        # Create a BytesIO object from the audio content
-        audio_buffer = io.BytesIO(audio_file_content)
-        
-        # torchaudio.load can read from file-like objects
-        # It returns (waveform, sample_rate)
-        waveform, sample_rate = torchaudio.load(audio_buffer)
-
-        # If sample rate is not 16000 (Whisper's default), resample
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-            waveform = resampler(waveform)
-        
-        # The pipeline expects a single channel (mono)
-        if waveform.shape[0] > 1:
-            waveform = torch.mean(waveform, dim=0, keepdim=True) # Convert stereo to mono
-
-        # Convert to numpy array for the pipeline
-        audio_array = waveform.squeeze().numpy()
+        # Decode, resample to 16 kHz and downmix to mono
+        audio_array, _ = load_audio(audio_file_content)
 
         # Perform transcription
-        transcription_result = whisper_pipeline(audio_array)
-        transcribed_text = transcription_result['text']
-        
+        transcribed_text = asr_backend.transcribe(audio_array)
+
         print(f"Whisper Transcribed: '{transcribed_text}'")
         return transcribed_text
 
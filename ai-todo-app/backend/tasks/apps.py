@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from ai_todo_project.database import configure_sqlite
+
+        # Connect the model signal handlers.
+        from . import signals  # noqa: F401
+
+        connection_created.connect(configure_sqlite, dispatch_uid='tasks_configure_sqlite')
@@ -0,0 +1,187 @@
+import io
+import os
+
+from django.conf import settings
+
+# Speech-to-text backends for voice tasks.
+# torch and transformers are imported inside the backends, so this module can
+# be imported (e.g. by management commands) without loading either library.
+
+SAMPLE_RATE = 16000 # Whisper expects 16 kHz mono audio
+
+
+class ASRBackend:
+    """
+    Base class for speech-to-text backends.
+    Subclasses implement load() and transcribe(); load() is called once at startup.
+    """
+    name = None
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio_array) -> str:
+        """
+        Transcribes a mono float32 numpy array sampled at SAMPLE_RATE.
+        """
+        raise NotImplementedError
+
+
+class TransformersBackend(ASRBackend):
+    """
+    The float32 transformers pipeline on CPU (the original behaviour).
+    """
+    name = 'transformers'
+
+    def load(self):
+        from transformers import pipeline
+
+        # device=0 for GPU, device=-1 for CPU
+        self.pipeline = pipeline("automatic-speech-recognition", model=self.model_name, device=-1)
+
+    def transcribe(self, audio_array) -> str:
+        return self.pipeline(audio_array)['text']
+
+
+class QuantizedBackend(ASRBackend):
+    """
+    Whisper with every nn.Linear layer dynamically quantized to int8.
+
+    If `weights_path` points to weights written by `manage.py export_quantized_asr`,
+    the quantized weights are loaded directly and the float32 checkpoint is never
+    read; otherwise the float32 model is downloaded and quantized at startup.
+    """
+    name = 'quantized'
+
+    def __init__(self, model_name, weights_path=None):
+        super().__init__(model_name)
+        self.weights_path = weights_path
+
+    def load(self):
+        import torch
+        from transformers import (
+            AutoProcessor, GenerationConfig, WhisperConfig, WhisperForConditionalGeneration, pipeline,
+        )
+
+        if self.weights_path and os.path.exists(self.weights_path):
+            # Build the model skeleton from the config only, then fill in the int8 weights.
+            model = quantize(WhisperForConditionalGeneration(WhisperConfig.from_pretrained(self.model_name)))
+            model.load_state_dict(torch.load(self.weights_path, map_location='cpu', weights_only=False))
+            # A model built from its config gets a default generation config, without
+            # Whisper's forced decoder ids, language and task tokens or timestamp rules.
+            model.generation_config = GenerationConfig.from_pretrained(self.model_name)
+        else:
+            model = quantize(WhisperForConditionalGeneration.from_pretrained(self.model_name))
+        model.eval()
+
+        processor = AutoProcessor.from_pretrained(self.model_name)
+        self.pipeline = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            device=-1,
+        )
+
+    def transcribe(self, audio_array) -> str:
+        import torch
+
+        with torch.inference_mode():
+            return self.pipeline(audio_array)['text']
+
+
+BACKENDS = {
+    TransformersBackend.name: TransformersBackend,
+    QuantizedBackend.name: QuantizedBackend,
+}
+
+
+def quantize(model):
+    """
+    Returns a copy of `model` with its nn.Linear layers quantized to int8.
+    Weights are stored as int8 and activations are quantized on the fly,
+    which roughly quarters the Linear weight memory and speeds up CPU matmuls.
+    """
+    import torch
+
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def get_backend(name=None):
+    """
+    Returns an (unloaded) backend configured from the ASR_* settings.
+    """
+    name = name or settings.ASR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}', expected one of: {', '.join(BACKENDS)}")
+    if name == QuantizedBackend.name:
+        return QuantizedBackend(settings.ASR_MODEL, settings.ASR_QUANTIZED_PATH)
+    return BACKENDS[name](settings.ASR_MODEL)
+
+
+def configure_threads():
+    """
+    Applies ASR_THREADS to torch, if set. Oversubscribing cores across several
+    workers is the most common cause of slow CPU inference.
+    """
+    if settings.ASR_THREADS:
+        import torch
+
+        torch.set_num_threads(settings.ASR_THREADS)
+
+
+def load_audio(audio_file_content: bytes):
+    """
+    Decodes audio bytes into a mono float32 numpy array at SAMPLE_RATE.
+    Returns (audio_array, duration_seconds).
+    """
+    import torch
+    import torchaudio
+
+    # torchaudio.load can read from file-like objects
+    # It returns (waveform, sample_rate)
+    waveform, sample_rate = torchaudio.load(io.BytesIO(audio_file_content))
+
+    # If sample rate is not 16000 (Whisper's default), resample
+    if sample_rate != SAMPLE_RATE:
+        resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=SAMPLE_RATE)
+        waveform = resampler(waveform)
+
+    # The pipeline expects a single channel (mono)
+    if waveform.shape[0] > 1:
+        waveform = torch.mean(waveform, dim=0, keepdim=True) # Convert stereo to mono
+
+    audio_array = waveform.squeeze().numpy()
+    return audio_array, len(audio_array) / SAMPLE_RATE
+
+
+def normalize_transcript(text):
+    """
+    Lowercases and strips punctuation, so WER compares words only.
+    """
+    return ''.join(ch if ch.isalnum() or ch.isspace() or ch == "'" else ' ' for ch in text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance between the two texts divided by the
+    number of reference words.
+    """
+    ref, hyp = normalize_transcript(reference), normalize_transcript(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, start=1):
+            current.append(min(
+                previous[j] + 1, # deletion
+                current[j - 1] + 1, # insertion
+                previous[j - 1] + (ref_word != hyp_word), # substitution
+            ))
+        previous = current
+    return previous[-1] / len(ref)
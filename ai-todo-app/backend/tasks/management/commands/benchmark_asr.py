@@ -0,0 +1,138 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.asr import BACKENDS, configure_threads, get_backend, load_audio, normalize_transcript, word_error_rate
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.mp3', '.ogg', '.webm', '.m4a')
+
+
+def current_rss_mb():
+    # Resident set size right now (Linux); falls back to the peak elsewhere.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024 # bytes on macOS, KiB on Linux
+
+
+def find_samples(directory):
+    """
+    Returns (audio_path, reference_text) for every clip in `directory` that has
+    a reference transcript next to it (same name, .txt extension).
+    """
+    samples = []
+    for path in sorted(Path(directory).iterdir()):
+        reference = path.with_suffix('.txt')
+        if path.suffix.lower() in AUDIO_EXTENSIONS and reference.exists():
+            samples.append((path, reference.read_text(encoding='utf-8').strip()))
+    return samples
+
+
+def corpus_wer(references, hypotheses):
+    # Weighted by reference length, so long clips count for more than short ones.
+    words = sum(len(normalize_transcript(ref)) for ref in references)
+    errors = sum(word_error_rate(ref, hyp) * len(normalize_transcript(ref)) for ref, hyp in zip(references, hypotheses))
+    return errors / words if words else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares ASR backends on sample clips: model load time, RSS, real-time factor '
+        '(processing time / audio duration, lower is faster) and word error rate against the '
+        'reference transcripts and against the first backend. Each backend runs in its own '
+        'process so the memory figures do not overlap.'
+    )
+
+    # The checks import the URLconf, which loads the configured models; not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', action='append', choices=list(BACKENDS),
+                            help='Backend to measure; repeat to compare (default: all, first is the baseline).')
+        parser.add_argument('--samples', default=settings.ASR_SAMPLES_DIR,
+                            help='Directory of audio clips, each with a .txt reference transcript (default: ASR_SAMPLES_DIR).')
+        parser.add_argument('--worker', action='store_true', help='Internal: measure a single backend and print JSON.')
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['samples']):
+            raise CommandError(f"Samples directory '{options['samples']}' does not exist.")
+        samples = find_samples(options['samples'])
+        if not samples:
+            raise CommandError(f"No audio clips with .txt reference transcripts in '{options['samples']}'.")
+        backends = options['backend'] or list(BACKENDS)
+
+        if options['worker']:
+            self.stdout.write(json.dumps(self.measure(backends[0], samples)))
+            return
+
+        results = {}
+        for name in backends:
+            self.stdout.write(f'Measuring {name}...')
+            completed = subprocess.run(
+                [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_asr',
+                 '--worker', '--backend', name, '--samples', options['samples']],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                raise CommandError(f'{name} failed:\n{completed.stderr}')
+            # The worker prints progress from the model libraries; the JSON is the last line.
+            results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        references = [reference for _, reference in samples]
+        baseline = results[backends[0]]['transcripts']
+        audio_seconds = sum(results[backends[0]]['durations'])
+        self.stdout.write(f'\n{len(samples)} clips, {audio_seconds:.1f}s of audio\n')
+        self.stdout.write(
+            f"{'backend':<14}{'load s':>8}{'RSS MB':>9}{'peak MB':>9}{'RTF':>8}{'WER':>8}{f'vs {backends[0]}':>18}"
+        )
+        for name, result in results.items():
+            rtf = sum(result['elapsed']) / audio_seconds if audio_seconds else 0.0
+            self.stdout.write(
+                f"{name:<14}{result['load_seconds']:>8.1f}{result['rss_mb']:>9.0f}{result['peak_rss_mb']:>9.0f}"
+                f"{rtf:>8.3f}{corpus_wer(references, result['transcripts']):>8.1%}"
+                f"{corpus_wer(baseline, result['transcripts']):>18.1%}"
+            )
+
+    def measure(self, name, samples):
+        configure_threads()
+        clips = [load_audio(path.read_bytes()) for path, _ in samples]
+        rss_before = current_rss_mb()
+
+        backend = get_backend(name)
+        started = time.perf_counter()
+        backend.load()
+        load_seconds = time.perf_counter() - started
+
+        # One untimed run so lazy initialisation is not charged to the first clip.
+        backend.transcribe(clips[0][0])
+
+        transcripts, elapsed = [], []
+        for audio_array, _ in clips:
+            started = time.perf_counter()
+            transcripts.append(backend.transcribe(audio_array).strip())
+            elapsed.append(time.perf_counter() - started)
+
+        return {
+            'load_seconds': load_seconds,
+            'rss_mb': current_rss_mb() - rss_before,
+            'peak_rss_mb': peak_rss_mb(),
+            'durations': [duration for _, duration in clips],
+            'elapsed': elapsed,
+            'transcripts': transcripts,
+        }
@@ -0,0 +1,75 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.renderers import FastJSONRenderer
+from tasks.serializers import TaskSerializer, fast_list_data
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares rendering the task list through TaskSerializer + JSONRenderer with the fast '
+        '.values_list() path + FastJSONRenderer, and checks that both produce the same bytes. '
+        'The generated tasks are rolled back afterwards.'
+    )
+
+    # The checks import the URLconf, which loads the AI models; not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Best of this many runs is reported.')
+
+    def generate(self, rows):
+        rng = random.Random(rows)
+        today = date.today()
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        categories = [choice for choice, _ in Task.CATEGORY_CHOICES]
+        Task.objects.bulk_create([
+            Task(
+                text=f'Task {i}: call the café about order #{rng.randrange(10000)}',
+                priority=rng.choice(priorities),
+                status=rng.choice(statuses),
+                category=rng.choice(categories),
+                due_date=today + timedelta(days=rng.randrange(-30, 30)) if rng.random() < 0.7 else None,
+            )
+            for i in range(rows)
+        ], batch_size=5000)
+
+    def best_of(self, repeat, render):
+        timings, output = [], None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render()
+            timings.append(time.perf_counter() - started)
+        return min(timings), output
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8}{'serializer s':>15}{'fast s':>10}{'speedup':>10}")
+        for rows in options['rows']:
+            try:
+                with transaction.atomic():
+                    self.generate(rows)
+                    queryset = Task.objects.all()
+                    slow, expected = self.best_of(options['repeat'], lambda: JSONRenderer().render(
+                        TaskSerializer(queryset, many=True).data
+                    ))
+                    fast, actual = self.best_of(options['repeat'], lambda: FastJSONRenderer().render(
+                        fast_list_data(queryset, TaskSerializer)
+                    ))
+                    raise Rollback
+            except Rollback:
+                pass
+            if actual != expected:
+                raise CommandError(f'Fast output differs from TaskSerializer output at {rows} rows.')
+            self.stdout.write(f'{rows:>8}{slow:>15.3f}{fast:>10.3f}{slow / fast:>9.1f}x')
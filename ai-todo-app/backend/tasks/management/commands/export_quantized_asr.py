@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.asr import quantize
+
+
+class Command(BaseCommand):
+    help = (
+        'Quantizes the Whisper model to int8 and saves the weights to ASR_QUANTIZED_PATH, '
+        'so the quantized ASR backend can start without reading the float32 checkpoint.'
+    )
+
+    # The checks import the URLconf, which loads the configured models; not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=settings.ASR_MODEL, help='Hugging Face model id (default: ASR_MODEL).')
+        parser.add_argument('--output', default=settings.ASR_QUANTIZED_PATH, help='Output file (default: ASR_QUANTIZED_PATH).')
+
+    def handle(self, *args, **options):
+        import torch
+        from transformers import WhisperForConditionalGeneration
+
+        model = WhisperForConditionalGeneration.from_pretrained(options['model'])
+        float_size = sum(p.numel() * p.element_size() for p in model.parameters())
+        quantized = quantize(model)
+
+        os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+        torch.save(quantized.state_dict(), options['output'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved int8 weights for {options['model']} to {options['output']} "
+            f"({os.path.getsize(options['output']) / 2**20:.1f} MB, float32 parameters were {float_size / 2**20:.1f} MB)."
+        ))
+        if options['model'] != settings.ASR_MODEL:
+            self.stdout.write(f"Set ASR_MODEL={options['model']} so the backend builds the matching architecture.")
@@ -0,0 +1,150 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MODES = {
+    'preload': 'True',
+    'no-preload': 'False',
+}
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces; the parent pid follows the closing parenthesis.
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def memory_usage(pid):
+    """
+    Returns RSS, PSS, shared and private memory of a process in MB.
+    PSS divides every shared page between the processes sharing it, so the PSS
+    of a group of processes adds up to the memory they actually use together.
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': values.get('Rss', 0.0),
+        'pss': values.get('Pss', 0.0),
+        'shared': values.get('Shared_Clean', 0.0) + values.get('Shared_Dirty', 0.0),
+        'private': values.get('Private_Clean', 0.0) + values.get('Private_Dirty', 0.0),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts gunicorn with and without pre-fork model loading, waits until every worker '
+        'has loaded the models, and reports the RSS, PSS, shared and private memory of the '
+        'master and each worker. Linux only (reads /proc/<pid>/smaps_rollup).'
+    )
+
+    # The checks import the URLconf, which loads the models in this process; not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--mode', choices=list(MODES), action='append',
+                            help='Mode to measure; repeat for several (default: both).')
+        parser.add_argument('--bind', default='127.0.0.1:8765')
+        parser.add_argument('--settle', type=float, default=5.0,
+                            help='Seconds the total RSS must stay flat before measuring.')
+        parser.add_argument('--timeout', type=float, default=600.0, help='Seconds to wait for the models to load.')
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('This command needs Linux 4.14 or newer (/proc/<pid>/smaps_rollup).')
+
+        totals = {}
+        for mode in options['mode'] or list(MODES):
+            totals[mode] = self.measure(mode, options)
+
+        if len(totals) > 1:
+            self.stdout.write('')
+            for mode, total in totals.items():
+                self.stdout.write(f"{mode:<12} total PSS {total['pss']:8.0f} MB, summed RSS {total['rss']:8.0f} MB")
+            if totals.get('no-preload', {}).get('pss') and totals.get('preload', {}).get('pss'):
+                self.stdout.write(
+                    f"Pre-fork loading uses {totals['preload']['pss'] / totals['no-preload']['pss']:.0%} "
+                    f"of the memory of per-worker loading with {options['workers']} workers."
+                )
+
+    def measure(self, mode, options):
+        env = dict(
+            os.environ,
+            GUNICORN_PRELOAD=MODES[mode],
+            GUNICORN_WORKERS=str(options['workers']),
+            GUNICORN_BIND=options['bind'],
+            GUNICORN_MAX_REQUESTS='0',
+        )
+        self.stdout.write(f"Starting gunicorn ({mode}, {options['workers']} workers)...")
+        master = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'ai_todo_project.wsgi'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            pids = self.wait_until_loaded(master, options)
+            usage = {pid: memory_usage(pid) for pid in pids}
+        finally:
+            master.send_signal(signal.SIGTERM)
+            try:
+                master.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                master.kill()
+
+        self.stdout.write(f"{'process':<16}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+        for pid, values in usage.items():
+            label = f'master {pid}' if pid == master.pid else f'worker {pid}'
+            self.stdout.write(
+                f"{label:<16}{values['rss']:>10.0f}{values['pss']:>10.0f}{values['shared']:>11.0f}{values['private']:>12.0f}"
+            )
+        total = {key: sum(values[key] for values in usage.values()) for key in ('rss', 'pss', 'shared', 'private')}
+        self.stdout.write(
+            f"{'total':<16}{total['rss']:>10.0f}{total['pss']:>10.0f}{total['shared']:>11.0f}{total['private']:>12.0f}\n"
+        )
+        return total
+
+    def wait_until_loaded(self, master, options):
+        """
+        Waits until all workers are up and the total RSS has stopped growing,
+        i.e. every process has finished loading the models.
+        """
+        deadline = time.monotonic() + options['timeout']
+        last_total, stable_since = None, None
+        while time.monotonic() < deadline:
+            if master.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {master.returncode}.')
+            workers = child_pids(master.pid)
+            if len(workers) == options['workers']:
+                pids = [master.pid] + workers
+                try:
+                    total = sum(memory_usage(pid)['rss'] for pid in pids)
+                except OSError:
+                    # A worker restarted between listing and reading.
+                    total = None
+                if total is not None and last_total is not None and abs(total - last_total) <= 0.01 * last_total:
+                    stable_since = stable_since or time.monotonic()
+                    if time.monotonic() - stable_since >= options['settle']:
+                        return pids
+                else:
+                    stable_since = None
+                last_total = total
+            time.sleep(1)
+        raise CommandError('Timed out waiting for the workers to load the models.')
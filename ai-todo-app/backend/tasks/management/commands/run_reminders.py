@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from tasks import reminders
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the due-date reminder scheduler in the foreground. Run exactly one of these; '
+        'it picks up task changes made by the API processes every REMINDER_POLL_SECONDS.'
+    )
+
+    # The checks import the URLconf, which loads the AI models; not needed here.
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        # Registered as the process's scheduler, so Task signals in this process reach it directly.
+        reminders.scheduler = scheduler = reminders.ReminderScheduler()
+        self.stdout.write(f'Reminder scheduler started ({type(scheduler.notifier).__name__}).')
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Reminder scheduler stopped.')
@@ -44,6 +44,12 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['-priority', 'due_date', '-created_at']
+        indexes = [
+            # Range scans of the reminder scheduler (tasks/reminders.py): pending
+            # tasks due in the look-ahead window, and tasks changed since the last poll.
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['last_modified_at'], name='task_modified_idx'),
+        ]
 
     def __str__(self):
         return self.text[:50]
\ No newline at end of file
@@ -0,0 +1,44 @@
+import gc
+
+# Pre-fork model loading for gunicorn (see gunicorn.conf.py).
+#
+# The Whisper and spaCy models are loaded once in the gunicorn master; workers
+# are forked afterwards and share those pages copy-on-write. A shared page
+# stays shared until someone writes to it, so two things matter:
+#
+# - Tensor data lives in storage buffers separate from the Python objects, so
+#   the refcount updates done by request handling never touch the weights.
+#   Inference only reads them.
+# - The cyclic garbage collector writes to the header of every tracked object
+#   it visits. gc.freeze() moves everything allocated so far into a permanent
+#   generation the collector ignores, so a collection in a worker does not
+#   dirty (and so copy) every page that holds a model object.
+
+
+def preload_models():
+    """
+    Loads the AI models in the current (master) process and freezes the
+    resulting objects. Call once, right before the workers are forked.
+    """
+    # Collections during loading would leave freed holes in pages that are
+    # then shared, and any allocation in a child would write into them.
+    gc.disable()
+    try:
+        from tasks import ai_integration  # noqa: F401  (loads the ASR backend and spaCy)
+
+        # Nothing should hold a database connection across the fork.
+        from django.db import connections
+        connections.close_all()
+    finally:
+        gc.freeze()
+
+
+def after_fork():
+    """
+    Per-worker setup after the fork: re-enable the collector (frozen objects
+    stay exempt) and apply the torch thread setting to the new process.
+    """
+    gc.enable()
+
+    from tasks.asr import configure_threads
+    configure_threads()
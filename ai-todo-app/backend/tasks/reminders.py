@@ -0,0 +1,206 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ai_todo_project.db_router import use_primary
+
+from .models import Task
+
+# Due-date reminders.
+#
+# A reminder fires at REMINDER_TIME (local time) on a pending task's due date.
+# Only reminders inside the look-ahead window (REMINDER_LOOKAHEAD_HOURS) are
+# kept in memory, in a heap ordered by fire time, so memory is bounded by the
+# number of tasks due in the window, not by the size of the table.
+#
+# The window is filled with one indexed range query (status, due_date) at
+# startup and extended the same way as time moves on. Changes reach the
+# scheduler in two ways:
+#   - Task save/delete signals in the scheduler's own process (signals.py)
+#   - a poll for tasks changed since the last poll (indexed on
+#     last_modified_at), for changes made by other processes
+# Before a reminder fires, the task is re-read, so a task that was completed,
+# rescheduled or deleted elsewhere in the meantime is never reminded about.
+# All of these reads go to the primary database: a lagging read replica would
+# miss recent changes, and the poll would not see them again once last_poll
+# has moved past them.
+
+
+POLL_OVERLAP_SECONDS = 5
+
+
+class Notifier:
+    """
+    Delivers reminders. Subclass and point REMINDER_NOTIFIER at it to send
+    reminders somewhere else (push notifications, email, ...).
+    """
+
+    def notify(self, task):
+        raise NotImplementedError
+
+
+class ConsoleNotifier(Notifier):
+    def notify(self, task):
+        print(f"Reminder: '{task.text[:80]}' is due {task.due_date} ({task.priority} priority)")
+
+
+def get_notifier():
+    return import_string(settings.REMINDER_NOTIFIER)()
+
+
+def fire_time(due_date):
+    """
+    When the reminder for a task due on `due_date` fires (aware datetime).
+    """
+    hour, minute = (int(part) for part in settings.REMINDER_TIME.split(':'))
+    return timezone.make_aware(datetime.combine(due_date, datetime.min.time()).replace(hour=hour, minute=minute))
+
+
+class ReminderScheduler:
+    def __init__(self, notifier=None, lookahead=None, clock=timezone.now):
+        self.notifier = notifier or get_notifier()
+        self.lookahead = lookahead or timedelta(hours=settings.REMINDER_LOOKAHEAD_HOURS)
+        self.clock = clock
+        self.heap = []  # (fire_at, task_id); entries no longer in self.scheduled are skipped
+        self.scheduled = {}  # task_id -> fire_at
+        self.horizon = None  # reminders before this time are loaded
+        self.last_poll = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    # --- Keeping the window up to date ---
+
+    def sync(self):
+        """
+        Loads every pending reminder between now and the end of the look-ahead
+        window. Called at startup and whenever the window moves forward.
+        """
+        now = self.clock()
+        # The window grows in whole days, so it is extended (and queried) once a day.
+        horizon = timezone.make_aware(
+            datetime.combine(timezone.localdate(now + self.lookahead) + timedelta(days=1), datetime.min.time())
+        )
+        start = self.horizon or now
+        if start >= horizon:
+            return
+        tasks = Task.objects.filter(
+            status='pending',
+            due_date__gte=timezone.localdate(start),
+            due_date__lt=timezone.localdate(horizon),
+        ).only('pk', 'due_date', 'status')
+        with self.lock:
+            self.last_poll = self.last_poll or now
+            for task in tasks:
+                self._schedule(task.pk, fire_time(task.due_date), start, horizon)
+            self.horizon = horizon
+        self.wakeup.set()
+
+    def poll_changes(self):
+        """
+        Applies tasks changed since the last poll (made in other processes).
+        """
+        now = self.clock()
+        # Overlap the previous poll: a row written just before it may have
+        # committed just after it. Applying a change twice is harmless.
+        since = self.last_poll - timedelta(seconds=POLL_OVERLAP_SECONDS)
+        changed = Task.objects.filter(last_modified_at__gte=since).only('pk', 'due_date', 'status')
+        for task in changed:
+            self.update(task)
+        self.last_poll = now
+
+    def update(self, task):
+        """
+        Schedules, moves or cancels the reminder for a created or changed task.
+        """
+        now = self.clock()
+        with self.lock:
+            if self.horizon is None:
+                return
+            self.scheduled.pop(task.pk, None)
+            if task.status == 'pending' and task.due_date:
+                self._schedule(task.pk, fire_time(task.due_date), now, self.horizon)
+            self._compact()
+        self.wakeup.set()
+
+    def cancel(self, task_id):
+        with self.lock:
+            self.scheduled.pop(task_id, None)
+            self._compact()
+
+    def _schedule(self, task_id, fire_at, start, horizon):
+        if start <= fire_at < horizon:
+            self.scheduled[task_id] = fire_at
+            heapq.heappush(self.heap, (fire_at, task_id))
+
+    def _compact(self):
+        # Moved and canceled reminders leave stale heap entries behind; rebuild
+        # once they outnumber the live ones so the heap stays bounded too.
+        if len(self.heap) > 2 * len(self.scheduled) + 64:
+            self.heap = [(fire_at, task_id) for task_id, fire_at in self.scheduled.items()]
+            heapq.heapify(self.heap)
+
+    # --- Firing ---
+
+    def pop_due(self, now):
+        """
+        Removes and returns {task_id: fire_at} for every reminder due by `now`.
+        """
+        due = {}
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                fire_at, task_id = heapq.heappop(self.heap)
+                if self.scheduled.get(task_id) == fire_at:
+                    del self.scheduled[task_id]
+                    due[task_id] = fire_at
+        return due
+
+    def run_pending(self):
+        """
+        Fires every reminder that is due. Returns the number sent.
+        """
+        due = self.pop_due(self.clock())
+        if not due:
+            return 0
+        sent = 0
+        # Re-read the tasks: they may have changed since they were scheduled.
+        for task in Task.objects.filter(pk__in=due, status='pending'):
+            if task.due_date and fire_time(task.due_date) == due[task.pk]:
+                try:
+                    self.notifier.notify(task)
+                    sent += 1
+                except Exception as e:
+                    print(f"Reminder for task {task.pk} failed: {e}")
+        return sent
+
+    def seconds_until_next(self):
+        with self.lock:
+            if not self.heap:
+                return None
+            return max((self.heap[0][0] - self.clock()).total_seconds(), 0)
+
+    def run_forever(self, stop=None):
+        """
+        Fires reminders as they come due, polling for changes every
+        REMINDER_POLL_SECONDS and extending the window as time moves on.
+        Runs until `stop` (a threading.Event) is set.
+        """
+        stop = stop or threading.Event()
+        poll_interval = settings.REMINDER_POLL_SECONDS
+        with use_primary():
+            self.sync()
+            while not stop.is_set():
+                self.run_pending()
+                self.poll_changes()
+                self.sync()
+                wait = self.seconds_until_next()
+                self.wakeup.clear()
+                self.wakeup.wait(poll_interval if wait is None else min(wait, poll_interval))
+
+
+# The scheduler running in this process, if any (see the run_reminders
+# command); the Task signals keep it current.
+scheduler = None
@@ -0,0 +1,34 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard JSONRenderer.
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, producing the
+    same bytes as the standard renderer for compact, unindented output.
+
+    orjson already writes compact UTF-8 with the same escaping as json.dumps
+    with ensure_ascii=False; only U+2028/U+2029 need escaping afterwards, as
+    JSONRenderer does. Dates and times are handed to DRF's encoder, which
+    formats them differently from orjson. Data orjson cannot encode (and
+    indented or ASCII-only output) goes through the standard renderer.
+    Floats are not covered: orjson writes 1e16 where json writes 1e+16. The
+    task API returns none.
+    """
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
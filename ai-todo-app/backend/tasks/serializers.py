@@ -1,4 +1,9 @@
-from rest_framework import serializers
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import Task
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -6,4 +11,89 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = '__all__' # Include all fields from the Task model
         read_only_fields = ('created_at', 'last_modified_at',) # These fields are set automatically by Django
-        # If you were to add a user field later, you might add 'user' here as well.
\ No newline at end of file
+        # If you were to add a user field later, you might add 'user' here as well.
+
+
+# --- Fast read-only list serialization ---
+# Serializing a list through TaskSerializer(many=True) builds a model instance
+# per row and runs every field's to_representation through DRF's generic
+# machinery. For list responses the same output can be produced straight
+# from .values_list() rows with one generated function per serializer class.
+
+def _iso_date(value):
+    return value.isoformat() if value else None
+
+
+def _iso_datetime(value, tz):
+    # Same as DRF's DateTimeField.to_representation with the ISO 8601 format.
+    if not value:
+        return None
+    # tzinfo checks instead of timezone.is_aware(): this runs for every row.
+    if tz is not None:
+        value = value.astimezone(tz) if value.tzinfo is not None else timezone.make_aware(value, tz)
+    elif value.tzinfo is not None:
+        value = timezone.make_naive(value, dt_timezone.utc)
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+# Fields whose to_representation returns database values unchanged.
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+)
+
+_compiled = {}
+
+
+def compile_row_serializer(serializer_class):
+    """
+    Returns (columns, row_to_dict) for a ModelSerializer whose readable fields
+    are all plain model columns: `columns` to pass to .values_list() and
+    `row_to_dict(row, tz)` building the same dict the serializer would.
+    Returns None if the serializer has fields this cannot reproduce.
+    """
+    if serializer_class in _compiled:
+        return _compiled[serializer_class]
+
+    model_fields = {field.name for field in serializer_class.Meta.model._meta.concrete_fields if not field.is_relation}
+    columns, entries, helpers = [], [], {'_iso_date': _iso_date, '_iso_datetime': _iso_datetime}
+    compiled = None
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if field.source not in model_fields or hasattr(field, 'timezone'):
+            break
+        index = len(columns)
+        columns.append(field.source)
+        value = f'row[{index}]'
+        if type(field) is serializers.DateField and getattr(field, 'format', api_settings.DATE_FORMAT).lower() == ISO_8601:
+            entries.append(f'{name!r}: _iso_date({value})')
+        elif type(field) is serializers.DateTimeField and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601:
+            entries.append(f'{name!r}: _iso_datetime({value}, tz)')
+        elif isinstance(field, _PASSTHROUGH_FIELDS) and not isinstance(field, serializers.MultipleChoiceField):
+            entries.append(f'{name!r}: {value}')
+        else:
+            # Any other field type goes through its own to_representation.
+            helpers[f'_field_{index}'] = field.to_representation
+            entries.append(f'{name!r}: (None if {value} is None else _field_{index}({value}))')
+    else:
+        source = 'def row_to_dict(row, tz):\n    return {' + ', '.join(entries) + '}\n'
+        exec(source, helpers)
+        compiled = (columns, helpers['row_to_dict'])
+
+    _compiled[serializer_class] = compiled
+    return compiled
+
+
+def fast_list_data(queryset, serializer_class):
+    """
+    The list TaskSerializer(queryset, many=True).data would return, built
+    from .values_list() rows. Falls back to the serializer when the fields
+    cannot be compiled.
+    """
+    compiled = compile_row_serializer(serializer_class)
+    if compiled is None:
+        return serializer_class(queryset, many=True).data
+    columns, row_to_dict = compiled
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    return [row_to_dict(row, tz) for row in queryset.values_list(*columns)]
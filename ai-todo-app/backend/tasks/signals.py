@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import reminders
+from .models import Task
+
+
+# --- Due-date reminders ---
+# Keeps a reminder scheduler running in this process current without
+# waiting for its next poll (see tasks/reminders.py).
+
+@receiver(post_save, sender=Task)
+def reschedule_reminder(sender, instance, **kwargs):
+    if reminders.scheduler is not None:
+        transaction.on_commit(lambda: reminders.scheduler.update(instance))
+
+
+@receiver(post_delete, sender=Task)
+def cancel_reminder(sender, instance, **kwargs):
+    if reminders.scheduler is not None:
+        task_id = instance.pk
+        transaction.on_commit(lambda: reminders.scheduler.cancel(task_id))
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ai_todo_project.db_router import PrimaryPinningMiddleware, PrimaryReplicaRouter, use_primary
+
+from . import reminders
+from .asr import QuantizedBackend, TransformersBackend, get_backend, word_error_rate
+from .models import Task
+from .reminders import Notifier, ReminderScheduler, fire_time
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, fast_list_data
+
+
+class WordErrorRateTests(SimpleTestCase):
+    def test_ignores_case_and_punctuation(self):
+        self.assertEqual(word_error_rate('Buy milk, tomorrow.', 'buy milk tomorrow'), 0.0)
+
+    def test_counts_substitutions_insertions_and_deletions(self):
+        self.assertAlmostEqual(word_error_rate('buy milk tomorrow', 'buy silk'), 2 / 3)
+        self.assertEqual(word_error_rate('call mom', 'call my mom'), 0.5)
+
+
+class ASRBackendTests(SimpleTestCase):
+    @override_settings(ASR_BACKEND='quantized', ASR_QUANTIZED_PATH='/tmp/whisper-int8.pt')
+    def test_backend_from_settings(self):
+        backend = get_backend()
+        self.assertIsInstance(backend, QuantizedBackend)
+        self.assertEqual(backend.weights_path, '/tmp/whisper-int8.pt')
+        self.assertIsInstance(get_backend('transformers'), TransformersBackend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend('onnx')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def routed_reads(self, method, headers=None):
+        seen = []
+
+        def view(request):
+            seen.extend(self.router.db_for_read(None) for _ in range(10))
+            return HttpResponse()
+
+        request = RequestFactory().generic(method, '/api/tasks/', headers=headers)
+        response = PrimaryPinningMiddleware(view)(request)
+        return set(seen), response
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(None), 'replica_0')
+        self.assertEqual(self.router.db_for_write(None), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'tasks'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'tasks'))
+
+    @override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1', 'replica_2'])
+    def test_a_request_reads_from_one_replica(self):
+        for _ in range(10):
+            self.assertEqual(len(self.routed_reads('GET')[0]), 1)
+
+    def test_reads_after_a_write_stick_to_primary(self):
+        dbs, response = self.routed_reads('PATCH')
+        self.assertEqual(dbs, {'default'})
+        token = response['X-DB-Primary']
+
+        self.assertEqual(self.routed_reads('GET', {'X-DB-Primary': token})[0], {'default'})
+        self.assertEqual(self.routed_reads('GET')[0], {'replica_0'})
+        self.assertEqual(self.routed_reads('GET', {'X-DB-Primary': 'forged'})[0], {'replica_0'})
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 60):
+            self.assertEqual(self.routed_reads('GET', {'X-DB-Primary': token})[0], {'replica_0'})
+
+    def test_tokens_follow_the_secret_key(self):
+        token = self.routed_reads('POST')[1]['X-DB-Primary']
+        with override_settings(SECRET_KEY='rotated', SECRET_KEY_FALLBACKS=[]):
+            self.assertEqual(self.routed_reads('GET', {'X-DB-Primary': token})[0], {'replica_0'})
+        with override_settings(SECRET_KEY='rotated', SECRET_KEY_FALLBACKS=[settings.SECRET_KEY]):
+            self.assertEqual(self.routed_reads('GET', {'X-DB-Primary': token})[0], {'default'})
+
+    def test_reminder_scheduler_reads_from_primary(self):
+        scheduler = ReminderScheduler(RecordingNotifier())
+        stop = threading.Event()
+        seen = []
+
+        def sync():
+            seen.append(self.router.db_for_read(Task))
+            stop.set()
+
+        with mock.patch.object(scheduler, 'sync', side_effect=sync):
+            scheduler.run_forever(stop)
+        self.assertEqual(seen, ['default'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(None), 'default')
+        self.assertFalse(self.routed_reads('POST')[1].has_header('X-DB-Primary'))
+
+
+class RecordingNotifier(Notifier):
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, task):
+        self.sent.append(task.text)
+
+
+@override_settings(REMINDER_TIME='09:00', REMINDER_LOOKAHEAD_HOURS=48)
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.today = date(2026, 3, 2)
+        self.now = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.notifier = RecordingNotifier()
+        self.scheduler = ReminderScheduler(self.notifier, clock=lambda: self.now)
+
+    def tearDown(self):
+        reminders.scheduler = None
+
+    def task(self, text, days, **kwargs):
+        return Task.objects.create(text=text, due_date=self.today + timedelta(days=days), **kwargs)
+
+    def advance_to(self, days, hour=9):
+        self.now = timezone.make_aware(datetime(2026, 3, 2 + days, hour, 0))
+        return self.scheduler.run_pending()
+
+    def test_only_the_lookahead_window_is_loaded(self):
+        self.task('today', 0)
+        self.task('in two days', 2)
+        self.task('next month', 30)
+        self.task('done', 0, status='completed')
+        self.scheduler.sync()
+        self.assertEqual(len(self.scheduler.scheduled), 2)
+
+        self.assertEqual(self.advance_to(0), 1)
+        self.assertEqual(self.notifier.sent, ['today'])
+
+    def test_signals_reschedule_and_cancel(self):
+        reminders.scheduler = self.scheduler
+        self.scheduler.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = self.task('moved', 0)
+            canceled = self.task('canceled', 0)
+            deleted = self.task('deleted', 1)
+        self.assertEqual(len(self.scheduler.scheduled), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.due_date = self.today + timedelta(days=1)
+            moved.save()
+            canceled.status = 'completed'
+            canceled.save()
+            deleted.delete()
+        self.assertEqual(self.scheduler.scheduled, {moved.pk: fire_time(moved.due_date)})
+
+        self.assertEqual(self.advance_to(0), 0)
+        self.assertEqual(self.advance_to(1), 1)
+        self.assertEqual(self.notifier.sent, ['moved'])
+
+    def test_changes_from_other_processes_are_polled(self):
+        self.scheduler.sync()
+        # No scheduler registered in this process, so only the poll sees it.
+        task = self.task('from the api', 1)
+        self.assertEqual(self.scheduler.scheduled, {})
+        self.scheduler.poll_changes()
+        self.assertEqual(self.scheduler.scheduled, {task.pk: fire_time(task.due_date)})
+
+    def test_stale_reminders_are_not_sent(self):
+        task = self.task('completed elsewhere', 0)
+        self.scheduler.sync()
+        Task.objects.filter(pk=task.pk).update(status='completed')
+        self.assertEqual(self.advance_to(0), 0)
+
+
+class FastTaskListTests(TestCase):
+    def test_output_matches_task_serializer(self):
+        Task.objects.create(text='Call the café \u2028 "today"\n', priority='High', due_date=date(2026, 3, 2))
+        Task.objects.create(text='No due date', category='Work', status='completed')
+        queryset = Task.objects.all()
+        expected = JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+        self.assertEqual(FastJSONRenderer().render(fast_list_data(queryset, TaskSerializer)), expected)
+        with timezone.override('UTC'):
+            expected = JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+            self.assertEqual(FastJSONRenderer().render(fast_list_data(queryset, TaskSerializer)), expected)
+
+    def test_renderer_matches_json_renderer(self):
+        data = [{'text': ''.join(map(chr, range(256))) + '\u2029\U0001F600', 'due': date(2026, 3, 2), 'n': None}]
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
@@ -5,7 +5,9 @@ from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Task
-from .serializers import TaskSerializer
+from rest_framework.renderers import BrowsableAPIRenderer
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, fast_list_data
 # NEW: Import transcribe_audio for self-hosted STT
 from .ai_integration import prioritize_task_with_ai, transcribe_audio
 import asyncio
@@ -16,6 +18,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     # Allow JSON for text input from web/mobile, and multipart/form-data for audio uploads from React Native
     parser_classes = (JSONParser, MultiPartParser, FormParser) # <-- CORRECTED PARSER CLASSES
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer) # Same JSON bytes as JSONRenderer, encoded with orjson when installed
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['category', 'status']
 
@@ -40,6 +43,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         # DjangoFilterBackend will automatically apply these if corresponding params are present in request.query_params
         filtered_queryset = self.filter_queryset(queryset) # Applies filters from filterset_fields
 
+        # JSON responses are built straight from .values_list() rows; the output is
+        # identical to TaskSerializer's (see serializers.fast_list_data).
+        if isinstance(request.accepted_renderer, FastJSONRenderer):
+            return Response(fast_list_data(filtered_queryset, self.get_serializer_class()))
+
         # Serialize the filtered queryset
         serializer = self.get_serializer(filtered_queryset, many=True)
         return Response(serializer.data)
@@ -6,17 +6,36 @@ import axios from 'axios';
 // For production, you'd have a .env.production file with your live backend URL.
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api';
 
+// Read-your-writes with the backend's read replicas: responses to writes carry
+// a short-lived X-DB-Primary token, and sending it back keeps our reads on the
+// primary database until the replicas have caught up with the write
+// (see backend/ai_todo_project/db_router.py). Expired tokens are ignored there.
+const PRIMARY_HEADER = 'X-DB-Primary';
+let primaryToken = null;
+
+// Keeps the token from a write response
+const rememberPrimary = (response) => {
+  const token = response.headers[PRIMARY_HEADER.toLowerCase()];
+  if (token) {
+    primaryToken = token;
+  }
+  return response;
+};
+
+// Adds the token, if any, to a request's headers
+const withPrimary = (headers) => (primaryToken ? { ...headers, [PRIMARY_HEADER]: primaryToken } : headers);
+
 // Function to add a new task to the backend
 export const addTask = async (taskText, category = 'Personal') => {
   try {
     // Make a POST request to the tasks endpoint
     // The full URL will be http://localhost:8000/api/tasks/
     const response = await axios.post(`${API_BASE_URL}/tasks/`, { text: taskText, category: category }, {
-      headers: {
+      headers: withPrimary({
         'Content-Type': 'application/json',
         // 'Authorization': `Bearer ${localStorage.getItem('token')}` // Uncomment if you add authentication
-      },
-    });
+      }),
+    }).then(rememberPrimary);
     // Django REST Framework typically returns the created object directly upon success
     return response.data;
   } catch (error) {
@@ -34,9 +53,9 @@ export const getTasks = async (params = {}) => {
     // Parameters (e.g., { status: 'completed' }) will be appended as query strings
     const response = await axios.get(`${API_BASE_URL}/tasks/`, {
       params: params, // Pass filtering parameters to Axios
-      headers: {
+      headers: withPrimary({
         // 'Authorization': `Bearer ${localStorage.getItem('token')}` // Uncomment if you add authentication
-      },
+      }),
     });
     // DRF typically returns a list of objects
     return response.data;
@@ -53,11 +72,11 @@ export const updateTask = async (id, updatedData) => {
   try {
     // Make a PATCH request to a specific task's endpoint (e.g., /api/tasks/123/)
     const response = await axios.patch(`${API_BASE_URL}/tasks/${id}/`, updatedData, {
-      headers: {
+      headers: withPrimary({
         'Content-Type': 'application/json',
         // 'Authorization': `Bearer ${localStorage.getItem('token')}` // Uncomment if you add authentication
-      },
-    });
+      }),
+    }).then(rememberPrimary);
     // DRF typically returns the updated object
     return response.data;
   } catch (error) {
@@ -73,10 +92,10 @@ export const deleteTask = async (id) => {
   try {
     // Make a DELETE request to a specific task's endpoint (e.g., /api/tasks/123/)
     await axios.delete(`${API_BASE_URL}/tasks/${id}/`, {
-      headers: {
+      headers: withPrimary({
         // 'Authorization': `Bearer ${localStorage.getItem('token')}` // Uncomment if you add authentication
-      },
-    });
+      }),
+    }).then(rememberPrimary);
     // No data is typically returned for a successful delete, just a status code (e.g., 204 No Content)
   } catch (error) {
     // Log the error for debugging purposes
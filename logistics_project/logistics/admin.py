@@ -1,19 +1,146 @@
 from django.contrib import admin
-from .models import Driver, Customer, Vehicle, Order, DriverLocation
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import (
+    Driver, Customer, Vehicle, Order, ArchivedOrder, DriverLocation, DriverSyncEvent, GeocodedAddress, Settlement,
+    ProofImage, DeliveryProof,
+)
 
 # Register your models here to make them accessible in the Django admin panel.
+# Every changelist selects the related rows its __str__ methods need, so the
+# number of queries per page does not grow with the number of rows shown.
+# Foreign keys use autocomplete widgets instead of rendering every row in a <select>.
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('order_id', 'customer', 'driver', 'status', 'created_at')
     list_filter = ('status', 'created_at')
     search_fields = ('order_id', 'customer__name', 'driver__user__username')
+    list_select_related = ('customer', 'driver__user')
+    autocomplete_fields = ('customer', 'driver')
+    list_per_page = 50
+    # Skips the extra unfiltered COUNT(*) over the whole table on filtered pages.
+    show_full_result_count = False
+
+# Archived orders are kept for history only and cannot be edited.
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('order_id', 'customer', 'driver', 'status', 'created_at', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('order_id', 'customer__name', 'driver__user__username')
+    list_select_related = ('customer', 'driver__user')
+    list_per_page = 50
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(Driver)
 class DriverAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone_number', 'is_available')
+    list_filter = ('is_available',)
     search_fields = ('user__username', 'phone_number')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    list_per_page = 50
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ('name', 'phone_number')
+    search_fields = ('name', 'phone_number')
+    list_per_page = 50
+
+@admin.register(Vehicle)
+class VehicleAdmin(admin.ModelAdmin):
+    list_display = ('license_plate', 'make', 'model', 'driver')
+    search_fields = ('license_plate', 'make', 'model')
+    list_select_related = ('driver__user',)
+    autocomplete_fields = ('driver',)
+    list_per_page = 50
+
+@admin.register(DriverLocation)
+class DriverLocationAdmin(admin.ModelAdmin):
+    list_display = ('driver', 'latitude', 'longitude', 'last_updated')
+    search_fields = ('driver__user__username',)
+    list_select_related = ('driver__user',)
+    autocomplete_fields = ('driver',)
+    list_per_page = 50
+
+@admin.register(DriverSyncEvent)
+class DriverSyncEventAdmin(admin.ModelAdmin):
+    list_display = ('client_id', 'driver', 'order_id', 'status', 'result', 'client_timestamp', 'received_at')
+    list_filter = ('result',)
+    search_fields = ('client_id', '=order_id', 'driver__user__username')
+    list_select_related = ('driver__user',)
+    autocomplete_fields = ('driver',)
+    list_per_page = 50
+    show_full_result_count = False
+
+@admin.register(GeocodedAddress)
+class GeocodedAddressAdmin(admin.ModelAdmin):
+    list_display = ('normalized_address', 'latitude', 'longitude', 'provider', 'created_at')
+    list_filter = ('provider',)
+    search_fields = ('normalized_address',)
+    list_per_page = 50
+    show_full_result_count = False
+
+# Settlements are computed by the reconciliation job; only cash_received is entered by hand.
+@admin.register(Settlement)
+class SettlementAdmin(admin.ModelAdmin):
+    list_display = ('day', 'driver', 'order_count', 'cod_total', 'cash_received', 'computed_at')
+    search_fields = ('driver__user__username',)
+    list_select_related = ('driver__user',)
+    autocomplete_fields = ('driver',)
+    readonly_fields = ('order_count', 'cod_total', 'computed_at')
+    date_hierarchy = 'day'
+    list_per_page = 50
+    show_full_result_count = False
+
+
+def thumbnail_tag(image):
+    # Only the cached thumbnail is shown, never the full-size original.
+    if image.status != 'READY':
+        return image.get_status_display()
+    return format_html(
+        '<img src="{}" alt="" style="max-height: 80px" loading="lazy">',
+        reverse('logistics:proof_thumbnail', args=[image.sha256]),
+    )
+
+# Proof images are stored and processed automatically and cannot be edited.
+@admin.register(ProofImage)
+class ProofImageAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'thumbnail', 'content_type', 'size', 'width', 'height', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('=sha256',)
+    readonly_fields = ('thumbnail',)
+    list_per_page = 50
+    show_full_result_count = False
+
+    @admin.display(description='Thumbnail')
+    def thumbnail(self, obj):
+        return thumbnail_tag(obj)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(DeliveryProof)
+class DeliveryProofAdmin(admin.ModelAdmin):
+    list_display = ('order_id', 'kind', 'driver', 'thumbnail', 'uploaded_at')
+    list_filter = ('kind',)
+    search_fields = ('=order_id', 'driver__user__username')
+    list_select_related = ('image', 'driver__user')
+    autocomplete_fields = ('driver',)
+    readonly_fields = ('thumbnail',)
+    raw_id_fields = ('image',)
+    list_per_page = 50
+    show_full_result_count = False
 
-admin.site.register(Customer)
-admin.site.register(Vehicle)
-admin.site.register(DriverLocation)
+    @admin.display(description='Thumbnail')
+    def thumbnail(self, obj):
+        return thumbnail_tag(obj.image)
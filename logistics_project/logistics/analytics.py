@@ -0,0 +1,230 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, DurationField, ExpressionWrapper, F, Q, Sum, When
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import ArchivedOrder, DeletedOrder, DeliveryCorrection, Order, OrderRollup, Watermark
+
+WATERMARK_NAME = 'order_rollups'
+
+CENTS = Decimal('0.01')
+
+DELIVERY_TIME = ExpressionWrapper(F('delivered_at') - F('created_at'), output_field=DurationField())
+
+# Delivered orders count in the hour they were delivered and every other order
+# in the hour it was created, so delivered counts measure throughput.
+DELIVERED = Q(status='DELIVERED', delivered_at__isnull=False)
+BUCKET_TIME = Case(When(DELIVERED, then=F('delivered_at')), default=F('created_at'), output_field=DateTimeField())
+
+
+def _hour_floor(value):
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _day_floor(value):
+    return timezone.localtime(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _hourly_aggregates(model, start, end):
+    return (
+        model.objects.filter(
+            Q(DELIVERED, delivered_at__gte=start, delivered_at__lt=end)
+            | (~DELIVERED & Q(created_at__gte=start, created_at__lt=end))
+        )
+        .annotate(bucket=TruncHour(BUCKET_TIME))
+        .values('bucket', 'driver_id', 'status')
+        .annotate(
+            order_count=Count('pk'),
+            cod_total=Sum('cod_amount'),
+            delivery_time_total=Sum(DELIVERY_TIME, filter=DELIVERED),
+        )
+        .order_by()
+    )
+
+
+def rollup_hours(start, end):
+    """
+    Recomputes the hourly rollup rows for every hour in [start, end)
+    with one grouped query over the live orders and one over the archived
+    orders, so archiving never changes history.
+    """
+    start, end = _hour_floor(start), _hour_floor(end)
+    if end <= start:
+        return
+    totals = {}
+    for model in (Order, ArchivedOrder):
+        for row in _hourly_aggregates(model, start, end):
+            key = (row['bucket'], row['driver_id'], row['status'])
+            total = totals.setdefault(key, {'order_count': 0, 'cod_total': 0, 'delivery_time_total': None})
+            total['order_count'] += row['order_count']
+            total['cod_total'] += row['cod_total'] or 0
+            if row['delivery_time_total'] is not None:
+                total['delivery_time_total'] = (total['delivery_time_total'] or timedelta()) + row['delivery_time_total']
+
+    with transaction.atomic():
+        OrderRollup.objects.filter(period='hour', bucket_start__gte=start, bucket_start__lt=end).delete()
+        OrderRollup.objects.bulk_create([
+            OrderRollup(
+                period='hour',
+                bucket_start=bucket,
+                driver_id=driver_id,
+                status=status,
+                **total,
+            )
+            for (bucket, driver_id, status), total in totals.items()
+        ], batch_size=1000)
+
+
+def rollup_days(start, end):
+    """
+    Recomputes the daily rollup rows for every day in [start, end)
+    from the hourly rollups, so the orders table is not read again.
+    """
+    start, end = _day_floor(start), _day_floor(end)
+    if end <= start:
+        return
+    rows = (
+        OrderRollup.objects.filter(period='hour', bucket_start__gte=start, bucket_start__lt=end)
+        .annotate(bucket=TruncDay('bucket_start'))
+        .values('bucket', 'driver_id', 'status')
+        .annotate(
+            total_orders=Sum('order_count'),
+            total_cod=Sum('cod_total'),
+            total_delivery_time=Sum('delivery_time_total'),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        OrderRollup.objects.filter(period='day', bucket_start__gte=start, bucket_start__lt=end).delete()
+        OrderRollup.objects.bulk_create([
+            OrderRollup(
+                period='day',
+                bucket_start=row['bucket'],
+                driver_id=row['driver_id'],
+                status=row['status'],
+                order_count=row['total_orders'],
+                cod_total=row['total_cod'] or 0,
+                delivery_time_total=row['total_delivery_time'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+def backfill_rollups(start, end, chunk=timedelta(days=1)):
+    """
+    Rebuilds all rollups for [start, end) one chunk at a time,
+    so memory and transaction size stay bounded on large tables.
+    """
+    start, end = _day_floor(start), _day_floor(end) + timedelta(days=1)
+    cursor = start
+    while cursor < end:
+        chunk_end = min(cursor + chunk, end)
+        rollup_hours(cursor, chunk_end)
+        rollup_days(cursor, chunk_end)
+        cursor = chunk_end
+
+
+def refresh_rollups(now=None):
+    """
+    Incrementally updates the rollups for orders changed since the last run.
+
+    Only the hour buckets a changed or deleted order was or is counted in
+    (its creation hour and, once delivered, its delivery hour, as well as the
+    delivery hour it had before a correction) are recomputed. The watermark
+    is moved back by ANALYTICS_ROLLUP_OVERLAP on every run
+    so rows committed late by slow transactions are still picked up;
+    recomputing a bucket is idempotent, so the overlap is harmless.
+
+    Returns the number of hour buckets recomputed.
+    """
+    now = now or timezone.now()
+    watermark = Watermark.objects.filter(name=WATERMARK_NAME).first()
+    changed = Order.objects.filter(updated_at__lte=now)
+    deleted = DeletedOrder.objects.filter(deleted_at__lte=now)
+    corrected = DeliveryCorrection.objects.filter(corrected_at__lte=now)
+    if watermark:
+        since = watermark.value - settings.ANALYTICS_ROLLUP_OVERLAP
+        changed = changed.filter(updated_at__gt=since)
+        deleted = deleted.filter(deleted_at__gt=since)
+        corrected = corrected.filter(corrected_at__gt=since)
+
+    hours = set()
+    for orders, fields in (
+        (changed, ('created_at', 'delivered_at')),
+        (deleted, ('created_at', 'delivered_at')),
+        (corrected, ('delivered_at',)),
+    ):
+        for field in fields:
+            hours.update(
+                orders.filter(**{f'{field}__isnull': False}).annotate(bucket=TruncHour(field))
+                .values_list('bucket', flat=True).distinct().order_by()
+            )
+    hours = sorted(hours)
+    for hour in hours:
+        rollup_hours(hour, hour + timedelta(hours=1))
+    for day in sorted({_day_floor(hour) for hour in hours}):
+        rollup_days(day, day + timedelta(days=1))
+
+    Watermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': now})
+    return len(hours)
+
+
+def analytics_summary(days=7):
+    """
+    Returns the data shown on the analytics dashboard for the last `days`
+    days, read entirely from the daily rollups.
+    """
+    since = _day_floor(timezone.now()) - timedelta(days=days - 1)
+    daily = OrderRollup.objects.filter(period='day', bucket_start__gte=since)
+
+    deliveries = {
+        row['bucket_start']: row['total']
+        for row in daily.filter(status='DELIVERED')
+        .values('bucket_start').annotate(total=Sum('order_count')).order_by()
+    }
+    deliveries_over_time = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        deliveries_over_time.append({
+            'day': day.date().isoformat(),
+            'deliveries': deliveries.get(day, 0),
+        })
+
+    status_breakdown = {status: 0 for status, _ in Order.STATUS_CHOICES}
+    status_breakdown.update(
+        daily.values('status').annotate(total=Sum('order_count')).order_by().values_list('status', 'total')
+    )
+
+    drivers = []
+    for row in (
+        daily.filter(status='DELIVERED', driver__isnull=False)
+        .values('driver_id', 'driver__user__username', 'driver__user__first_name', 'driver__user__last_name')
+        .annotate(
+            delivered=Sum('order_count'),
+            cod=Sum('cod_total'),
+            delivery_time=Sum('delivery_time_total'),
+        )
+        .order_by('-delivered')
+    ):
+        full_name = f"{row['driver__user__first_name']} {row['driver__user__last_name']}".strip()
+        average = row['delivery_time'] / row['delivered'] if row['delivery_time'] and row['delivered'] else None
+        drivers.append({
+            'driver_id': row['driver_id'],
+            'name': full_name or row['driver__user__username'],
+            'delivered': row['delivered'],
+            'cod_total': str(Decimal(row['cod'] or 0).quantize(CENTS)),
+            'avg_delivery_minutes': round(average.total_seconds() / 60, 1) if average else None,
+        })
+
+    cod_total = daily.filter(status='DELIVERED').aggregate(total=Sum('cod_total'))['total'] or 0
+
+    return {
+        'deliveries_over_time': deliveries_over_time,
+        'status_breakdown': status_breakdown,
+        'drivers': drivers,
+        'cod_collected': str(Decimal(cod_total).quantize(CENTS)),
+    }
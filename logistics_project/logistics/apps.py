@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class LogisticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'logistics'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from logistics_project.database import configure_sqlite
+
+        # Connect the model signal handlers and register the system checks.
+        from . import checks, signals  # noqa: F401
+
+        connection_created.connect(configure_sqlite, dispatch_uid='logistics_configure_sqlite')
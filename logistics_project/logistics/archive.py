@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, DeletedOrder, DeliveryCorrection, Order
+
+TERMINAL_STATUSES = ('DELIVERED', 'CANCELED')
+
+# Fields copied verbatim from Order to ArchivedOrder.
+ARCHIVED_FIELDS = [
+    'order_id', 'customer_id', 'driver_id',
+    'pickup_address', 'delivery_address',
+    'pickup_latitude', 'pickup_longitude', 'delivery_latitude', 'delivery_longitude',
+    'items_description', 'cod_amount', 'status',
+    'created_at', 'delivered_at', 'updated_at',
+]
+
+_state = threading.local()
+
+
+@contextmanager
+def archiving():
+    """
+    Marks deletions on this thread as archival moves rather than real
+    deletions, so the order counters keep counting the moved orders.
+    """
+    _state.active = True
+    try:
+        yield
+    finally:
+        _state.active = False
+
+
+def is_archiving():
+    return getattr(_state, 'active', False)
+
+
+def archivable_orders(older_than=None):
+    """
+    Terminal orders whose last change is older than `older_than`
+    (defaults to ARCHIVE_AFTER_DAYS days ago).
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    return Order.objects.filter(status__in=TERMINAL_STATUSES, updated_at__lt=older_than)
+
+
+def archive_batch(pks):
+    """
+    Moves the given orders to the archive in one short transaction.
+    Orders that changed since they were selected (no longer terminal)
+    are left in place. Returns the number of orders moved.
+    """
+    with transaction.atomic():
+        rows = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=pks, status__in=TERMINAL_STATUSES)
+            .values(*ARCHIVED_FIELDS)
+        )
+        if not rows:
+            return 0
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**row) for row in rows], batch_size=500)
+        with archiving():
+            Order.objects.filter(order_id__in=[row['order_id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_orders(older_than=None, batch_size=None, pause=0, limit=None):
+    """
+    Archives terminal orders in batches of `batch_size`, each in its own
+    transaction, so no lock is held for longer than one batch. `pause`
+    seconds are slept between batches to leave room for live traffic.
+    Returns the number of orders archived.
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    candidates = archivable_orders(older_than).order_by('pk').values_list('pk', flat=True)
+
+    archived = 0
+    last_pk = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        pks = list(candidates.filter(pk__gt=last_pk)[:size])
+        if not pks:
+            break
+        archived += archive_batch(pks)
+        last_pk = pks[-1]
+        if pause:
+            time.sleep(pause)
+    return archived
+
+
+def purge_deleted_orders(older_than=None):
+    """
+    Drops deletion and delivery correction records older than `older_than`
+    (defaults to ARCHIVE_AFTER_DAYS days ago); the incremental jobs that read
+    them run far more often. Returns the number of records removed.
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    deleted, _ = DeletedOrder.objects.filter(deleted_at__lt=older_than).delete()
+    corrected, _ = DeliveryCorrection.objects.filter(corrected_at__lt=older_than).delete()
+    return deleted + corrected
+
+
+def all_orders(*fields):
+    """
+    Values from live and archived orders together, for admin and reporting
+    queries that explicitly ask for history. Dispatch code should keep using
+    Order.objects, which only holds live orders.
+    """
+    fields = fields or ('order_id', 'customer_id', 'driver_id', 'status', 'cod_amount', 'created_at', 'delivered_at')
+    return Order.objects.values(*fields).union(ArchivedOrder.objects.values(*fields), all=True)
+
+
+def find_order(order_id):
+    """
+    Looks an order up by order_id in the live table first, then in the archive.
+    """
+    return (
+        Order.objects.select_related('customer', 'driver__user').filter(order_id=order_id).first()
+        or ArchivedOrder.objects.select_related('customer', 'driver__user').filter(order_id=order_id).first()
+    )
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the logged-in User in the cache, so loading
+    request.user on every page view does not query the database.
+    Entries are dropped whenever the user is saved or deleted (see signals.py).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
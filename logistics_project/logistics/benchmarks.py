@@ -0,0 +1,30 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def scratch_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Points the connection at a freshly migrated throwaway database, the way
+    the test runner does, and drops it afterwards. Benchmarks run in it can
+    commit for real, so their timings include commits, without touching the
+    configured database.
+
+    On SQLite the throwaway database is a file rather than the in-memory
+    default, so commits cost what they do with the real database file.
+    """
+    connection = connections[alias]
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    test_name = test_settings.get('NAME')
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = test_name
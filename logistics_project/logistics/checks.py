@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def is_process_local(alias='default'):
+    return isinstance(caches[alias], LocMemCache)
+
+
+@register(Tags.caches, Tags.security)
+def check_cached_auth(app_configs, **kwargs):
+    """
+    Cached sessions and users are only evicted from the cache of the process
+    that handled the logout or user change, so they need a cache shared by
+    every worker.
+    """
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and is_process_local(settings.SESSION_CACHE_ALIAS):
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE!r} needs a cache shared between worker processes.',
+            hint="Set CACHE_LOCATION, or use 'django.contrib.sessions.backends.db'.",
+            id='logistics.E001',
+        ))
+    if 'logistics.auth.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS and is_process_local():
+        errors.append(Error(
+            'logistics.auth.CachedModelBackend needs a cache shared between worker processes.',
+            hint="Set CACHE_LOCATION, or use 'django.contrib.auth.backends.ModelBackend'.",
+            id='logistics.E002',
+        ))
+    return errors
+
+
+@register(Tags.caches)
+def check_fragment_cache(app_configs, **kwargs):
+    """
+    Fragment versions are bumped in the cache of the process that saved the
+    change, so other processes would keep serving stale dashboard partials
+    from a process-local cache.
+    """
+    if settings.DASHBOARD_FRAGMENT_TIMEOUT and is_process_local():
+        return [Error(
+            'DASHBOARD_FRAGMENT_TIMEOUT caches dashboard partials, which needs a cache shared between worker processes.',
+            hint='Set CACHE_LOCATION, or set DASHBOARD_FRAGMENT_TIMEOUT to 0.',
+            id='logistics.E003',
+        )]
+    return []
@@ -0,0 +1,49 @@
+import time
+
+from django.core.cache import cache
+
+# Dashboard partials rendered through {% cache %}. Each one is keyed on its
+# own version counter, and the save signals bump only the counters of the
+# partials whose data changed, so the others keep being served from the cache.
+FRAGMENTS = ('dashboard', 'orders', 'drivers')
+
+# Models whose changes invalidate each fragment (see signals.py).
+#   dashboard: Order (status counters)
+#   orders:    Order, Customer, Driver (names in the order table),
+#              DeliveryProof and finished thumbnails (proofs.py)
+#   drivers:   Driver, DriverLocation
+
+
+def version_key(name):
+    return f'fragment_version:{name}'
+
+
+def _initial_version():
+    # A counter that was evicted must never restart at a value an older,
+    # still cached fragment was rendered with, so start from the clock.
+    return time.time_ns()
+
+
+def fragment_versions():
+    """
+    Current version of every dashboard fragment, read in one cache round trip.
+    """
+    keys = {version_key(name): name for name in FRAGMENTS}
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return {name: versions[key] for key, name in keys.items()}
+
+
+def bump(*names):
+    """
+    Invalidates the given fragments by moving them to a new version.
+    """
+    for name in names:
+        key = version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
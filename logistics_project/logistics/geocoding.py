@@ -0,0 +1,203 @@
+import csv
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Customer, GeocodedAddress, Order
+
+
+def normalize_address(address):
+    """
+    Normalizes free-text addresses so that trivial differences
+    (case, extra whitespace, stray punctuation) share one cache entry.
+    """
+    address = (address or '').lower()
+    address = re.sub(r'[^\w\s,/-]', ' ', address)
+    address = re.sub(r'\s*,\s*', ', ', address)
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip(' ,')
+
+
+def address_hash(normalized_address):
+    return hashlib.sha256(normalized_address.encode('utf-8')).hexdigest()
+
+
+# --- Providers ---
+
+class GeocodingProvider:
+    """
+    Base class for geocoding providers.
+    Subclasses implement geocode() and return a (latitude, longitude) tuple,
+    or None when the address cannot be resolved.
+    """
+    name = 'base'
+
+    def geocode(self, normalized_address):
+        raise NotImplementedError
+
+
+class GazetteerProvider(GeocodingProvider):
+    """
+    Offline provider backed by a CSV file with 'address', 'latitude' and
+    'longitude' columns. Addresses in the file are normalized on load.
+    A missing file is a configuration error: resolving against an empty
+    gazetteer would only fill the cache with misses.
+    """
+    name = 'gazetteer'
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.GEOCODING_GAZETTEER_PATH)
+        if not self.path.is_file():
+            raise ImproperlyConfigured(
+                f"Gazetteer file '{self.path}' does not exist; set GEOCODING_GAZETTEER_PATH "
+                f"or choose another GEOCODING_PROVIDER."
+            )
+        self.entries = {}
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self.entries[normalize_address(row['address'])] = (
+                    Decimal(row['latitude']),
+                    Decimal(row['longitude']),
+                )
+
+    def geocode(self, normalized_address):
+        return self.entries.get(normalized_address)
+
+
+_provider = None
+
+def get_provider():
+    """
+    Returns the provider configured in settings.GEOCODING_PROVIDER.
+    The instance is created once per process.
+    """
+    global _provider
+    if _provider is None:
+        _provider = import_string(settings.GEOCODING_PROVIDER)()
+    return _provider
+
+
+# --- Cached lookups ---
+
+def geocode_addresses(addresses, provider=None, max_workers=None):
+    """
+    Resolves many addresses at once and returns a dict mapping each
+    normalized address to (latitude, longitude) or None.
+
+    Cached addresses are read in a single query. Only the remaining
+    distinct addresses go to the provider, through a bounded thread pool,
+    and the results are written back to the cache. Misses are cached too,
+    but only for GEOCODING_MISS_TTL; after that the address is retried.
+    """
+    provider = provider or get_provider()
+    max_workers = max_workers or settings.GEOCODING_MAX_WORKERS
+    miss_cutoff = timezone.now() - settings.GEOCODING_MISS_TTL
+
+    by_hash = {}
+    for address in addresses:
+        normalized = normalize_address(address)
+        if normalized:
+            by_hash[address_hash(normalized)] = normalized
+
+    results = {}
+    for cached in GeocodedAddress.objects.filter(address_hash__in=list(by_hash)):
+        if cached.latitude is not None:
+            results[cached.normalized_address] = (cached.latitude, cached.longitude)
+        elif cached.created_at >= miss_cutoff:
+            results[cached.normalized_address] = None
+
+    missing = [normalized for normalized in by_hash.values() if normalized not in results]
+    if missing:
+        # Only provider calls run in the pool; all database writes stay on this thread.
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            resolved = list(pool.map(provider.geocode, missing))
+
+        new_entries = []
+        for normalized, coords in zip(missing, resolved):
+            results[normalized] = coords
+            new_entries.append(GeocodedAddress(
+                address_hash=address_hash(normalized),
+                normalized_address=normalized,
+                latitude=coords[0] if coords else None,
+                longitude=coords[1] if coords else None,
+                provider=provider.name,
+            ))
+        # Expired misses are overwritten in place, with a fresh created_at.
+        GeocodedAddress.objects.bulk_create(
+            new_entries,
+            update_conflicts=True,
+            unique_fields=['address_hash'],
+            update_fields=['latitude', 'longitude', 'provider', 'created_at'],
+        )
+
+    return results
+
+
+def geocode_address(address, provider=None):
+    """
+    Resolves a single address through the cache.
+    """
+    results = geocode_addresses([address], provider=provider, max_workers=1)
+    return results.get(normalize_address(address))
+
+
+def geocode_orders(orders, provider=None, max_workers=None):
+    """
+    Fills in pickup and delivery coordinates for the given orders.
+    Every distinct address is resolved once, however many orders share it.
+    Returns the number of orders updated.
+    """
+    orders = list(orders)
+    addresses = set()
+    for order in orders:
+        addresses.add(order.pickup_address)
+        addresses.add(order.delivery_address)
+    coords = geocode_addresses(addresses, provider=provider, max_workers=max_workers)
+
+    updated = []
+    for order in orders:
+        pickup = coords.get(normalize_address(order.pickup_address))
+        delivery = coords.get(normalize_address(order.delivery_address))
+        if pickup is None and delivery is None:
+            continue
+        if pickup:
+            order.pickup_latitude, order.pickup_longitude = pickup
+        if delivery:
+            order.delivery_latitude, order.delivery_longitude = delivery
+        updated.append(order)
+
+    Order.objects.bulk_update(updated, [
+        'pickup_latitude', 'pickup_longitude',
+        'delivery_latitude', 'delivery_longitude',
+    ], batch_size=500)
+    return len(updated)
+
+
+def geocode_customers(customers, provider=None, max_workers=None):
+    """
+    Fills in coordinates for the given customers' addresses.
+    Returns the number of customers updated.
+    """
+    customers = list(customers)
+    coords = geocode_addresses(
+        {customer.address for customer in customers},
+        provider=provider,
+        max_workers=max_workers,
+    )
+
+    updated = []
+    for customer in customers:
+        resolved = coords.get(normalize_address(customer.address))
+        if resolved:
+            customer.latitude, customer.longitude = resolved
+            updated.append(customer)
+
+    Customer.objects.bulk_update(updated, ['latitude', 'longitude'], batch_size=500)
+    return len(updated)
@@ -0,0 +1,294 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .fragments import bump
+from .geocoding import geocode_orders
+from .models import ArchivedOrder, Customer, Order, OrderStatusCount, Sequence
+
+REQUIRED_FIELDS = ('customer_name', 'customer_phone', 'pickup_address', 'delivery_address', 'items_description')
+
+ORDER_ID_SEQUENCE = 'order_id'
+
+
+class ImportReport:
+    """
+    Outcome of one import run: how many orders were created and which
+    rows were rejected (by line number in the source file) and why.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.rows = 0
+        self.errors = []
+        self.elapsed = 0.0
+        # Set when the import stopped early. Every line up to completed_line
+        # has been committed or rejected, so a retry can resume after it.
+        self.aborted = None
+        self.completed_line = 0
+
+    def add_error(self, line, message):
+        self.errors.append({'line': line, 'error': message})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self, max_errors=None):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors[:max_errors] if max_errors else self.errors,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'aborted': self.aborted,
+            'completed_line': self.completed_line,
+        }
+
+
+# --- Streaming readers ---
+
+def read_csv(stream):
+    # Line 1 is the header, so data rows start at line 2.
+    for line, row in enumerate(csv.DictReader(stream), start=2):
+        yield line, row
+
+
+def read_jsonl(stream):
+    for line, text in enumerate(stream, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, e
+            continue
+        yield line, row if isinstance(row, dict) else ValueError('Each line must be a JSON object.')
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- Lookups ---
+
+class CustomerCache:
+    """
+    Maps (phone number, name) to Customer ids across chunks.
+    Misses for a whole chunk are resolved with one query, and customers
+    that still do not exist are created with one bulk insert.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or settings.IMPORT_CUSTOMER_CACHE_SIZE
+        self.ids = {}
+
+    def resolve(self, rows):
+        wanted = {}
+        for row in rows:
+            key = (row['customer_phone'], row['customer_name'])
+            if key not in self.ids:
+                wanted[key] = row.get('customer_address') or row['delivery_address']
+        if not wanted:
+            return
+
+        if len(self.ids) + len(wanted) > self.max_size:
+            self.ids.clear()
+
+        phones = {phone for phone, _ in wanted}
+        for pk, phone, name in Customer.objects.filter(phone_number__in=phones).values_list('pk', 'phone_number', 'name'):
+            self.ids.setdefault((phone, name), pk)
+
+        missing = [
+            Customer(phone_number=phone, name=name, address=wanted[(phone, name)])
+            for phone, name in wanted if (phone, name) not in self.ids
+        ]
+        if missing:
+            Customer.objects.bulk_create(missing, batch_size=1000)
+            if any(customer.pk is None for customer in missing):
+                # Backends that cannot return ids from bulk inserts; read them back.
+                for pk, phone, name in Customer.objects.filter(
+                    phone_number__in={customer.phone_number for customer in missing}
+                ).values_list('pk', 'phone_number', 'name'):
+                    self.ids.setdefault((phone, name), pk)
+            else:
+                for customer in missing:
+                    self.ids[(customer.phone_number, customer.name)] = customer.pk
+
+    def get(self, row):
+        return self.ids[(row['customer_phone'], row['customer_name'])]
+
+
+def allocate_order_ids(count):
+    """
+    Returns `count` new order IDs from one reserved block of the order_id sequence.
+    """
+    if not count:
+        return []
+    start = Sequence.reserve(ORDER_ID_SEQUENCE, count)
+    prefix = settings.IMPORT_ORDER_ID_PREFIX
+    return [f'{prefix}{value:010d}' for value in range(start, start + count)]
+
+
+# --- Validation ---
+
+def clean_row(row):
+    """
+    Returns a cleaned copy of the row, or raises ValueError with a message
+    suitable for the error report.
+    """
+    row = {str(key).strip(): ('' if value is None else str(value).strip())
+           for key, value in row.items() if key}
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+
+    if len(row['customer_name']) > 200:
+        raise ValueError('customer_name is longer than 200 characters')
+    if len(row['customer_phone']) > 15:
+        raise ValueError('customer_phone is longer than 15 characters')
+    if len(row.get('order_id', '')) > 20:
+        raise ValueError('order_id is longer than 20 characters')
+
+    try:
+        cod_amount = Decimal(row.get('cod_amount') or '0')
+    except InvalidOperation:
+        raise ValueError(f"Invalid cod_amount '{row.get('cod_amount')}'")
+    if not cod_amount.is_finite() or cod_amount < 0 or cod_amount.as_tuple().exponent < -2:
+        raise ValueError(f"Invalid cod_amount '{row.get('cod_amount')}'")
+    if cod_amount >= Decimal('1e8'):
+        raise ValueError('cod_amount is too large')
+    row['cod_amount'] = cod_amount
+    return row
+
+
+# --- Pipeline ---
+
+def write_chunk(valid, customers, report, attempts=3):
+    """
+    Inserts one chunk of cleaned (line, row) pairs in one transaction and
+    returns the new orders.
+
+    Explicit order IDs are checked against the live table and the archive
+    inside the transaction. If a concurrent import inserts one of them before
+    this chunk commits, the unique constraint fails, the chunk is rolled back
+    and checked again, and the clash ends up in the report as a duplicate.
+    """
+    # Reserved outside the chunk transaction so the sequence row lock stays short.
+    generated = allocate_order_ids(sum(1 for _, row in valid if not row.get('order_id')))
+    for attempt in range(attempts):
+        errors = []
+        try:
+            with transaction.atomic():
+                # Explicit order IDs must be unique in the file, the live table and the archive.
+                explicit = [row['order_id'] for _, row in valid if row.get('order_id')]
+                taken = set(Order.objects.filter(order_id__in=explicit).values_list('order_id', flat=True))
+                taken.update(ArchivedOrder.objects.filter(order_id__in=explicit).values_list('order_id', flat=True))
+                accepted = []
+                for line, row in valid:
+                    order_id = row.get('order_id')
+                    if order_id:
+                        if order_id in taken:
+                            errors.append((line, f"Duplicate order_id '{order_id}'"))
+                            continue
+                        taken.add(order_id)
+                    accepted.append(row)
+                if not accepted:
+                    orders = []
+                    break
+
+                customers.resolve(accepted)
+                order_ids = iter(generated)
+                orders = [
+                    Order(
+                        order_id=row.get('order_id') or next(order_ids),
+                        customer_id=customers.get(row),
+                        pickup_address=row['pickup_address'],
+                        delivery_address=row['delivery_address'],
+                        items_description=row['items_description'],
+                        cod_amount=row['cod_amount'],
+                    )
+                    for row in accepted
+                ]
+                # bulk_create skips Order.save(), so keep the counters in step here.
+                Order.objects.bulk_create(orders, batch_size=1000)
+                OrderStatusCount.adjust('PENDING', len(orders))
+                transaction.on_commit(lambda: bump('dashboard', 'orders'))
+            break
+        except IntegrityError:
+            # Customers created in the rolled back transaction are gone too.
+            customers.ids.clear()
+            if attempt == attempts - 1:
+                raise
+
+    for line, message in errors:
+        report.add_error(line, message)
+    report.created += len(orders)
+    return orders
+
+
+def import_orders(stream, fmt='csv', chunk_size=None, geocode=False):
+    """
+    Imports orders from a CSV or JSONL text stream.
+
+    The file is read one chunk at a time, so memory use does not depend on
+    the file size. Each chunk is written in its own transaction: customers
+    are resolved through a CustomerCache, order IDs come from one reserved
+    block, orders are inserted with bulk_create and the status counters are
+    adjusted in the same transaction. Invalid rows are skipped and reported.
+
+    A file that turns out not to be valid UTF-8 stops the import; the chunks
+    before the bad bytes stay committed and the report says where it stopped.
+    """
+    if fmt not in READERS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(READERS)}")
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+
+    report = ImportReport()
+    customers = CustomerCache()
+    started = time.perf_counter()
+
+    try:
+        for chunk in chunked(READERS[fmt](stream), chunk_size):
+            valid = []
+            for line, row in chunk:
+                report.rows += 1
+                if isinstance(row, Exception):
+                    report.add_error(line, f'Invalid JSON: {row}')
+                    continue
+                try:
+                    valid.append((line, clean_row(row)))
+                except ValueError as e:
+                    report.add_error(line, str(e))
+
+            orders = write_chunk(valid, customers, report) if valid else []
+            report.completed_line = chunk[-1][0]
+
+            if geocode and orders:
+                geocode_orders(Order.objects.filter(order_id__in=[order.order_id for order in orders]))
+    except UnicodeDecodeError:
+        report.aborted = (
+            f'The file is not valid UTF-8 after line {report.completed_line}; '
+            f'the import stopped there and only the rows before it were imported.'
+        )
+
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DailyDeliveryCount, DriverLocation, LiveChange, Order, OrderStatusCount
+
+# Changes travel between processes through the LiveChange table: every process
+# that saves an Order or DriverLocation (web workers, the admin, management
+# commands) logs a (kind, pk) change while a dashboard is connected anywhere,
+# and every ASGI process with connected dashboards polls the log and fans the
+# changes out locally. Whether anyone is connected is kept in the cache; with
+# the default per-process cache only changes made in the serving process are
+# logged, so configure a shared cache (see settings.py) when running several.
+LISTENERS_KEY = 'live:listeners'
+
+# Logged changes older than this are pruned.
+CHANGE_TIMEOUT = 60
+
+# Changes are numbered when they are inserted but may commit out of order, and
+# the publishing hosts' clocks may differ slightly, so each poll re-reads the
+# changes logged this long before the previous one, skipping those it sent.
+POLL_OVERLAP = timedelta(seconds=2)
+
+# A poller that would have to read more changes than this at once skips
+# them and only sends fresh counts.
+MAX_CHANGES_PER_POLL = 1000
+
+
+def has_listeners():
+    """
+    Whether any process currently streams to a dashboard. Lets publishers
+    skip all live update work when nobody is watching.
+    """
+    return cache.get(LISTENERS_KEY) is not None
+
+
+def publish_change(kind, pk):
+    """
+    Logs one changed object for the pollers. Costs one cache read when no
+    dashboard is connected anywhere, and one insert otherwise.
+    """
+    if not has_listeners():
+        return
+    LiveChange.objects.create(kind=kind, object_id=pk)
+
+
+def prune_changes():
+    LiveChange.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=CHANGE_TIMEOUT)).delete()
+
+
+def current_counts():
+    return {
+        'by_status': OrderStatusCount.as_dict(),
+        'delivered_today': DailyDeliveryCount.for_day(),
+    }
+
+
+def read_changes(since, seen=frozenset()):
+    """
+    Builds the delta events for the changes logged at or after `since`,
+    except the change ids in `seen` (sent by an earlier poll). Returns the
+    events and {id: created_at} of the changes read. Counts are read once
+    per batch, however many orders changed.
+    """
+    rows = [
+        row for row in LiveChange.objects.filter(created_at__gte=since).order_by('pk')
+        .values_list('pk', 'created_at', 'kind', 'object_id')[:len(seen) + MAX_CHANGES_PER_POLL + 1]
+        if row[0] not in seen
+    ]
+    read = {pk: created_at for pk, created_at, _, _ in rows}
+    if len(rows) > MAX_CHANGES_PER_POLL:
+        return [counts_event(current_counts())], read
+
+    order_ids = {pk for _, _, kind, pk in rows if kind == 'order'}
+    driver_ids = {pk for _, _, kind, pk in rows if kind == 'location'}
+    orders = {order.pk: order for order in Order.objects.filter(pk__in=order_ids).only('order_id', 'status')}
+    # Orders that are gone were deleted (or archived) since.
+    events = [order_event(orders[pk]) if pk in orders else order_removed_event(pk) for pk in sorted(order_ids)]
+    events.extend(location_event(location) for location in DriverLocation.objects.filter(driver_id__in=driver_ids))
+    if order_ids:
+        events.append(counts_event(current_counts()))
+    return events, read
+
+
+class Subscriber:
+    """
+    One connected dashboard. Events are coalesced by key (latest wins), so a
+    client that is throttled or slow receives one delta per changed object
+    instead of every intermediate update.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, key, payload):
+        # Always runs on the subscriber's own event loop (see Broadcaster.publish).
+        self.pending[key] = payload
+        self.ready.set()
+
+    async def batches(self, min_interval, keepalive):
+        """
+        Yields lists of pending events, at most once per min_interval seconds.
+        Yields an empty list after `keepalive` idle seconds.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield []
+                continue
+            self.ready.clear()
+            batch, self.pending = list(self.pending.values()), {}
+            yield batch
+            await asyncio.sleep(min_interval)
+
+
+class Broadcaster:
+    """
+    In-process fan-out of change events to every connected subscriber.
+
+    While at least one subscriber is connected, a poller task on the event
+    loop keeps the listeners flag alive and reads the shared change log every
+    LIVE_UPDATES_MIN_INTERVAL seconds, so changes from any process reach the
+    dashboards served by this one.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def subscribe(self):
+        subscriber = Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, key, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.push, key, payload)
+
+    async def _poll(self):
+        interval = settings.LIVE_UPDATES_MIN_INTERVAL
+        listeners_timeout = max(3 * interval, 5)
+        await sync_to_async(cache.set)(LISTENERS_KEY, True, listeners_timeout)
+        cursor, seen = timezone.now(), {}
+        while self._subscribers:
+            await asyncio.sleep(interval)
+            await sync_to_async(cache.set)(LISTENERS_KEY, True, listeners_timeout)
+            started = timezone.now()
+            events, read = await sync_to_async(read_changes)(cursor - POLL_OVERLAP, seen)
+            for key, payload in events:
+                self.publish(key, payload)
+            # Only changes the next poll can read again need remembering.
+            seen = {
+                pk: created_at for pk, created_at in {**seen, **read}.items()
+                if created_at >= started - POLL_OVERLAP
+            }
+            cursor = started
+            await sync_to_async(prune_changes)()
+
+
+broadcaster = Broadcaster()
+
+
+def format_sse(events):
+    if not events:
+        return ': keep-alive\n\n'
+    return f"data: {json.dumps(events, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(subscriber):
+    """
+    Server-Sent Events body for one subscriber. Unsubscribes when the client
+    disconnects (the ASGI handler cancels the stream).
+    """
+    try:
+        yield 'retry: 5000\n\n'
+        async for batch in subscriber.batches(
+            settings.LIVE_UPDATES_MIN_INTERVAL, settings.LIVE_UPDATES_KEEPALIVE,
+        ):
+            yield format_sse(batch)
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+# --- Delta payloads ---
+
+def order_event(order):
+    return f'order:{order.pk}', {
+        'type': 'order',
+        'id': order.pk,
+        'order_id': order.order_id,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+    }
+
+
+def order_removed_event(pk):
+    return f'order:{pk}', {
+        'type': 'order',
+        'id': pk,
+        'removed': True,
+    }
+
+
+def counts_event(counts):
+    return 'counts', {
+        'type': 'counts',
+        'counts': counts,
+    }
+
+
+def location_event(location):
+    return f'location:{location.driver_id}', {
+        'type': 'location',
+        'driver_id': location.driver_id,
+        'latitude': str(location.latitude),
+        'longitude': str(location.longitude),
+        'last_updated': location.last_updated.isoformat() if location.last_updated else None,
+    }
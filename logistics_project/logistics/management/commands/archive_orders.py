@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from logistics.archive import archivable_orders, archive_orders, purge_deleted_orders
+
+
+class Command(BaseCommand):
+    help = 'Moves delivered and canceled orders older than the threshold into the archive table, in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive terminal orders not updated for this many days (defaults to ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches.')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many orders.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would be archived.')
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options['days'] is not None:
+            older_than = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{archivable_orders(older_than).count()} orders would be archived.')
+            return
+
+        archived = archive_orders(
+            older_than=older_than,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            limit=options['limit'],
+        )
+        purged = purge_deleted_orders(older_than)
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} orders and purged {purged} deletion and correction records.'))
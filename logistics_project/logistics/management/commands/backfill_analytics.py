@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from logistics.analytics import WATERMARK_NAME, backfill_rollups
+from logistics.models import Order, Watermark
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the analytics rollups for a date range (defaults to every order in the table).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--chunk-days', type=int, default=1,
+                            help='Number of days recomputed per transaction.')
+
+    def parse_day(self, value):
+        try:
+            return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        bounds = Order.objects.aggregate(
+            first=Min('created_at'), last=Max('created_at'), last_delivered=Max('delivered_at'),
+        )
+        last = max(filter(None, (bounds['last'], bounds['last_delivered'])), default=None)
+        start = self.parse_day(options['start']) if options['start'] else bounds['first']
+        end = self.parse_day(options['end']) if options['end'] else last
+        if start is None or end is None:
+            self.stdout.write('No orders to roll up.')
+            return
+
+        backfill_rollups(start, end, chunk=timedelta(days=options['chunk_days']))
+
+        # A full backfill covers everything up to now, so incremental runs can start from here.
+        if not options['start'] and not options['end']:
+            Watermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': started})
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups from {start:%Y-%m-%d} to {end:%Y-%m-%d}.'))
@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+
+from logistics.benchmarks import scratch_database
+from logistics.models import Driver, DriverLocation
+from logistics_project.database import configure_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares concurrent driver-location write and read throughput through the Django database layer, '
+        'configured as in logistics_project/database.py (persistent connections, SQLite pragmas or the '
+        'Postgres pool), against a new connection per request with none of that tuning. Each run uses a '
+        'throwaway copy of the schema on the configured database server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--drivers', type=int, default=200)
+
+    @contextmanager
+    def untuned(self):
+        """
+        What the project ran with before the configuration layer: a new
+        connection per request, SQLite's default rollback journal, lock
+        timeout and deferred transactions, and no pool.
+        """
+        saved = connection.settings_dict.copy()
+        saved_options = saved['OPTIONS'].copy()
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        connection.settings_dict['OPTIONS'].pop('pool', None)
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['OPTIONS']['timeout'] = 5
+            connection.settings_dict['OPTIONS'].pop('transaction_mode', None)
+        # Set before the scratch database exists, so WAL is never switched on for it.
+        connection_created.disconnect(dispatch_uid='logistics_configure_sqlite')
+        try:
+            yield
+        finally:
+            connection_created.connect(configure_sqlite, dispatch_uid='logistics_configure_sqlite')
+            connection.settings_dict.update(saved)
+            connection.settings_dict['OPTIONS'] = saved_options
+
+    def seed(self, drivers):
+        User.objects.bulk_create([User(username=f'benchmark-driver-{i}') for i in range(drivers)])
+        users = User.objects.filter(username__startswith='benchmark-driver-')
+        Driver.objects.bulk_create([Driver(user=user, phone_number=f'8{i:09d}') for i, user in enumerate(users)])
+        driver_ids = list(Driver.objects.values_list('pk', flat=True))
+        DriverLocation.objects.bulk_create([
+            DriverLocation(driver_id=driver_id, latitude=Decimal('18.5'), longitude=Decimal('73.8'))
+            for driver_id in driver_ids
+        ])
+        return driver_ids
+
+    def run(self, driver_ids, options):
+        stop = time.monotonic() + options['seconds']
+        counts = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def worker(write):
+            rng = random.Random()
+            done = locked = 0
+            while time.monotonic() < stop:
+                try:
+                    if write:
+                        # update() skips the model signals, so only the database is measured.
+                        DriverLocation.objects.filter(driver_id=rng.choice(driver_ids)).update(
+                            latitude=Decimal(18.5 + rng.random() / 100).quantize(Decimal('0.000001')),
+                            longitude=Decimal(73.8 + rng.random() / 100).quantize(Decimal('0.000001')),
+                        )
+                    else:
+                        list(DriverLocation.objects.values_list('driver_id', 'latitude', 'longitude'))
+                    done += 1
+                except OperationalError:
+                    locked += 1
+                finally:
+                    # The end of a request: closes the connection unless CONN_MAX_AGE keeps it.
+                    close_old_connections()
+            connections.close_all()
+            with lock:
+                counts['writes' if write else 'reads'] += done
+                counts['locked'] += locked
+
+        threads = [threading.Thread(target=worker, args=(True,)) for _ in range(options['writers'])]
+        threads += [threading.Thread(target=worker, args=(False,)) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
+
+    def measure(self, options):
+        with scratch_database():
+            driver_ids = self.seed(options['drivers'])
+            return self.run(driver_ids, options)
+
+    def handle(self, *args, **options):
+        results = {}
+        with self.untuned():
+            results['untuned'] = self.measure(options)
+        results['configured'] = self.measure(options)
+
+        seconds = options['seconds']
+        for label, counts in results.items():
+            self.stdout.write(
+                f"{label:>10}: {counts['writes'] / seconds:9.0f} writes/s  {counts['reads'] / seconds:9.0f} reads/s  "
+                f"{counts['locked']} 'database is locked' errors"
+            )
+        if results['untuned']['writes']:
+            self.stdout.write(f"write throughput x{results['configured']['writes'] / results['untuned']['writes']:.1f}")
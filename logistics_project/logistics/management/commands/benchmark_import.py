@@ -0,0 +1,50 @@
+import csv
+import io
+import random
+
+from django.core.management.base import BaseCommand
+
+from logistics.benchmarks import scratch_database
+from logistics.importing import import_orders
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures import throughput (rows per second), commits included, on generated order files. '
+        'Runs against a throwaway copy of the database schema, so it is safe to run next to a real database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--customers', type=int, default=5000, help='Number of distinct customers in the data.')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def generate_csv(self, rows, customers):
+        rng = random.Random(rows)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['customer_name', 'customer_phone', 'pickup_address', 'delivery_address',
+                         'items_description', 'cod_amount'])
+        for _ in range(rows):
+            customer = rng.randrange(customers)
+            writer.writerow([
+                f'Customer {customer}', f'9{customer:09d}', 'Warehouse 1, Bhiwandi',
+                f'{rng.randrange(1, 999)}, Street {customer % 300}, Thane',
+                '1x Box', f'{rng.randrange(0, 500000) / 100:.2f}',
+            ])
+        buffer.seek(0)
+        return buffer
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            for rows in options['rows']:
+                self.run_import(rows, options)
+
+    def run_import(self, rows, options):
+        stream = self.generate_csv(rows, options['customers'])
+        # Each chunk commits on its own, as in a real import.
+        report = import_orders(stream, fmt='csv', chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f'{rows:>8} rows: {report.elapsed:8.2f}s  {report.rows_per_second:10.0f} rows/s  '
+            f'({report.created} created, {len(report.errors)} rejected)'
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from logistics.geocoding import geocode_customers, geocode_orders
+from logistics.models import Customer, Order
+
+
+class Command(BaseCommand):
+    help = 'Geocodes orders and customers that do not have coordinates yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Size of the geocoding worker pool (defaults to GEOCODING_MAX_WORKERS).')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        workers = options['workers']
+
+        # Orders: walk by primary key so each batch is a cheap range scan.
+        pending = Order.objects.filter(
+            Q(pickup_latitude__isnull=True) | Q(delivery_latitude__isnull=True)
+        ).order_by('pk')
+        last_pk = 0
+        orders_done = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            orders_done += geocode_orders(batch, max_workers=workers)
+            last_pk = batch[-1].pk
+
+        customers = Customer.objects.filter(latitude__isnull=True).order_by('pk')
+        last_pk = 0
+        customers_done = 0
+        while True:
+            batch = list(customers.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            customers_done += geocode_customers(batch, max_workers=workers)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Geocoded {orders_done} orders and {customers_done} customers.'
+        ))
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logistics.importing import READERS, import_orders
+
+
+class Command(BaseCommand):
+    help = 'Imports orders from a CSV or JSONL file, streaming it in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=list(READERS), default=None,
+                            help='File format (defaults to the file extension).')
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--geocode', action='store_true', help='Geocode each chunk after it is inserted.')
+        parser.add_argument('--error-report', help='Write rejected rows to this JSON file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if fmt not in READERS:
+            raise CommandError(f"Cannot tell the format of '{path}', pass --format.")
+
+        with open(path, newline='', encoding='utf-8') as stream:
+            report = import_orders(stream, fmt=fmt, chunk_size=options['chunk_size'], geocode=options['geocode'])
+
+        if options['error_report']:
+            with open(options['error_report'], 'w', encoding='utf-8') as f:
+                json.dump(report.errors, f, indent=2)
+
+        for error in report.errors[:20]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if len(report.errors) > 20:
+            self.stderr.write(f'... and {len(report.errors) - 20} more errors.')
+
+        summary = (
+            f'Imported {report.created} of {report.rows} rows in {report.elapsed:.2f}s '
+            f'({report.rows_per_second:.0f} rows/s), {len(report.errors)} rejected.'
+        )
+        if report.aborted:
+            raise CommandError(f'{summary} {report.aborted}')
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from logistics.proofs import process_pending, remove_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        'Makes the proof-of-delivery thumbnails still pending, e.g. queued by a process that '
+        'restarted before getting to them, and removes temporary files of interrupted uploads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry images that failed before.')
+        parser.add_argument('--workers', type=int, help='Threads making thumbnails (default: PROOF_THUMBNAIL_WORKERS).')
+
+    def handle(self, *args, **options):
+        ready, failed = process_pending(include_failed=options['retry_failed'], max_workers=options['workers'])
+        removed = remove_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(
+            f'Made {ready} thumbnails ({failed} failed), removed {removed} stale uploads.'
+        ))
@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from logistics.models import ArchivedOrder, DailyDeliveryCount, Order, OrderStatusCount
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the order status and daily delivery counters from the orders and archived orders tables. '
+        'Needed after bulk operations that bypass Order.save(), such as queryset.update().'
+    )
+
+    def handle(self, *args, **options):
+        # Orders moved to the archive still count (see signals.py), so both tables are summed.
+        by_status, by_day = Counter(), Counter()
+        for model in (Order, ArchivedOrder):
+            for row in model.objects.values('status').annotate(total=Count('pk')).order_by():
+                by_status[row['status']] += row['total']
+            delivered = (
+                model.objects.filter(status='DELIVERED', delivered_at__isnull=False)
+                .annotate(day=TruncDate('delivered_at', tzinfo=timezone.get_current_timezone()))
+                .values('day').annotate(total=Count('pk')).order_by()
+            )
+            for row in delivered:
+                by_day[row['day']] += row['total']
+
+        with transaction.atomic():
+            OrderStatusCount.objects.all().delete()
+            OrderStatusCount.objects.bulk_create([
+                OrderStatusCount(status=status, count=total) for status, total in by_status.items()
+            ])
+            DailyDeliveryCount.objects.all().delete()
+            DailyDeliveryCount.objects.bulk_create([
+                DailyDeliveryCount(day=day, count=total) for day, total in by_day.items()
+            ])
+
+        self.stdout.write(self.style.SUCCESS('Order counters rebuilt.'))
@@ -0,0 +1,45 @@
+import calendar
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from logistics.reconciliation import reconcile_days, refresh_settlements
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconciles cash on delivery per driver per day into settlements. Without options, '
+        'recomputes only the days touched by orders changed since the last run (meant to run '
+        'from cron); with --month or --from/--to, recomputes every settlement in the range.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month to recompute (YYYY-MM).')
+        parser.add_argument('--from', dest='start', help='First day to recompute (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='end', help='Last day to recompute (YYYY-MM-DD, default: today).')
+
+    def parse(self, value, fmt, expected):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected {expected}.")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            start = self.parse(options['month'], '%Y-%m', 'YYYY-MM')
+            end = start.replace(day=calendar.monthrange(start.year, start.month)[1])
+        elif options['start']:
+            start = self.parse(options['start'], '%Y-%m-%d', 'YYYY-MM-DD')
+            end = self.parse(options['end'], '%Y-%m-%d', 'YYYY-MM-DD') if options['end'] else timezone.localdate()
+        elif options['end']:
+            raise CommandError('--to needs --from.')
+        else:
+            changed = refresh_settlements()
+            self.stdout.write(self.style.SUCCESS(f'Updated {changed} settlements.'))
+            return
+
+        if end < start:
+            raise CommandError('The range ends before it starts.')
+        changed = reconcile_days(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed settlements from {start} to {end}: {changed} changed.'))
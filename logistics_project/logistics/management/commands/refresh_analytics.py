@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from logistics.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Updates the analytics rollups for orders changed since the last run. Meant to run every few minutes from cron.'
+
+    def handle(self, *args, **options):
+        hours = refresh_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {hours} hourly buckets.'))
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:48
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def populate_counters(apps, schema_editor):
+    Order = apps.get_model('logistics', 'Order')
+    OrderStatusCount = apps.get_model('logistics', 'OrderStatusCount')
+    DailyDeliveryCount = apps.get_model('logistics', 'DailyDeliveryCount')
+
+    OrderStatusCount.objects.bulk_create([
+        OrderStatusCount(status=row['status'], count=row['total'])
+        for row in Order.objects.values('status').annotate(total=Count('pk')).order_by()
+    ])
+    delivered = (
+        Order.objects.filter(status='DELIVERED', delivered_at__isnull=False)
+        .annotate(day=TruncDate('delivered_at', tzinfo=timezone.get_current_timezone()))
+        .values('day').annotate(total=Count('pk')).order_by()
+    )
+    DailyDeliveryCount.objects.bulk_create([
+        DailyDeliveryCount(day=row['day'], count=row['total']) for row in delivered
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0002_geocoding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDeliveryCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('ASSIGNED', 'Assigned'), ('OUT_FOR_DELIVERY', 'Out for Delivery'), ('DELIVERED', 'Delivered'), ('CANCELED', 'Canceled')], max_length=20, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['driver', 'status'], name='order_driver_status_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
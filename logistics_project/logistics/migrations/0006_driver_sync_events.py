@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0005_order_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverSyncEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('ASSIGNED', 'Assigned'), ('OUT_FOR_DELIVERY', 'Out for Delivery'), ('DELIVERED', 'Delivered'), ('CANCELED', 'Canceled')], max_length=20)),
+                ('client_timestamp', models.DateTimeField()),
+                ('result', models.CharField(choices=[('applied', 'Applied'), ('conflict', 'Conflict'), ('rejected', 'Rejected')], max_length=10)),
+                ('detail', models.CharField(blank=True, max_length=200)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='logistics.driver')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='logistics.order')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='driversyncevent',
+            constraint=models.UniqueConstraint(fields=('driver', 'client_id'), name='unique_driver_sync_event'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0007_archived_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Settlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('cod_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_received', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_driver_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['driver', 'status', 'delivered_at'], name='archived_driver_delivered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['driver', 'status', 'delivered_at'], name='order_driver_delivered_idx'),
+        ),
+        migrations.AddField(
+            model_name='settlement',
+            name='driver',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='logistics.driver'),
+        ),
+        migrations.AddIndex(
+            model_name='settlement',
+            index=models.Index(fields=['day'], name='settlement_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='settlement',
+            constraint=models.UniqueConstraint(fields=('driver', 'day'), name='unique_settlement_driver_day'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0008_cod_settlements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProofImage',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(max_length=50)),
+                ('width', models.IntegerField(blank=True, null=True)),
+                ('height', models.IntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], db_index=True, default='PENDING', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeliveryProof',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=20)),
+                ('kind', models.CharField(choices=[('PHOTO', 'Photo'), ('SIGNATURE', 'Signature')], default='PHOTO', max_length=10)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='logistics.driver')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='proofs', to='logistics.proofimage')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryproof',
+            constraint=models.UniqueConstraint(fields=('order_id', 'image'), name='unique_proof_order_image'),
+        ),
+    ]
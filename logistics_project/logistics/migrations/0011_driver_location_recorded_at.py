@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0010_deleted_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverlocation',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_order_ids(apps, schema_editor):
+    DriverSyncEvent = apps.get_model('logistics', 'DriverSyncEvent')
+    Order = apps.get_model('logistics', 'Order')
+    DriverSyncEvent.objects.filter(order__isnull=False).update(
+        order_ref=Subquery(Order.objects.filter(pk=OuterRef('order')).values('order_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Replaces DriverSyncEvent.order (a foreign key, nulled when the order was
+    archived) with the order_id string. The foreign key's column is also
+    called order_id, so the string is copied into a temporary field first.
+    """
+
+    dependencies = [
+        ('logistics', '0011_driver_location_recorded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driversyncevent',
+            name='order_ref',
+            field=models.CharField(blank=True, default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_order_ids, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='driversyncevent',
+            name='order',
+        ),
+        migrations.RenameField(
+            model_name='driversyncevent',
+            old_name='order_ref',
+            new_name='order_id',
+        ),
+        migrations.AlterField(
+            model_name='driversyncevent',
+            name='order_id',
+            field=models.CharField(blank=True, db_index=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0012_driver_sync_event_order_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='settlement',
+            name='driver',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='logistics.driver'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0013_settlement_driver_protect'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryCorrection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=20)),
+                ('delivered_at', models.DateTimeField()),
+                ('corrected_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='logistics.driver')),
+            ],
+        ),
+    ]
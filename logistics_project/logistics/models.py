@@ -1,5 +1,40 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def _clear_moved_coordinates(instance, kwargs):
+    """
+    Clears the coordinates of every address a save changes, so geocode_orders
+    (which only picks rows without coordinates) resolves the new address.
+    instance.ADDRESS_COORDINATES maps each address field to its
+    (latitude, longitude) fields; a partial save also writes the cleared ones.
+    """
+    update_fields = kwargs.get('update_fields')
+    written = [name for name in instance.ADDRESS_COORDINATES if update_fields is None or name in update_fields]
+    stored = instance._stored_addresses or {}
+    if not instance._state.adding and written:
+        missing = [name for name in written if name not in stored]
+        if missing:
+            # Loaded with deferred fields; read what is actually stored.
+            row = type(instance)._default_manager.db_manager(kwargs.get('using')).filter(
+                pk=instance.pk,
+            ).values(*missing).first()
+            stored = {**stored, **(row or {})}
+        moved = [name for name in written if name in stored and stored[name] != getattr(instance, name)]
+        for name in moved:
+            for field in instance.ADDRESS_COORDINATES[name]:
+                setattr(instance, field, None)
+        if moved and update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, *(field for name in moved for field in instance.ADDRESS_COORDINATES[name]),
+            }
+    instance._stored_addresses = {**stored, **{name: getattr(instance, name) for name in written}}
+
+
+def _stored_addresses(instance, field_names):
+    return {name: getattr(instance, name) for name in instance.ADDRESS_COORDINATES if name in field_names}
 
 # A separate model for drivers that links to the main User model for login.
 class Driver(models.Model):
@@ -13,12 +48,29 @@ class Driver(models.Model):
 # A model to store customer information.
 class Customer(models.Model):
     name = models.CharField(max_length=200)
-    phone_number = models.CharField(max_length=15)
+    # Indexed because bulk imports look customers up by phone number.
+    phone_number = models.CharField(max_length=15, db_index=True)
     address = models.TextField()
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+
+    ADDRESS_COORDINATES = {'address': ('latitude', 'longitude')}
+    # The address as stored, to clear the coordinates when it changes.
+    _stored_addresses = None
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_addresses = _stored_addresses(instance, field_names)
+        return instance
+
+    def save(self, *args, **kwargs):
+        _clear_moved_coordinates(self, kwargs)
+        super().save(*args, **kwargs)
+
 # A model for managing the fleet of vehicles.
 class Vehicle(models.Model):
     license_plate = models.CharField(max_length=20, unique=True)
@@ -45,6 +97,12 @@ class Order(models.Model):
     
     pickup_address = models.TextField()
     delivery_address = models.TextField()
+
+    # Coordinates filled in by the geocoding layer (see logistics/geocoding.py).
+    pickup_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    pickup_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    delivery_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    delivery_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     
     items_description = models.TextField()
     cod_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -53,16 +111,443 @@ class Order(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
+    # Used as the change watermark by the analytics rollups (see logistics/analytics.py).
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    ADDRESS_COORDINATES = {
+        'pickup_address': ('pickup_latitude', 'pickup_longitude'),
+        'delivery_address': ('delivery_latitude', 'delivery_longitude'),
+    }
+    # The addresses as stored, to clear their coordinates when they change.
+    _stored_addresses = None
+    # What the status counters currently reflect for this row; None for unsaved orders.
+    _counted_state = None
+    # (driver_id, delivered_at) as stored, for recording delivery corrections;
+    # None for unsaved orders.
+    _stored_delivery = None
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Driver route lookups use the (driver, status) prefix; COD
+            # reconciliation also ranges over delivered_at (see logistics/reconciliation.py).
+            models.Index(fields=['driver', 'status', 'delivered_at'], name='order_driver_delivered_idx'),
+            models.Index(fields=['created_at'], name='order_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id} for {self.customer.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names and 'delivered_at' in field_names:
+            instance._counted_state = instance.counter_state()
+        if 'driver_id' in field_names and 'delivered_at' in field_names:
+            instance._stored_delivery = (instance.driver_id, instance.delivered_at)
+        instance._stored_addresses = _stored_addresses(instance, field_names)
+        return instance
+
+    def counter_state(self):
+        """
+        Returns the (status, delivery day) pair this order contributes to the counters.
+        """
+        delivered_day = None
+        if self.status == 'DELIVERED' and self.delivered_at is not None:
+            delivered_day = timezone.localdate(self.delivered_at)
+        return (self.status, delivered_day)
+
+    def _stored_counter_state(self, using=None):
+        stored = Order.objects.db_manager(using).filter(pk=self.pk).values('status', 'delivered_at').first()
+        return Order(**stored).counter_state() if stored else None
+
+    def _record_delivery_correction(self, written, using=None):
+        """
+        Records the delivery this save moves (see DeliveryCorrection), so the
+        incremental jobs also recompute what the order used to count in.
+        """
+        stored = self._stored_delivery
+        if stored is None:
+            # Loaded with deferred fields; read what is actually stored.
+            stored = Order.objects.db_manager(using).filter(pk=self.pk).values_list(
+                'driver_id', 'delivered_at',
+            ).first()
+        if stored is None:
+            return
+        driver_id, delivered_at = stored
+        current = {'driver': self.driver_id, 'delivered_at': self.delivered_at}
+        previous = {'driver': driver_id, 'delivered_at': delivered_at}
+        if delivered_at is not None and any(current[field] != previous[field] for field in written):
+            DeliveryCorrection.objects.using(using).create(
+                order_id=self.order_id, driver_id=driver_id, delivered_at=delivered_at,
+            )
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using')
+        _clear_moved_coordinates(self, kwargs)
+        counted_fields = {'status', 'delivered_at'}
+        delivery_fields = {'driver', 'delivered_at'}
+        if kwargs.get('update_fields'):
+            # updated_at is the watermark of the incremental jobs, so partial saves move it too.
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        if kwargs.get('update_fields') is not None:
+            written = {'driver' if name == 'driver_id' else name for name in kwargs['update_fields']}
+            counted_fields &= written
+            delivery_fields &= written
+        if not (counted_fields or delivery_fields):
+            # Neither counted column is written, so the counters cannot change.
+            super().save(*args, **kwargs)
+            return
+        # The row and the counters change in the same transaction, so the
+        # dashboard counts can never drift from the orders table.
+        with transaction.atomic(using=using):
+            if self.pk and delivery_fields:
+                self._record_delivery_correction(delivery_fields, using)
+            if self.pk and self._counted_state is None:
+                # Loaded with deferred fields; read what is actually stored.
+                self._counted_state = self._stored_counter_state(using)
+            super().save(*args, **kwargs)
+            if counted_fields == {'status', 'delivered_at'}:
+                new_state = self.counter_state()
+            else:
+                # At most one of the two columns was written; the other keeps its stored value.
+                new_state = self._stored_counter_state(using)
+            if new_state != self._counted_state:
+                OrderStatusCount.record_transition(self._counted_state, new_state)
+        self._counted_state = new_state
+        # Only a full save leaves every column as stored; otherwise it is read back when needed.
+        self._stored_delivery = (self.driver_id, self.delivered_at) if kwargs.get('update_fields') is None else None
+
+# Delivered and canceled orders moved out of the live orders table by the
+# archival job (see logistics/archive.py). Same columns as Order, but the
+# timestamps are copied over rather than set automatically.
+class ArchivedOrder(models.Model):
+    order_id = models.CharField(max_length=20, unique=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+
+    pickup_address = models.TextField()
+    delivery_address = models.TextField()
+    pickup_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    pickup_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    delivery_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    delivery_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+
+    items_description = models.TextField()
+    cod_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    created_at = models.DateTimeField()
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='archived_order_created_idx'),
+            models.Index(fields=['driver', 'status', 'delivered_at'], name='archived_driver_delivered_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id} for {self.customer.name} (archived)"
+
 # A model to store the real-time location of drivers.
 class DriverLocation(models.Model):
     driver = models.OneToOneField(Driver, on_delete=models.CASCADE)
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     last_updated = models.DateTimeField(auto_now=True)
+    # When the phone took the fix, by the phone's clock. Offline fixes are
+    # only ever compared with each other, never with server time.
+    recorded_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Location for {self.driver.user.username}"
+
+# Status transitions queued offline by the driver app and applied through the
+# sync endpoint. The (driver, client_id) pair makes retried batches idempotent.
+# Linked by order_id rather than a foreign key, so the history stays with the
+# order when it is moved to the archive.
+class DriverSyncEvent(models.Model):
+    RESULT_CHOICES = [
+        ('applied', 'Applied'),
+        ('conflict', 'Conflict'),
+        ('rejected', 'Rejected'),
+    ]
+
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE)
+    client_id = models.CharField(max_length=64)
+    # The order the update was for, as sent by the app.
+    order_id = models.CharField(max_length=20, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    client_timestamp = models.DateTimeField()
+    result = models.CharField(max_length=10, choices=RESULT_CHOICES)
+    detail = models.CharField(max_length=200, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['driver', 'client_id'], name='unique_driver_sync_event'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} ({self.result})"
+
+# A persistent cache of geocoded addresses, keyed on the normalized address text
+# so each distinct address only ever hits the geocoding provider once.
+class GeocodedAddress(models.Model):
+    address_hash = models.CharField(max_length=64, unique=True)
+    normalized_address = models.TextField()
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.normalized_address
+
+# Denormalized order counts per status, maintained by Order.save() and the
+# post_delete signal so the dashboard reads a handful of rows instead of
+# running COUNT(*) ... GROUP BY status over the whole orders table.
+class OrderStatusCount(models.Model):
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, unique=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+    @classmethod
+    def adjust(cls, status, delta):
+        cls.objects.get_or_create(status=status)
+        cls.objects.filter(status=status).update(count=F('count') + delta)
+
+    @classmethod
+    def record_transition(cls, old_state, new_state):
+        """
+        Moves one order from old_state to new_state, where each state is an
+        Order.counter_state() pair or None (order created / deleted).
+        """
+        if old_state is not None:
+            old_status, old_day = old_state
+            cls.adjust(old_status, -1)
+            if old_day is not None:
+                DailyDeliveryCount.adjust(old_day, -1)
+        if new_state is not None:
+            new_status, new_day = new_state
+            cls.adjust(new_status, 1)
+            if new_day is not None:
+                DailyDeliveryCount.adjust(new_day, 1)
+
+    @classmethod
+    def as_dict(cls):
+        counts = {status: 0 for status, _ in Order.STATUS_CHOICES}
+        counts.update(cls.objects.values_list('status', 'count'))
+        return counts
+
+# Number of orders delivered per (local) day, maintained alongside OrderStatusCount.
+class DailyDeliveryCount(models.Model):
+    day = models.DateField(unique=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.count}"
+
+    @classmethod
+    def adjust(cls, day, delta):
+        cls.objects.get_or_create(day=day)
+        cls.objects.filter(day=day).update(count=F('count') + delta)
+
+    @classmethod
+    def for_day(cls, day=None):
+        day = day or timezone.localdate()
+        return cls.objects.filter(day=day).values_list('count', flat=True).first() or 0
+
+# Precomputed order aggregates per time bucket, driver and status.
+# Delivered orders are bucketed by delivered_at and all other orders by
+# created_at; hourly rows are computed from the orders table and daily rows
+# from the hourly rows. The analytics dashboard only ever reads these rows.
+class OrderRollup(models.Model):
+    PERIOD_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    order_count = models.BigIntegerField(default=0)
+    cod_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of (delivered_at - created_at) over delivered orders, for average delivery time.
+    delivery_time_total = models.DurationField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'bucket_start', 'driver', 'status'],
+                name='unique_order_rollup_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'bucket_start'], name='rollup_period_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket_start:%Y-%m-%d %H:%M} {self.status}: {self.order_count}"
+
+# What a deleted order contributed to the precomputed aggregates (analytics
+# rollups, COD settlements). Incremental jobs find their work by scanning orders changed since their watermark, which
+# cannot see deleted rows, so deletions leave a row here for them to pick up.
+# Orders moved to the archive are not deleted in this sense. Old rows are
+# purged by the archive_orders command.
+class DeletedOrder(models.Model):
+    order_id = models.CharField(max_length=20)
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Order {self.order_id} (deleted)"
+
+# Where and by whom an order was counted as delivered before a save moved its
+# delivery to another time or driver (see Order.save): the incremental jobs
+# only see an order's current delivered_at and driver, so corrections leave
+# the previous ones here for them to recompute. Purged with the DeletedOrder rows.
+class DeliveryCorrection(models.Model):
+    order_id = models.CharField(max_length=20)
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+    delivered_at = models.DateTimeField()
+    corrected_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Order {self.order_id} (delivery of {self.delivered_at:%Y-%m-%d %H:%M} corrected)"
+
+# Changes to orders and driver locations for the live dashboards (see
+# logistics/live.py), logged only while a dashboard is connected and pruned
+# after a minute. The database numbers them, so concurrent publishers in
+# different processes can never overwrite each other.
+class LiveChange(models.Model):
+    KIND_CHOICES = [
+        ('order', 'Order'),
+        ('location', 'Driver location'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} at {self.created_at:%H:%M:%S}"
+
+# Remembers how far incremental jobs (such as the analytics rollups) have processed.
+class Watermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+# Named counters handed out in blocks, e.g. for generating order IDs during bulk imports.
+class Sequence(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def reserve(cls, name, count):
+        """
+        Reserves `count` consecutive values and returns the first one.
+        The row lock is held only for this short transaction, so concurrent
+        importers never receive overlapping blocks.
+        """
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(name=name)
+            start = sequence.value + 1
+            sequence.value += count
+            sequence.save(update_fields=['value'])
+        return start
+
+# Cash on delivery a driver owes for one (local) day: the DELIVERED orders and
+# their cod_amount total, snapshotted by the reconciliation job (see
+# logistics/reconciliation.py). cash_received is entered when the driver
+# hands in the cash; recomputation never touches it. Drivers with settlements
+# cannot be deleted, so cash records are never lost with them.
+class Settlement(models.Model):
+    driver = models.ForeignKey(Driver, on_delete=models.PROTECT)
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    cod_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cash_received = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['driver', 'day'], name='unique_settlement_driver_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='settlement_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.driver} {self.day}: {self.cod_total}"
+
+    @property
+    def discrepancy(self):
+        """
+        Cash received minus cash expected; None until the cash is counted.
+        """
+        if self.cash_received is None:
+            return None
+        return self.cash_received - self.cod_total
+
+# An uploaded proof-of-delivery file, stored once per distinct content under
+# its sha256 (see logistics/proofs.py). The thumbnail is made in the background;
+# only thumbnails are ever served, and only once status is READY.
+class ProofImage(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=50)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING', db_index=True)
+    error = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.sha256[:12]
+
+# A delivery photo or signature uploaded by the driver. Linked by order_id
+# rather than a foreign key, so proofs stay with the order when it is moved
+# to the archive.
+class DeliveryProof(models.Model):
+    KIND_CHOICES = [
+        ('PHOTO', 'Photo'),
+        ('SIGNATURE', 'Signature'),
+    ]
+
+    # Lookups by order use the (order_id, image) unique index.
+    order_id = models.CharField(max_length=20)
+    image = models.ForeignKey(ProofImage, on_delete=models.PROTECT, related_name='proofs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='PHOTO')
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order_id', 'image'], name='unique_proof_order_image'),
+        ]
 
     def __str__(self):
-        return f"Location for {self.driver.user.username}"
\ No newline at end of file
+        return f"{self.get_kind_display()} for {self.order_id}"
@@ -0,0 +1,494 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .fragments import bump
+from .models import DeliveryProof, ProofImage
+
+logger = logging.getLogger(__name__)
+
+# Proof-of-delivery files.
+#
+# Uploads never pass through memory: ProofUploadHandler writes each chunk to a
+# temporary file next to the store. The metadata phones embed (GPS position,
+# device and owner details) is then stripped from it, losslessly, in a copy
+# that is hashed and renamed to its content address (originals/ab/<sha256>).
+# A file that is already stored is simply discarded, so a photo uploaded twice
+# (a retried request, the same signature on several orders) takes space once.
+#
+# Originals keep their image data byte for byte, and only the EXIF orientation
+# of their metadata, so their sha256 stays verifiable; they are never served.
+# Thumbnails (thumbnails/ab/<sha256>.jpg) are made off the request path by a
+# small thread pool: decoded at reduced scale, rotated per the EXIF
+# orientation and re-encoded without any metadata. The dashboard and the
+# admin only ever show thumbnails.
+
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+]
+
+
+def sniff_content_type(head):
+    """
+    The image type of a file from its first bytes, or None when it is not a
+    JPEG, PNG or WebP image. The client's Content-Type is not trusted.
+    """
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def storage_root():
+    return Path(settings.PROOF_STORAGE_ROOT)
+
+
+def original_path(sha256):
+    return storage_root() / 'originals' / sha256[:2] / sha256
+
+
+def thumbnail_path(sha256):
+    return storage_root() / 'thumbnails' / sha256[:2] / f'{sha256}.jpg'
+
+
+# --- Streaming uploads ---
+
+class StreamedUpload(UploadedFile):
+    """
+    An upload already written to a temporary file in the store, with its
+    sniffed content type. store_upload() stores a copy without metadata;
+    close() removes the temporary file.
+    """
+
+    def __init__(self, temp_path, size, name, content_type):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.temp_path = temp_path
+
+    def close(self):
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+class ProofUploadHandler(FileUploadHandler):
+    """
+    Streams the first uploaded file to disk. Other files in
+    the request are skipped, and so is a file larger than
+    PROOF_MAX_UPLOAD_BYTES, as soon as it crosses the limit.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.upload = None
+        self.temp = None
+        self.started = False
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.started:
+            raise SkipFile()
+        self.started = True
+        temp_dir = storage_root() / 'tmp'
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        self.temp = tempfile.NamedTemporaryFile(dir=temp_dir, prefix='upload-', delete=False)
+        self.head = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.PROOF_MAX_UPLOAD_BYTES:
+            self.too_large = True
+            self.upload_interrupted()
+            raise SkipFile()
+        if len(self.head) < 16:
+            self.head += raw_data[:16 - len(self.head)]
+        self.temp.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.temp is None:
+            return None
+        self.temp.close()
+        self.upload = StreamedUpload(self.temp.name, file_size, self.file_name, sniff_content_type(self.head))
+        return self.upload
+
+    def upload_interrupted(self):
+        if self.temp is not None and self.upload is None:
+            self.temp.close()
+            os.remove(self.temp.name)
+            self.temp = None
+
+
+# --- Metadata ---
+# Only the markers and chunks that carry image data, colour profiles and the
+# orientation survive; the image data itself is copied, never re-encoded.
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Kept JPEG application segments: APP0 (JFIF), APP2 (ICC profile; its MPF
+# variant points at the trailing images, which are dropped), APP14 (Adobe
+# colour transform). APP1 EXIF is rebuilt with the orientation alone.
+JPEG_KEPT_APP = {0xE0, 0xE2, 0xEE}
+JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_DROPPED = {b'eXIf', b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+
+WEBP_DROPPED = {b'EXIF', b'XMP '}
+WEBP_METADATA_FLAGS = 0x08 | 0x04  # EXIF and XMP present, in the VP8X header
+
+
+def _copy(source, target, length):
+    while length > 0:
+        data = source.read(min(length, COPY_CHUNK_SIZE))
+        if not data:
+            raise ValueError('The image is truncated.')
+        target.write(data)
+        length -= len(data)
+
+
+def _orientation_only(payload):
+    """
+    An EXIF block holding only the orientation of `payload`, or None when
+    the image needs no rotation. Malformed EXIF is dropped altogether.
+    """
+    exif = Image.Exif()
+    try:
+        exif.load(payload)
+    except Exception:
+        return None
+    orientation = exif.get(0x0112)
+    if orientation in (None, 1):
+        return None
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    return exif.tobytes()
+
+
+def _copy_jpeg_scans(source, target):
+    # In entropy-coded data 0xFF is always followed by 0x00 or a restart
+    # marker, so the first FF D9 ends the image; appended images and
+    # trailers (which carry their own metadata) are left out.
+    last = b''
+    while chunk := source.read(COPY_CHUNK_SIZE):
+        if last == b'\xff' and chunk[:1] == b'\xd9':
+            target.write(chunk[:1])
+            return
+        end = chunk.find(b'\xff\xd9')
+        if end != -1:
+            target.write(chunk[:end + 2])
+            return
+        target.write(chunk)
+        last = chunk[-1:]
+    raise ValueError('The image is truncated.')
+
+
+def _strip_jpeg(source, target):
+    if source.read(2) != b'\xff\xd8':
+        raise ValueError('Not a JPEG image.')
+    target.write(b'\xff\xd8')
+    while True:
+        if source.read(1) != b'\xff':
+            raise ValueError('The image is damaged.')
+        code = source.read(1)
+        while code == b'\xff':
+            code = source.read(1)
+        if not code:
+            raise ValueError('The image is truncated.')
+        code = code[0]
+        if code in JPEG_STANDALONE:
+            target.write(bytes((0xFF, code)))
+            continue
+        if code == 0xD9:
+            target.write(b'\xff\xd9')
+            return
+        length = int.from_bytes(source.read(2), 'big')
+        if length < 2:
+            raise ValueError('The image is damaged.')
+        if code == 0xDA:
+            # Start of scan: everything after it is image data.
+            target.write(bytes((0xFF, code)) + length.to_bytes(2, 'big'))
+            _copy(source, target, length - 2)
+            _copy_jpeg_scans(source, target)
+            return
+        payload = source.read(length - 2)
+        if len(payload) < length - 2:
+            raise ValueError('The image is truncated.')
+        if code == 0xE1 and payload.startswith(b'Exif\x00\x00'):
+            payload = _orientation_only(payload)
+            if payload is None:
+                continue
+        elif code == 0xFE or (0xE0 <= code <= 0xEF and (
+            code not in JPEG_KEPT_APP or (code == 0xE2 and payload.startswith(b'MPF\x00'))
+        )):
+            continue
+        target.write(bytes((0xFF, code)) + (len(payload) + 2).to_bytes(2, 'big') + payload)
+
+
+def _strip_png(source, target):
+    if source.read(8) != PNG_SIGNATURE:
+        raise ValueError('Not a PNG image.')
+    target.write(PNG_SIGNATURE)
+    while True:
+        header = source.read(8)
+        if len(header) < 8:
+            raise ValueError('The image is truncated.')
+        length, kind = int.from_bytes(header[:4], 'big'), header[4:]
+        if kind in PNG_DROPPED:
+            source.seek(length + 4, os.SEEK_CUR)
+            continue
+        target.write(header)
+        _copy(source, target, length + 4)  # data and CRC
+        if kind == b'IEND':
+            return
+
+
+def _strip_webp(source, target):
+    header = source.read(12)
+    if header[:4] != b'RIFF' or header[8:] != b'WEBP':
+        raise ValueError('Not a WebP image.')
+    target.write(header)
+    end = 8 + int.from_bytes(header[4:8], 'little')
+    while source.tell() < end:
+        chunk = source.read(8)
+        if len(chunk) < 8:
+            raise ValueError('The image is truncated.')
+        kind, size = chunk[:4], int.from_bytes(chunk[4:], 'little')
+        padded = size + (size & 1)
+        if kind in WEBP_DROPPED:
+            source.seek(padded, os.SEEK_CUR)
+            continue
+        target.write(chunk)
+        if kind == b'VP8X' and padded:
+            target.write(bytes((source.read(1)[0] & ~WEBP_METADATA_FLAGS,)))
+            padded -= 1
+        _copy(source, target, padded)
+    riff_size = target.tell() - 8
+    target.seek(4)
+    target.write(riff_size.to_bytes(4, 'little'))
+
+
+STRIPPERS = {
+    'image/jpeg': _strip_jpeg,
+    'image/png': _strip_png,
+    'image/webp': _strip_webp,
+}
+
+
+def strip_metadata(path, content_type):
+    """
+    Writes a copy of the image at `path` without its metadata, next to it,
+    and returns the copy's path. Raises ValueError for a damaged image.
+    """
+    fd, clean = tempfile.mkstemp(dir=os.path.dirname(path), prefix='upload-clean-')
+    try:
+        with open(path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+            STRIPPERS[content_type](source, target)
+    except BaseException:
+        os.remove(clean)
+        raise
+    return clean
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Storage ---
+
+def store_upload(upload):
+    """
+    Moves a streamed upload, stripped of its metadata, to its content
+    address and returns (ProofImage, created). Content that is already
+    stored is not written again; the duplicate is discarded.
+    Raises ValueError for a damaged image.
+    """
+    try:
+        clean = strip_metadata(upload.temp_path, upload.content_type)
+        try:
+            sha256, size = _file_sha256(clean), os.path.getsize(clean)
+            path = original_path(sha256)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Same filesystem, so this is an atomic rename, not a copy.
+                os.replace(clean, path)
+        finally:
+            if os.path.exists(clean):
+                os.remove(clean)
+    finally:
+        upload.close()
+    return ProofImage.objects.get_or_create(
+        sha256=sha256, defaults={'size': size, 'content_type': upload.content_type},
+    )
+
+
+def add_proof(order_id, upload, kind='PHOTO', driver=None):
+    """
+    Stores an upload and attaches it to an order. Returns
+    (DeliveryProof, created); the thumbnail is queued for new content only.
+    Raises ValueError for a damaged image.
+    """
+    with transaction.atomic():
+        image, new_image = store_upload(upload)
+        proof, created = DeliveryProof.objects.get_or_create(
+            order_id=order_id, image=image, defaults={'kind': kind, 'driver': driver},
+        )
+    if new_image:
+        schedule_thumbnail(image.sha256)
+    return proof, created
+
+
+# --- Thumbnails ---
+
+def make_thumbnail(source, target, size=None):
+    """
+    Writes a JPEG thumbnail of the image at `source` to `target`, at most
+    `size` pixels on its longer side, without any of the source's metadata.
+    Returns the (width, height) of the source.
+    """
+    size = size or settings.PROOF_THUMBNAIL_SIZE
+    with Image.open(source) as image:
+        width, height = image.size
+        # JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale when that is
+        # enough for the thumbnail, far faster than decoding a full photo.
+        image.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Signatures are often transparent PNGs; put them on white.
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix('.part')
+        # No exif= argument: nothing from the source is carried over.
+        image.save(partial, 'JPEG', quality=80, optimize=True)
+        os.replace(partial, target)
+    return width, height
+
+
+def _thumbnail_result(sha256):
+    try:
+        return make_thumbnail(original_path(sha256), thumbnail_path(sha256)), None
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        return None, str(e)[:200]
+
+
+def _record(sha256, dimensions, error):
+    if dimensions is None:
+        ProofImage.objects.filter(pk=sha256).update(status='FAILED', error=error, processed_at=timezone.now())
+        return False
+    ProofImage.objects.filter(pk=sha256).update(
+        status='READY', width=dimensions[0], height=dimensions[1], error='', processed_at=timezone.now(),
+    )
+    return True
+
+
+def process_image(sha256):
+    """
+    Makes the thumbnail of a stored image and marks it READY (or FAILED).
+    Running it twice for the same image is harmless.
+    """
+    ready = _record(sha256, *_thumbnail_result(sha256))
+    if ready:
+        bump('orders')
+    return ready
+
+
+def _process_in_worker(sha256):
+    try:
+        process_image(sha256)
+    except Exception:
+        logger.exception('Thumbnail for %s failed', sha256)
+    finally:
+        # Pool threads are long-lived; do not leave their connections open.
+        connections.close_all()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PROOF_THUMBNAIL_WORKERS, thread_name_prefix='proof-thumbnails',
+            )
+    return _executor
+
+
+def schedule_thumbnail(sha256):
+    """
+    Queues the thumbnail once the upload's transaction has committed, so the
+    worker sees the row. With PROOF_THUMBNAIL_WORKERS = 0 it is made inline.
+    """
+    def submit():
+        if settings.PROOF_THUMBNAIL_WORKERS:
+            get_executor().submit(_process_in_worker, sha256)
+        else:
+            process_image(sha256)
+
+    transaction.on_commit(submit)
+
+
+def process_pending(include_failed=False, max_workers=None):
+    """
+    Makes the thumbnails still missing, e.g. queued in a process that was
+    restarted before getting to them. Image work runs in a thread pool;
+    database writes stay on this thread. Returns (ready, failed).
+    """
+    statuses = ['PENDING', 'FAILED'] if include_failed else ['PENDING']
+    pending = list(ProofImage.objects.filter(status__in=statuses).values_list('pk', flat=True))
+    ready = failed = 0
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers or max(settings.PROOF_THUMBNAIL_WORKERS, 1)) as pool:
+            for sha256, result in zip(pending, pool.map(_thumbnail_result, pending)):
+                if _record(sha256, *result):
+                    ready += 1
+                else:
+                    failed += 1
+        if ready:
+            bump('orders')
+    return ready, failed
+
+
+def remove_stale_uploads(max_age=24 * 3600):
+    """
+    Deletes temporary upload files left behind by interrupted requests.
+    Returns the number removed.
+    """
+    removed = 0
+    cutoff = time.time() - max_age
+    for path in (storage_root() / 'tmp').glob('upload-*'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
@@ -0,0 +1,203 @@
+import csv
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .analytics import CENTS
+from .models import ArchivedOrder, DeletedOrder, DeliveryCorrection, Order, Settlement, Watermark
+
+WATERMARK_NAME = 'cod_settlements'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _delivered(model, start_day, end_day, driver_ids=None):
+    """
+    DELIVERED orders of `model` delivered on [start_day, end_day) (local days),
+    summed per driver and day by the database.
+    """
+    orders = model.objects.filter(
+        status='DELIVERED',
+        delivered_at__gte=_day_start(start_day),
+        delivered_at__lt=_day_start(end_day),
+        driver__isnull=False,
+    )
+    if driver_ids is not None:
+        orders = orders.filter(driver_id__in=driver_ids)
+    return (
+        orders.annotate(day=TruncDate('delivered_at', tzinfo=timezone.get_current_timezone()))
+        .values('driver_id', 'day')
+        .annotate(order_count=Count('pk'), cod_total=Sum('cod_amount'))
+        .order_by()
+    )
+
+
+def _totals(start_day, end_day, driver_ids=None):
+    """
+    {(driver_id, day): (order_count, cod_total)} over live and archived
+    orders, so archiving never changes a settlement.
+    """
+    totals = {}
+    for model in (Order, ArchivedOrder):
+        for row in _delivered(model, start_day, end_day, driver_ids):
+            count, total = totals.get((row['driver_id'], row['day']), (0, Decimal(0)))
+            totals[(row['driver_id'], row['day'])] = (count + row['order_count'], total + (row['cod_total'] or 0))
+    return totals
+
+
+def _store(totals, existing):
+    """
+    Writes `totals` over the `existing` settlements they replace. Settlements
+    left without deliveries are zeroed if cash was already counted against
+    them, and deleted otherwise. Returns the number of rows changed.
+    """
+    to_create, to_update = [], []
+    for key, (count, total) in totals.items():
+        total = Decimal(total).quantize(CENTS)
+        settlement = existing.pop(key, None)
+        if settlement is None:
+            to_create.append(Settlement(driver_id=key[0], day=key[1], order_count=count, cod_total=total))
+        elif (settlement.order_count, settlement.cod_total) != (count, total):
+            settlement.order_count, settlement.cod_total = count, total
+            to_update.append(settlement)
+
+    stale = [settlement for settlement in existing.values() if settlement.order_count or settlement.cod_total]
+    for settlement in stale:
+        settlement.order_count, settlement.cod_total = 0, Decimal('0.00')
+    counted = [settlement for settlement in stale if settlement.cash_received is not None]
+    to_update.extend(counted)
+    to_delete = [settlement.pk for settlement in stale if settlement.cash_received is None]
+
+    now = timezone.now()
+    for settlement in to_update:
+        settlement.computed_at = now
+    Settlement.objects.bulk_create(to_create, batch_size=1000)
+    Settlement.objects.bulk_update(to_update, ['order_count', 'cod_total', 'computed_at'], batch_size=1000)
+    Settlement.objects.filter(pk__in=to_delete).delete()
+    return len(to_create) + len(to_update) + len(to_delete)
+
+
+def reconcile_days(start_day, end_day, chunk_days=7):
+    """
+    Recomputes every settlement for the local days in [start_day, end_day],
+    a week at a time, e.g. for a month-end run or after a backfill.
+    Returns the number of settlements created, changed or removed.
+    """
+    changed = 0
+    cursor = start_day
+    while cursor <= end_day:
+        chunk_end = min(cursor + timedelta(days=chunk_days), end_day + timedelta(days=1))
+        with transaction.atomic():
+            existing = {
+                (settlement.driver_id, settlement.day): settlement
+                for settlement in Settlement.objects.select_for_update().filter(day__gte=cursor, day__lt=chunk_end)
+            }
+            changed += _store(_totals(cursor, chunk_end), existing)
+        cursor = chunk_end
+    return changed
+
+
+def reconcile_keys(keys):
+    """
+    Recomputes the settlements of the given (driver_id, day) pairs, plus every
+    other settlement of the same days, which may have lost an order to a
+    driver reassignment. Each day is read through the (driver, status,
+    delivered_at) index for just the drivers involved.
+    """
+    drivers_by_day = {}
+    for driver_id, day in keys:
+        drivers_by_day.setdefault(day, set()).add(driver_id)
+
+    changed = 0
+    for day, driver_ids in sorted(drivers_by_day.items()):
+        with transaction.atomic():
+            existing = {
+                (settlement.driver_id, settlement.day): settlement
+                for settlement in Settlement.objects.select_for_update().filter(day=day)
+            }
+            driver_ids |= {driver_id for driver_id, _ in existing}
+            totals = _totals(day, day + timedelta(days=1), driver_ids)
+            changed += _store(totals, {key: existing[key] for key in existing if key[0] in driver_ids})
+    return changed
+
+
+def refresh_settlements(now=None):
+    """
+    Recomputes only the settlements touched by orders changed or deleted
+    since the last run: late deliveries, status corrections, COD edits and
+    deletions of orders delivered on a day that was already reconciled, and
+    the (driver, day) an order was delivered on before its delivery time or
+    driver was corrected.
+
+    The watermark is moved back by ANALYTICS_ROLLUP_OVERLAP on every run, as
+    for the analytics rollups, so rows committed late are still picked up.
+    Returns the number of settlements created, changed or removed.
+    """
+    now = now or timezone.now()
+    watermark = Watermark.objects.filter(name=WATERMARK_NAME).first()
+    changed = Order.objects.filter(updated_at__lte=now, delivered_at__isnull=False)
+    deleted = DeletedOrder.objects.filter(deleted_at__lte=now, delivered_at__isnull=False)
+    corrected = DeliveryCorrection.objects.filter(corrected_at__lte=now)
+    if watermark:
+        since = watermark.value - settings.ANALYTICS_ROLLUP_OVERLAP
+        changed = changed.filter(updated_at__gt=since)
+        deleted = deleted.filter(deleted_at__gt=since)
+        corrected = corrected.filter(corrected_at__gt=since)
+
+    keys = set()
+    for orders in (changed, deleted, corrected):
+        keys.update(
+            (driver_id, timezone.localdate(delivered_at))
+            for driver_id, delivered_at in orders.values_list('driver_id', 'delivered_at').iterator(chunk_size=2000)
+        )
+    count = reconcile_keys(keys)
+    Watermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': now})
+    return count
+
+
+# --- CSV export ---
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer
+    can produce rows for a StreamingHttpResponse one at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+CSV_HEADER = ['day', 'driver', 'driver_phone', 'orders', 'cod_total', 'cash_received', 'discrepancy']
+
+
+def settlement_csv_rows(start_day, end_day):
+    """
+    Yields the CSV lines of the settlement report for [start_day, end_day],
+    reading the settlements in chunks, so memory use does not depend on the
+    size of the report.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    settlements = (
+        Settlement.objects.filter(day__gte=start_day, day__lte=end_day)
+        .select_related('driver__user')
+        .order_by('day', 'driver__user__username')
+    )
+    for settlement in settlements.iterator(chunk_size=2000):
+        discrepancy = settlement.discrepancy
+        yield writer.writerow([
+            settlement.day.isoformat(),
+            str(settlement.driver),
+            settlement.driver.phone_number,
+            settlement.order_count,
+            settlement.cod_total,
+            '' if settlement.cash_received is None else settlement.cash_received,
+            '' if discrepancy is None else discrepancy,
+        ])
@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .archive import is_archiving
+from .auth import user_cache_key
+from .fragments import bump
+from .live import publish_change
+from .models import Customer, DeletedOrder, DeliveryProof, Driver, DriverLocation, Order, OrderStatusCount
+
+
+@receiver(post_delete, sender=Order)
+def remove_deleted_order_from_counters(sender, instance, **kwargs):
+    # Deletions (including cascades from Customer) run inside the deletion
+    # transaction, so the counters are adjusted atomically with the row.
+    # Orders moved to the archive still count.
+    if instance._counted_state is not None and not is_archiving():
+        OrderStatusCount.record_transition(instance._counted_state, None)
+
+
+@receiver(post_delete, sender=Order)
+def record_deleted_order(sender, instance, **kwargs):
+    # Lets the analytics rollups and COD settlements recompute the buckets and
+    # (driver, day) the order counted in.
+    if not is_archiving():
+        DeletedOrder.objects.create(
+            order_id=instance.order_id,
+            driver_id=instance.driver_id,
+            status=instance.status,
+            created_at=instance.created_at,
+            delivered_at=instance.delivered_at,
+        )
+
+
+# --- Live dashboard updates ---
+# Changes are published after commit to the shared change log, which every
+# process serving live dashboards polls (see logistics/live.py).
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def publish_order_change(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: publish_change('order', pk))
+
+
+@receiver(post_save, sender=DriverLocation)
+def publish_driver_location(sender, instance, **kwargs):
+    driver_id = instance.driver_id
+    transaction.on_commit(lambda: publish_change('location', driver_id))
+
+
+# --- Auth user cache ---
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+    # Driver names come from the user; logins only touch last_login.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        transaction.on_commit(lambda: bump('orders', 'drivers'))
+
+
+# --- Dashboard fragment versions ---
+# Bumped after commit, so a fragment is never re-rendered from data that is
+# about to be rolled back (see logistics/fragments.py).
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_fragments(sender, **kwargs):
+    transaction.on_commit(lambda: bump('dashboard', 'orders'))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_fragments(sender, **kwargs):
+    transaction.on_commit(lambda: bump('orders'))
+
+
+@receiver(post_save, sender=Driver)
+@receiver(post_delete, sender=Driver)
+def invalidate_driver_fragments(sender, **kwargs):
+    transaction.on_commit(lambda: bump('orders', 'drivers'))
+
+
+@receiver(post_save, sender=DriverLocation)
+@receiver(post_delete, sender=DriverLocation)
+def invalidate_location_fragments(sender, **kwargs):
+    transaction.on_commit(lambda: bump('drivers'))
+
+
+# Thumbnails becoming ready bump 'orders' themselves (see logistics/proofs.py).
+@receiver(post_save, sender=DeliveryProof)
+@receiver(post_delete, sender=DeliveryProof)
+def invalidate_proof_fragments(sender, **kwargs):
+    transaction.on_commit(lambda: bump('orders'))
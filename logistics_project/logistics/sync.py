@@ -0,0 +1,237 @@
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DriverLocation, DriverSyncEvent, Order
+
+# Position of each status in the delivery lifecycle. Offline updates may only
+# move an order forward, so a stale update replayed late can never undo a
+# newer one. CANCELED is terminal and decided by the server.
+STATUS_RANK = {
+    'PENDING': 0,
+    'ASSIGNED': 1,
+    'OUT_FOR_DELIVERY': 2,
+    'DELIVERED': 3,
+}
+
+# Statuses a driver is allowed to set from the app.
+DRIVER_STATUSES = ('OUT_FOR_DELIVERY', 'DELIVERED')
+
+ACTIVE_STATUSES = ('ASSIGNED', 'OUT_FOR_DELIVERY')
+
+
+class SyncError(ValueError):
+    pass
+
+
+def _parse_timestamp(value, now):
+    timestamp = parse_datetime(value) if isinstance(value, str) else None
+    if timestamp is None:
+        raise SyncError(f"Invalid timestamp '{value}'")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp, dt_timezone.utc)
+    # Phone clocks drift; never record a time in the future.
+    return min(timestamp, now)
+
+
+def _parse_updates(updates, now):
+    """
+    Returns the well-formed updates and a {client_id: detail} dict of the
+    malformed ones. Malformed updates are rejected one by one rather than
+    failing the batch, so a client can drop them and keep syncing the rest.
+    """
+    parsed, invalid = [], {}
+    for update in updates:
+        if not isinstance(update, dict):
+            raise SyncError('Each update must be an object.')
+        client_id = str(update.get('client_id') or '')
+        if not client_id or len(client_id) > 64:
+            raise SyncError('Each update needs a client_id of at most 64 characters.')
+        try:
+            timestamp = _parse_timestamp(update.get('timestamp'), now)
+        except SyncError as e:
+            invalid[client_id] = str(e)
+            continue
+        parsed.append({
+            'client_id': client_id,
+            'order_id': str(update.get('order_id') or ''),
+            'status': update.get('status'),
+            'timestamp': timestamp,
+        })
+    return parsed, invalid
+
+
+def _parse_location(fix, now):
+    if not isinstance(fix, dict):
+        raise SyncError('Each location must be an object.')
+    try:
+        latitude = Decimal(str(fix['latitude'])).quantize(Decimal('0.000001'))
+        longitude = Decimal(str(fix['longitude'])).quantize(Decimal('0.000001'))
+    except (KeyError, InvalidOperation):
+        raise SyncError('Each location needs a numeric latitude and longitude.')
+    finite = latitude.is_finite() and longitude.is_finite()
+    if not finite or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise SyncError('Location out of range.')
+    return _parse_timestamp(fix.get('timestamp'), now), latitude, longitude
+
+
+def _parse_locations(locations, now):
+    # A bad fix is dropped; it would be just as bad on every retry.
+    parsed = []
+    for fix in locations:
+        try:
+            parsed.append(_parse_location(fix, now))
+        except SyncError:
+            continue
+    return parsed
+
+
+def _apply_update(driver, update, orders):
+    """
+    Applies one queued transition. Returns (result, detail).
+    """
+    order = orders.get(update['order_id'])
+    if order is None or order.driver_id != driver.pk:
+        return 'rejected', 'Order is not assigned to this driver.'
+    if update['status'] not in DRIVER_STATUSES:
+        return 'rejected', f"Drivers cannot set status '{update['status']}'."
+    if order.status == 'CANCELED':
+        return 'conflict', 'Order was canceled.'
+    if STATUS_RANK[update['status']] <= STATUS_RANK[order.status]:
+        return 'conflict', f"Order is already {order.status}."
+
+    order.status = update['status']
+    if order.status == 'DELIVERED':
+        # Record when the driver actually delivered, not when the phone got signal.
+        order.delivered_at = update['timestamp']
+    order.save()
+    return 'applied', ''
+
+
+def apply_driver_sync(driver, payload):
+    """
+    Applies a batch of offline status updates and location fixes for one
+    driver in a single transaction, and returns the per-update results
+    together with the driver's route delta.
+
+    Updates already seen (same client_id) are not applied again; their
+    original result is returned, so a client can safely resend a batch
+    after a dropped response.
+    """
+    if not isinstance(payload, dict):
+        raise SyncError('Expected a JSON object.')
+    raw_updates = payload.get('updates') or []
+    raw_locations = payload.get('locations') or []
+    if not isinstance(raw_updates, list) or not isinstance(raw_locations, list):
+        raise SyncError('updates and locations must be lists.')
+    if len(raw_updates) + len(raw_locations) > settings.DRIVER_SYNC_MAX_ITEMS:
+        raise SyncError(f'At most {settings.DRIVER_SYNC_MAX_ITEMS} updates and locations per batch.')
+    now = timezone.now()
+    updates, invalid = _parse_updates(raw_updates, now)
+    locations = _parse_locations(raw_locations, now)
+    since = payload.get('since')
+    since = _parse_timestamp(since, now) if since else None
+
+    results = {client_id: {'result': 'rejected', 'detail': detail} for client_id, detail in invalid.items()}
+    with transaction.atomic():
+        # Lock the orders before looking for earlier deliveries of the same
+        # updates: a concurrent resend holding the locks has then committed
+        # its events by the time they are read.
+        orders = {
+            order.order_id: order
+            for order in Order.objects.select_for_update().filter(
+                order_id__in={update['order_id'] for update in updates},
+            )
+        }
+        seen = {
+            event.client_id: event
+            for event in DriverSyncEvent.objects.filter(
+                driver=driver, client_id__in=[update['client_id'] for update in updates],
+            )
+        }
+
+        events = []
+        # Replay in the order the driver made the changes.
+        for update in sorted(updates, key=lambda update: update['timestamp']):
+            client_id = update['client_id']
+            if client_id in seen:
+                results[client_id] = {'result': seen[client_id].result, 'detail': seen[client_id].detail, 'duplicate': True}
+                continue
+            result, detail = _apply_update(driver, update, orders)
+            results[client_id] = {'result': result, 'detail': detail}
+            seen[client_id] = DriverSyncEvent(
+                driver=driver,
+                client_id=client_id,
+                order_id=update['order_id'][:20],
+                status=str(update['status'])[:20],
+                client_timestamp=update['timestamp'],
+                result=result,
+                detail=detail,
+            )
+            events.append(seen[client_id])
+        # A concurrent resend of updates whose orders were not locked above
+        # (unknown orders, say) can still insert the same client_ids first.
+        # Keep its rows and report what they say.
+        DriverSyncEvent.objects.bulk_create(events, ignore_conflicts=True)
+        if events:
+            for event in DriverSyncEvent.objects.filter(driver=driver, client_id__in=[event.client_id for event in events]):
+                if (event.result, event.detail) != (results[event.client_id]['result'], results[event.client_id]['detail']):
+                    results[event.client_id] = {'result': event.result, 'detail': event.detail, 'duplicate': True}
+
+        if locations:
+            # Only the newest fix matters for the live position. Fixes are
+            # compared by the phone's clock, which may be off from the server's.
+            timestamp, latitude, longitude = max(locations)
+            location = DriverLocation.objects.filter(driver=driver).first()
+            if location is None or location.recorded_at is None or location.recorded_at <= timestamp:
+                location = location or DriverLocation(driver=driver)
+                location.latitude, location.longitude = latitude, longitude
+                location.recorded_at = timestamp
+                location.save()
+
+    return {
+        'results': results,
+        'route': route_delta(driver, since, payload.get('known_order_ids') or []),
+        'server_time': now.isoformat(),
+        'max_items': settings.DRIVER_SYNC_MAX_ITEMS,
+    }
+
+
+def route_delta(driver, since, known_order_ids):
+    """
+    Returns the active orders on the driver's route that changed since
+    `since` (all of them on the first sync), and which of the orders the
+    app already knows about have left the route.
+    """
+    active = Order.objects.filter(driver=driver, status__in=ACTIVE_STATUSES)
+    changed = active.filter(updated_at__gte=since) if since else active
+
+    orders = [
+        {
+            'order_id': order['order_id'],
+            'status': order['status'],
+            'customer': order['customer__name'],
+            'customer_phone': order['customer__phone_number'],
+            'delivery_address': order['delivery_address'],
+            'delivery_latitude': str(order['delivery_latitude']) if order['delivery_latitude'] is not None else None,
+            'delivery_longitude': str(order['delivery_longitude']) if order['delivery_longitude'] is not None else None,
+            'items_description': order['items_description'],
+            'cod_amount': str(order['cod_amount']),
+        }
+        for order in changed.order_by('created_at').values(
+            'order_id', 'status', 'customer__name', 'customer__phone_number', 'delivery_address',
+            'delivery_latitude', 'delivery_longitude', 'items_description', 'cod_amount',
+        )
+    ]
+
+    removed = []
+    known = [str(order_id) for order_id in known_order_ids][:settings.DRIVER_SYNC_MAX_ITEMS]
+    if known:
+        still_active = set(active.filter(order_id__in=known).values_list('order_id', flat=True))
+        removed = [order_id for order_id in known if order_id not in still_active]
+
+    return {'orders': orders, 'removed': removed}
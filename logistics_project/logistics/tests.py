@@ -1,3 +1,1020 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import ProtectedError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .analytics import analytics_summary, backfill_rollups, refresh_rollups
+from .archive import all_orders, archive_batch, archive_orders, find_order
+from .checks import check_cached_auth, check_fragment_cache
+from .geocoding import (
+    GazetteerProvider, GeocodingProvider, geocode_address, geocode_customers, geocode_orders, normalize_address,
+)
+from .importing import import_orders
+from .live import LISTENERS_KEY, Broadcaster, publish_change, read_changes
+from .models import (
+    ArchivedOrder, Customer, DailyDeliveryCount, DeletedOrder, DeliveryCorrection, DeliveryProof, Driver,
+    DriverLocation, DriverSyncEvent, GeocodedAddress, LiveChange, Order, OrderRollup, OrderStatusCount, ProofImage,
+    Settlement, Vehicle,
+)
+from .proofs import original_path, thumbnail_path
+from .reconciliation import reconcile_days, refresh_settlements
+
+
+class CountingProvider(GeocodingProvider):
+    name = 'counting'
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.calls = []
+
+    def geocode(self, normalized_address):
+        self.calls.append(normalized_address)
+        return self.entries.get(normalized_address)
+
+
+class GeocodingTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        self.provider = CountingProvider({
+            '1 main st, pune': (Decimal('18.520430'), Decimal('73.856743')),
+            '22 mg road, pune': (Decimal('18.516726'), Decimal('73.856255')),
+        })
+
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address('  1 Main St ,PUNE. '), '1 main st, pune')
+
+    def test_each_address_resolved_once(self):
+        orders = [
+            Order.objects.create(
+                order_id=f'ORD{i}', customer=self.customer,
+                pickup_address='1 Main St, Pune', delivery_address='22 MG Road,  Pune',
+                items_description='Box',
+            )
+            for i in range(5)
+        ]
+        self.assertEqual(geocode_orders(orders, provider=self.provider, max_workers=2), 5)
+        self.assertEqual(sorted(self.provider.calls), ['1 main st, pune', '22 mg road, pune'])
+
+        order = Order.objects.get(order_id='ORD3')
+        self.assertEqual(order.pickup_latitude, Decimal('18.520430'))
+        self.assertEqual(order.delivery_longitude, Decimal('73.856255'))
+
+    def test_cache_is_persistent_including_misses(self):
+        self.assertIsNone(geocode_address('Nowhere Lane', provider=self.provider))
+        self.assertIsNone(geocode_address('nowhere lane', provider=self.provider))
+        geocode_address('1 Main St, Pune', provider=self.provider)
+        geocode_address('1 MAIN ST, PUNE', provider=self.provider)
+
+        self.assertEqual(self.provider.calls, ['nowhere lane', '1 main st, pune'])
+        self.assertEqual(GeocodedAddress.objects.count(), 2)
+
+    def test_expired_misses_are_retried(self):
+        self.assertIsNone(geocode_address('Nowhere Lane', provider=self.provider))
+        GeocodedAddress.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.provider.entries['nowhere lane'] = (Decimal('18.5'), Decimal('73.8'))
+
+        self.assertEqual(geocode_address('Nowhere Lane', provider=self.provider), (Decimal('18.5'), Decimal('73.8')))
+        self.assertEqual(self.provider.calls, ['nowhere lane', 'nowhere lane'])
+        cached = GeocodedAddress.objects.get()
+        self.assertEqual(cached.latitude, Decimal('18.5'))
+
+    def test_changed_addresses_are_geocoded_again(self):
+        Order.objects.create(
+            order_id='ORD0', customer=self.customer,
+            pickup_address='1 Main St, Pune', delivery_address='1 Main St, Pune', items_description='Box',
+        )
+        Customer.objects.update(address='1 Main St, Pune')
+        self.customer.refresh_from_db()
+        geocode_orders(Order.objects.all(), provider=self.provider)
+        geocode_customers(Customer.objects.all(), provider=self.provider)
+
+        order = Order.objects.get()
+        self.assertEqual(order.delivery_latitude, Decimal('18.520430'))
+        order.delivery_address = '22 MG Road, Pune'
+        order.save()
+        order = Order.objects.only('pk', 'pickup_address').get()
+        order.pickup_address = '22 MG Road, Pune'
+        order.save(update_fields=['pickup_address'])
+        self.customer.address = '22 MG Road, Pune'
+        self.customer.save()
+
+        order = Order.objects.get()
+        self.assertEqual((order.pickup_latitude, order.delivery_latitude), (None, None))
+        self.assertIsNone(Customer.objects.get().latitude)
+        with mock.patch('logistics.geocoding.get_provider', return_value=self.provider):
+            call_command('geocode_orders', stdout=io.StringIO())
+        order = Order.objects.get()
+        self.assertEqual(order.pickup_latitude, Decimal('18.516726'))
+        self.assertEqual(order.delivery_latitude, Decimal('18.516726'))
+        self.assertEqual(Customer.objects.get().latitude, Decimal('18.516726'))
+
+    def test_missing_gazetteer_fails_loudly(self):
+        with self.assertRaises(ImproperlyConfigured):
+            GazetteerProvider(path=Path(tempfile.gettempdir()) / 'no-such-gazetteer.csv')
+
+
+class AdminChangelistQueryTests(TestCase):
+    """
+    Each changelist must issue the same number of queries whatever the
+    number of rows on the page, i.e. no per-row lookups from __str__.
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin_user)
+        self.rows = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            i = self.rows
+            self.rows += 1
+            user = User.objects.create_user(f'driver{i}', first_name='Driver', last_name=str(i))
+            driver = Driver.objects.create(user=user, phone_number=f'900000{i:04d}')
+            customer = Customer.objects.create(name=f'Customer {i}', phone_number='555', address='Somewhere')
+            Vehicle.objects.create(license_plate=f'MH12-{i:04d}', make='Tata', model='Ace', driver=driver)
+            DriverLocation.objects.create(driver=driver, latitude=18.5, longitude=73.8)
+            Order.objects.create(
+                order_id=f'ORD{i}', customer=customer, driver=driver,
+                pickup_address='A', delivery_address='B', items_description='Box',
+            )
+            GeocodedAddress.objects.create(
+                address_hash=f'{i:064d}', normalized_address=f'address {i}', provider='test',
+            )
+            ArchivedOrder.objects.create(
+                order_id=f'OLD{i}', customer=customer, driver=driver, status='DELIVERED',
+                pickup_address='A', delivery_address='B', items_description='Box',
+                created_at=timezone.now(), updated_at=timezone.now(),
+            )
+            Settlement.objects.create(driver=driver, day=timezone.localdate(), order_count=1, cod_total=Decimal('10.00'))
+            image = ProofImage.objects.create(sha256=f'{i:064x}', size=1, content_type='image/jpeg', status='READY')
+            DeliveryProof.objects.create(order_id=f'ORD{i}', image=image, driver=driver)
+            DriverSyncEvent.objects.create(
+                driver=driver, client_id=f'client-{i}', order_id=f'ORD{i}', status='DELIVERED',
+                client_timestamp=timezone.now(), result='applied',
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, model_name):
+        url = reverse(f'admin:logistics_{model_name}_changelist')
+        # Warm the session and user cache so both measured requests start alike.
+        self.count_queries(url)
+        self.add_rows(2)
+        few = self.count_queries(url)
+        self.add_rows(20)
+        many = self.count_queries(url)
+        self.assertEqual(few, many, f'{model_name} changelist issues per-row queries')
+
+    def test_order_changelist(self):
+        self.assert_constant_queries('order')
+
+    def test_driver_changelist(self):
+        self.assert_constant_queries('driver')
+
+    def test_customer_changelist(self):
+        self.assert_constant_queries('customer')
+
+    def test_vehicle_changelist(self):
+        self.assert_constant_queries('vehicle')
+
+    def test_driverlocation_changelist(self):
+        self.assert_constant_queries('driverlocation')
+
+    def test_archivedorder_changelist(self):
+        self.assert_constant_queries('archivedorder')
+
+    def test_driversyncevent_changelist(self):
+        self.assert_constant_queries('driversyncevent')
+
+    def test_geocodedaddress_changelist(self):
+        self.assert_constant_queries('geocodedaddress')
+
+    def test_settlement_changelist(self):
+        self.assert_constant_queries('settlement')
+
+    def test_proofimage_changelist(self):
+        self.assert_constant_queries('proofimage')
+
+    def test_deliveryproof_changelist(self):
+        self.assert_constant_queries('deliveryproof')
+
+
+class OrderCounterTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+
+    def create_order(self, order_id):
+        return Order.objects.create(
+            order_id=order_id, customer=self.customer,
+            pickup_address='A', delivery_address='B', items_description='Box',
+        )
+
+    def test_counters_follow_status_transitions(self):
+        first = self.create_order('ORD1')
+        self.create_order('ORD2')
+        self.assertEqual(OrderStatusCount.as_dict()['PENDING'], 2)
+
+        first.status = 'OUT_FOR_DELIVERY'
+        first.save()
+        first = Order.objects.get(pk=first.pk)
+        first.status = 'DELIVERED'
+        first.delivered_at = timezone.now()
+        first.save()
+
+        counts = OrderStatusCount.as_dict()
+        self.assertEqual(counts['PENDING'], 1)
+        self.assertEqual(counts['OUT_FOR_DELIVERY'], 0)
+        self.assertEqual(counts['DELIVERED'], 1)
+        self.assertEqual(DailyDeliveryCount.for_day(timezone.localdate()), 1)
+
+        first.delete()
+        self.assertEqual(OrderStatusCount.as_dict()['DELIVERED'], 0)
+        self.assertEqual(DailyDeliveryCount.for_day(), 0)
+
+    def test_cascade_delete_updates_counters(self):
+        self.create_order('ORD1')
+        self.customer.delete()
+        self.assertEqual(OrderStatusCount.as_dict()['PENDING'], 0)
+
+    def test_deferred_load_still_counts_transition(self):
+        order = self.create_order('ORD1')
+        order = Order.objects.only('order_id').get(pk=order.pk)
+        order.status = 'CANCELED'
+        order.save()
+        counts = OrderStatusCount.as_dict()
+        self.assertEqual((counts['PENDING'], counts['CANCELED']), (0, 1))
+
+    def test_counters_follow_only_written_fields(self):
+        order = self.create_order('ORD1')
+        order.status = 'DELIVERED'
+        order.delivered_at = timezone.now()
+        order.save(update_fields=['items_description'])
+        self.assertEqual(OrderStatusCount.as_dict()['PENDING'], 1)
+        self.assertIsNone(Order.objects.get(pk=order.pk).delivered_at)
+
+        order.save(update_fields=['status'])
+        counts = OrderStatusCount.as_dict()
+        self.assertEqual((counts['PENDING'], counts['DELIVERED']), (0, 1))
+        self.assertEqual(DailyDeliveryCount.for_day(), 0)
+
+        order.save(update_fields=['delivered_at'])
+        self.assertEqual(DailyDeliveryCount.for_day(), 1)
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        user = User.objects.create_user('ramesh', first_name='Ramesh', last_name='Kumar')
+        self.driver = Driver.objects.create(user=user, phone_number='9000000001')
+
+    def create_order(self, order_id, status='PENDING', cod='0'):
+        return Order.objects.create(
+            order_id=order_id, customer=self.customer, driver=self.driver, status=status,
+            delivered_at=timezone.now() if status == 'DELIVERED' else None,
+            pickup_address='A', delivery_address='B', items_description='Box', cod_amount=Decimal(cod),
+        )
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_deliveries_are_bucketed_by_delivery_time(self):
+        order = self.create_order('ORD0', status='OUT_FOR_DELIVERY', cod='40.00')
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=2))
+        refresh_rollups()
+        self.assertEqual(analytics_summary(days=7)['deliveries_over_time'][-1]['deliveries'], 0)
+
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'DELIVERED'
+        order.delivered_at = timezone.now()
+        order.save()
+        self.assertEqual(refresh_rollups(), 2)
+
+        summary = analytics_summary(days=7)
+        self.assertEqual(summary['deliveries_over_time'][-1]['deliveries'], 1)
+        self.assertEqual(summary['deliveries_over_time'][-3]['deliveries'], 0)
+        self.assertEqual(summary['status_breakdown']['OUT_FOR_DELIVERY'], 0)
+        self.assertEqual(summary['drivers'][0]['delivered'], 1)
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_deleted_orders_are_rolled_out(self):
+        order = self.create_order('ORD0', status='DELIVERED', cod='80.00')
+        refresh_rollups()
+        self.assertEqual(analytics_summary(days=7)['status_breakdown']['DELIVERED'], 1)
+
+        order.delete()
+        self.assertEqual(refresh_rollups(), 1)
+        summary = analytics_summary(days=7)
+        self.assertEqual(summary['status_breakdown']['DELIVERED'], 0)
+        self.assertEqual(summary['cod_collected'], '0.00')
+
+        # Archived orders are moved, not deleted.
+        archive_batch([self.create_order('ORD1', status='DELIVERED', cod='10.00').pk])
+        self.assertEqual(DeletedOrder.objects.count(), 1)
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_corrected_deliveries_leave_their_old_bucket(self):
+        order = self.create_order('ORD0', status='DELIVERED', cod='80.00')
+        two_days_ago = timezone.now() - timedelta(days=2)
+        Order.objects.filter(pk=order.pk).update(created_at=two_days_ago, delivered_at=two_days_ago)
+        refresh_rollups()
+        self.assertEqual(analytics_summary(days=7)['deliveries_over_time'][-3]['deliveries'], 1)
+
+        # The delivery time was entered wrongly; moving it also recomputes the old bucket.
+        order = Order.objects.get(pk=order.pk)
+        order.delivered_at = timezone.now()
+        order.save(update_fields=['delivered_at'])
+        self.assertEqual(DeliveryCorrection.objects.get().delivered_at, two_days_ago)
+        refresh_rollups()
+        summary = analytics_summary(days=7)
+        self.assertEqual(summary['deliveries_over_time'][-3]['deliveries'], 0)
+        self.assertEqual(summary['deliveries_over_time'][-1]['deliveries'], 1)
+        self.assertEqual(summary['cod_collected'], '80.00')
+
+        # Saves that leave the delivery alone record nothing.
+        order.cod_amount = Decimal('90.00')
+        order.save()
+        self.assertEqual(DeliveryCorrection.objects.count(), 1)
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_refresh_only_recomputes_changed_buckets(self):
+        old = self.create_order('ORD0', status='DELIVERED', cod='80.00')
+        three_days_ago = timezone.now() - timedelta(days=3)
+        Order.objects.filter(pk=old.pk).update(created_at=three_days_ago, delivered_at=three_days_ago)
+        self.create_order('ORD1', status='DELIVERED', cod='150.00')
+        pending = self.create_order('ORD2')
+        self.assertEqual(refresh_rollups(), 2)
+
+        summary = analytics_summary(days=7)
+        self.assertEqual(summary['status_breakdown']['DELIVERED'], 2)
+        self.assertEqual(summary['status_breakdown']['PENDING'], 1)
+        self.assertEqual(summary['cod_collected'], '230.00')
+        self.assertEqual(summary['deliveries_over_time'][-1]['deliveries'], 1)
+        self.assertEqual(summary['drivers'][0]['name'], 'Ramesh Kumar')
+
+        # Only the current hour contains a changed order, so the old bucket is left alone.
+        pending.status = 'CANCELED'
+        pending.save()
+        self.assertEqual(refresh_rollups(), 1)
+        summary = analytics_summary(days=7)
+        self.assertEqual(summary['status_breakdown']['PENDING'], 0)
+        self.assertEqual(summary['status_breakdown']['CANCELED'], 1)
+        self.assertEqual(OrderRollup.objects.filter(period='day', status='DELIVERED').count(), 2)
+
+    def test_analytics_endpoint_requires_login(self):
+        response = self.client.get(reverse('logistics:analytics_data'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.driver.user)
+        response = self.client.get(reverse('logistics:analytics_data'), {'days': 'x'})
+        self.assertEqual(len(response.json()['deliveries_over_time']), 7)
+
+
+class LiveUpdatesTests(TestCase):
+    def test_events_are_coalesced_per_key(self):
+        async def scenario():
+            hub = Broadcaster()
+            subscriber = hub.subscribe()
+            hub.publish('order:1', {'status': 'ASSIGNED'})
+            hub.publish('order:1', {'status': 'OUT_FOR_DELIVERY'})
+            hub.publish('location:7', {'latitude': '18.5'})
+            batches = subscriber.batches(min_interval=0, keepalive=1)
+            batch = await batches.__anext__()
+            hub.unsubscribe(subscriber)
+            return batch
+
+        self.assertEqual(
+            asyncio.run(scenario()),
+            [{'status': 'OUT_FOR_DELIVERY'}, {'latitude': '18.5'}],
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+
+    def create_order(self, order_id):
+        return Order.objects.create(
+            order_id=order_id, customer=self.customer,
+            pickup_address='A', delivery_address='B', items_description='Box',
+        )
+
+    def test_nothing_is_published_without_listeners(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order('ORD1')
+        self.assertFalse(LiveChange.objects.exists())
+
+    def test_changes_are_published_after_commit_and_read_once_per_batch(self):
+        since = timezone.now()
+        cache.set(LISTENERS_KEY, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_order('ORD1')
+            second = self.create_order('ORD2')
+            self.assertFalse(LiveChange.objects.exists())
+        self.assertEqual(LiveChange.objects.count(), 2)
+
+        with self.assertNumQueries(4):
+            events, read = read_changes(since)
+        events = dict(events)
+        self.assertEqual(events[f'order:{first.pk}']['status'], 'PENDING')
+        self.assertEqual(events[f'order:{second.pk}']['order_id'], 'ORD2')
+        self.assertEqual(events['counts']['counts']['by_status']['PENDING'], 2)
+
+        # A later poll re-reads the overlap but skips what it already sent.
+        removed = second.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        events, _ = read_changes(since, read)
+        self.assertEqual(dict(events)[f'order:{removed}'], {'type': 'order', 'id': removed, 'removed': True})
+        self.assertNotIn(f'order:{first.pk}', dict(events))
+
+    def test_concurrent_publishers_never_overwrite_each_other(self):
+        cache.set(LISTENERS_KEY, True)
+        for pk in range(5):
+            publish_change('location', pk)
+        self.assertEqual(sorted(LiveChange.objects.values_list('object_id', flat=True)), [0, 1, 2, 3, 4])
+
+    @mock.patch('logistics.live.MAX_CHANGES_PER_POLL', 1)
+    def test_falling_behind_still_sends_counts(self):
+        since = timezone.now()
+        cache.set(LISTENERS_KEY, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order('ORD1')
+            self.create_order('ORD2')
+        events, read = read_changes(since)
+        self.assertEqual([key for key, _ in events], ['counts'])
+        self.assertEqual(len(read), 2)
+
+    def test_live_stream_requires_login(self):
+        response = self.client.get(reverse('logistics:live_updates'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_wsgi_dashboards_poll_instead_of_streaming(self):
+        user = User.objects.create_user('manager')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('logistics:live_updates')).status_code, 204)
+        self.assertFalse(self.client.get(reverse('logistics:dashboard')).context['live_stream'])
+
+        self.create_order('ORD1')
+        response = self.client.get(reverse('logistics:live_counts'))
+        self.assertEqual(response.json()['by_status']['PENDING'], 1)
+
+
+class OrderImportTests(TestCase):
+    CSV = (
+        "order_id,customer_name,customer_phone,pickup_address,delivery_address,items_description,cod_amount\n"
+        ",Jane,555,Warehouse,1 Main St,Box,100.50\n"
+        ",Jane,555,Warehouse,1 Main St,Envelope,\n"
+        "EXT-1,John,556,Warehouse,2 Main St,Box,0\n"
+        "EXT-1,John,556,Warehouse,2 Main St,Box,0\n"
+        ",,557,Warehouse,3 Main St,Box,0\n"
+        ",Ann,558,Warehouse,4 Main St,Box,abc\n"
+    )
+
+    def test_csv_import(self):
+        Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        report = import_orders(io.StringIO(self.CSV), fmt='csv', chunk_size=2)
+
+        self.assertEqual(report.rows, 6)
+        self.assertEqual(report.created, 3)
+        self.assertEqual([error['line'] for error in report.errors], [5, 6, 7])
+        self.assertIn('Duplicate order_id', report.errors[0]['error'])
+        self.assertIn('customer_name', report.errors[1]['error'])
+
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(Order.objects.filter(customer__name='Jane').count(), 2)
+        self.assertEqual(OrderStatusCount.as_dict()['PENDING'], 3)
+        generated = sorted(Order.objects.exclude(order_id='EXT-1').values_list('order_id', flat=True))
+        self.assertEqual(generated, ['IMP0000000001', 'IMP0000000002'])
+
+    def test_jsonl_import_reports_bad_lines(self):
+        data = (
+            '{"customer_name": "Jane", "customer_phone": 555, "pickup_address": "A",'
+            ' "delivery_address": "B", "items_description": "Box", "cod_amount": 12.5}\n'
+            'not json\n'
+        )
+        report = import_orders(io.StringIO(data), fmt='jsonl')
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.errors[0]['line'], 2)
+        self.assertEqual(Order.objects.get().cod_amount, Decimal('12.50'))
+
+    def test_invalid_utf8_returns_partial_report(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        header, row = self.CSV.splitlines(keepends=True)[:2]
+        # Decoding runs ahead of parsing in blocks, so the bad bytes come well after the first chunks.
+        data = (header + row * 2000).encode('utf-8') + b',Zed,559,Warehouse,5 Main St,\xff\xfe,0\n'
+        upload = SimpleUploadedFile('orders.csv', data, content_type='text/csv')
+        with override_settings(IMPORT_CHUNK_SIZE=100):
+            response = self.client.post(reverse('logistics:import_orders'), {'file': upload})
+
+        self.assertEqual(response.status_code, 400)
+        report = response.json()
+        self.assertIn('not valid UTF-8', report['aborted'])
+        self.assertGreater(report['created'], 0)
+        self.assertEqual(report['created'], Order.objects.count())
+        # Every row up to completed_line is in, so a retry can start after it.
+        self.assertEqual(report['completed_line'], report['created'] + 1)
+
+    def test_chunk_is_retried_after_an_order_id_clash(self):
+        insert = Order.objects.bulk_create
+        calls = []
+
+        def clash_once(orders, **kwargs):
+            calls.append(len(orders))
+            if len(calls) == 1:
+                raise IntegrityError('UNIQUE constraint failed: logistics_order.order_id')
+            return insert(orders, **kwargs)
+
+        with mock.patch.object(Order.objects, 'bulk_create', side_effect=clash_once):
+            report = import_orders(io.StringIO(self.CSV), fmt='csv')
+
+        self.assertEqual(calls, [3, 3])
+        self.assertEqual(report.created, 3)
+        self.assertEqual(len(report.errors), 3)
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(OrderStatusCount.as_dict()['PENDING'], 3)
+
+
+class DriverSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ramesh', password='password')
+        self.driver = Driver.objects.create(user=self.user, phone_number='9000000001')
+        customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        for order_id, status in [('ORD1', 'ASSIGNED'), ('ORD2', 'ASSIGNED'), ('ORD3', 'CANCELED')]:
+            Order.objects.create(
+                order_id=order_id, customer=customer, driver=self.driver, status=status,
+                pickup_address='A', delivery_address='B', items_description='Box',
+            )
+        self.client.force_login(self.user)
+
+    def sync(self, payload):
+        return self.client.post(reverse('logistics:driver_sync'), json.dumps(payload), content_type='application/json')
+
+    def test_batch_is_applied_idempotently(self):
+        payload = {
+            'updates': [
+                {'client_id': 'b', 'order_id': 'ORD1', 'status': 'DELIVERED', 'timestamp': '2026-10-19T09:30:00Z'},
+                {'client_id': 'a', 'order_id': 'ORD1', 'status': 'OUT_FOR_DELIVERY', 'timestamp': '2026-10-19T09:00:00Z'},
+                {'client_id': 'c', 'order_id': 'ORD3', 'status': 'DELIVERED', 'timestamp': '2026-10-19T09:40:00Z'},
+                {'client_id': 'd', 'order_id': 'ORD2', 'status': 'PENDING', 'timestamp': '2026-10-19T09:40:00Z'},
+            ],
+            'locations': [
+                {'latitude': 18.51, 'longitude': 73.85, 'timestamp': '2026-10-19T09:00:00Z'},
+                {'latitude': 18.52, 'longitude': 73.86, 'timestamp': '2026-10-19T09:35:00Z'},
+            ],
+            'known_order_ids': ['ORD1', 'ORD2'],
+        }
+        data = self.sync(payload).json()
+        self.assertEqual({key: value['result'] for key, value in data['results'].items()},
+                         {'a': 'applied', 'b': 'applied', 'c': 'conflict', 'd': 'rejected'})
+        order = Order.objects.get(order_id='ORD1')
+        self.assertEqual(order.status, 'DELIVERED')
+        self.assertEqual(order.delivered_at.isoformat(), '2026-10-19T09:30:00+00:00')
+        self.assertEqual(DriverLocation.objects.get(driver=self.driver).latitude, Decimal('18.520000'))
+        self.assertEqual(data['route']['removed'], ['ORD1'])
+        self.assertEqual([order['order_id'] for order in data['route']['orders']], ['ORD2'])
+
+        # Resending the same batch changes nothing and reports the original outcome.
+        again = self.sync(payload).json()
+        self.assertTrue(all(result['duplicate'] for result in again['results'].values()))
+        self.assertEqual(again['results']['a']['result'], 'applied')
+        self.assertEqual(DriverSyncEvent.objects.count(), 4)
+        self.assertEqual(OrderStatusCount.as_dict()['DELIVERED'], 1)
+
+        # The sync history stays linked to the order once it is archived.
+        archive_batch([Order.objects.get(order_id='ORD1').pk])
+        self.assertEqual(
+            sorted(DriverSyncEvent.objects.filter(order_id='ORD1').values_list('client_id', flat=True)), ['a', 'b'],
+        )
+
+    def test_location_fixes_are_ordered_by_the_phone_clock(self):
+        # The phone's clock runs hours behind the server's.
+        self.sync({'locations': [{'latitude': 18.51, 'longitude': 73.85, 'timestamp': '2020-01-01T09:00:00Z'}]})
+        self.sync({'locations': [{'latitude': 18.52, 'longitude': 73.86, 'timestamp': '2020-01-01T09:05:00Z'}]})
+        self.sync({'locations': [{'latitude': 18.40, 'longitude': 73.70, 'timestamp': '2020-01-01T08:00:00Z'}]})
+        location = DriverLocation.objects.get(driver=self.driver)
+        self.assertEqual(location.latitude, Decimal('18.520000'))
+        self.assertEqual(location.recorded_at.isoformat(), '2020-01-01T09:05:00+00:00')
+
+    def test_malformed_updates_are_rejected_one_by_one(self):
+        data = self.sync({
+            'updates': [
+                {'client_id': 'a', 'order_id': 'ORD1', 'status': 'OUT_FOR_DELIVERY', 'timestamp': 'yesterday'},
+                {'client_id': 'b', 'order_id': 'ORD2', 'status': 'OUT_FOR_DELIVERY', 'timestamp': '2026-10-19T09:00:00Z'},
+            ],
+            'locations': [{'latitude': 'north', 'longitude': 73.85, 'timestamp': '2026-10-19T09:00:00Z'}],
+        }).json()
+        self.assertEqual(data['results']['a']['result'], 'rejected')
+        self.assertEqual(data['results']['b']['result'], 'applied')
+        self.assertEqual(data['max_items'], 500)
+        self.assertFalse(DriverLocation.objects.filter(driver=self.driver).exists())
+
+    def test_concurrent_resend_reports_the_stored_result(self):
+        # Another request stored 'z' after this one looked for earlier deliveries.
+        DriverSyncEvent.objects.create(
+            driver=self.driver, client_id='z', status='DELIVERED', client_timestamp=timezone.now(),
+            result='conflict', detail='Order was canceled.',
+        )
+        lookup = DriverSyncEvent.objects.filter
+        calls = []
+
+        def miss_first_lookup(*args, **kwargs):
+            calls.append(kwargs)
+            return DriverSyncEvent.objects.none() if len(calls) == 1 else lookup(*args, **kwargs)
+
+        with mock.patch.object(DriverSyncEvent.objects, 'filter', side_effect=miss_first_lookup):
+            response = self.sync({'updates': [
+                {'client_id': 'z', 'order_id': 'NOPE', 'status': 'DELIVERED', 'timestamp': '2026-10-19T09:00:00Z'},
+            ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results']['z'], {
+            'result': 'conflict', 'detail': 'Order was canceled.', 'duplicate': True,
+        })
+        self.assertEqual(DriverSyncEvent.objects.count(), 1)
+
+    def test_route_delta_since_last_sync(self):
+        first = self.sync({}).json()
+        self.assertEqual(len(first['route']['orders']), 2)
+        second = self.sync({'since': first['server_time']}).json()
+        self.assertEqual(second['route']['orders'], [])
+
+    def test_non_drivers_and_bad_payloads_are_refused(self):
+        self.assertEqual(self.sync({'updates': [{'order_id': 'ORD1'}]}).status_code, 400)
+        with override_settings(DRIVER_SYNC_MAX_ITEMS=1):
+            response = self.sync({'updates': [{'client_id': 'x'}, {'client_id': 'y'}]})
+        self.assertEqual((response.status_code, response.json()['max_items']), (400, 1))
+        self.client.force_login(User.objects.create_user('manager'))
+        self.assertEqual(self.sync({}).status_code, 403)
+
+
+class ArchivalTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        long_ago = timezone.now() - timedelta(days=200)
+        for i, status in enumerate(['DELIVERED', 'CANCELED', 'DELIVERED', 'OUT_FOR_DELIVERY']):
+            order = Order.objects.create(
+                order_id=f'ORD{i}', customer=self.customer, status=status, cod_amount=Decimal('10.00'),
+                pickup_address='A', delivery_address='B', items_description='Box',
+            )
+            if i < 2 or status == 'OUT_FOR_DELIVERY':
+                Order.objects.filter(pk=order.pk).update(created_at=long_ago, updated_at=long_ago)
+
+    def test_only_old_terminal_orders_are_moved(self):
+        backfill_rollups(timezone.now() - timedelta(days=201), timezone.now())
+        before = OrderStatusCount.as_dict()
+
+        self.assertEqual(archive_orders(batch_size=1), 2)
+        self.assertEqual(sorted(Order.objects.values_list('order_id', flat=True)), ['ORD2', 'ORD3'])
+        self.assertEqual(sorted(ArchivedOrder.objects.values_list('order_id', flat=True)), ['ORD0', 'ORD1'])
+        self.assertEqual(OrderStatusCount.as_dict(), before)
+
+        # History stays available when asked for, and rollups still include it.
+        self.assertEqual(all_orders('order_id').count(), 4)
+        self.assertEqual(find_order('ORD0').status, 'DELIVERED')
+        backfill_rollups(timezone.now() - timedelta(days=201), timezone.now())
+        self.assertEqual(
+            sum(OrderRollup.objects.filter(period='day').values_list('order_count', flat=True)), 4,
+        )
+
+    def test_rebuilt_counters_keep_archived_orders(self):
+        Order.objects.filter(order_id='ORD0').update(delivered_at=timezone.now() - timedelta(days=200))
+
+        def counters():
+            call_command('rebuild_order_counters', stdout=io.StringIO())
+            return OrderStatusCount.as_dict(), dict(DailyDeliveryCount.objects.values_list('day', 'count'))
+
+        before = counters()
+        self.assertEqual(sum(before[1].values()), 1)
+        archive_orders()
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+        self.assertEqual(counters(), before)
+
+
+# The test run is a single process, so the per-process cache is as good as a shared one.
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['logistics.auth.CachedModelBackend'],
+    DASHBOARD_FRAGMENT_TIMEOUT=3600,
+)
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('manager', password='password')
+        self.client.login(username='manager', password='password')
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in ctx.captured_queries
+            if 'auth_user' in query['sql'] or 'django_session' in query['sql']
+        ]
+
+    def test_warm_dashboard_needs_no_auth_queries(self):
+        url = reverse('logistics:dashboard')
+        self.auth_queries(url)
+        self.assertEqual(self.auth_queries(url), [])
+
+    def test_user_changes_invalidate_the_cache(self):
+        url = reverse('logistics:dashboard')
+        self.auth_queries(url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_cached_auth_needs_a_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_cached_auth(None)], ['logistics.E001', 'logistics.E002'],
+        )
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }}):
+            self.assertEqual(check_cached_auth(None), [])
+
+
+# The test run is a single process, so the per-process cache is as good as a shared one.
+@override_settings(DASHBOARD_FRAGMENT_TIMEOUT=3600)
+class DashboardFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('manager'))
+        self.driver = Driver.objects.create(user=User.objects.create_user('ramesh'), phone_number='900')
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        self.order = Order.objects.create(
+            order_id='ORD1', customer=self.customer, driver=self.driver,
+            pickup_address='A', delivery_address='B', items_description='Box',
+        )
+
+    def tables_queried(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('logistics:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return {
+            table for query in ctx.captured_queries
+            for table in ('logistics_order', 'logistics_driver', 'logistics_orderstatuscount')
+            if f'FROM "{table}"' in query['sql']
+        }
+
+    def test_warm_fragments_need_no_queries(self):
+        self.assertEqual(
+            self.tables_queried(), {'logistics_order', 'logistics_driver', 'logistics_orderstatuscount'},
+        )
+        self.assertEqual(self.tables_queried(), set())
+
+    def test_only_changed_fragments_rerender(self):
+        self.tables_queried()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = 'OUT_FOR_DELIVERY'
+            self.order.save()
+        self.assertEqual(self.tables_queried(), {'logistics_order', 'logistics_orderstatuscount'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DriverLocation.objects.create(driver=self.driver, latitude=1, longitude=2)
+        self.assertEqual(self.tables_queried(), {'logistics_driver'})
+        self.assertContains(self.client.get(reverse('logistics:dashboard')), '1.000000, 2.000000')
+
+    @override_settings(DASHBOARD_FRAGMENT_TIMEOUT=0)
+    def test_fragments_need_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_fragment_cache(None)], [])
+        self.tables_queried()
+        self.assertEqual(
+            self.tables_queried(), {'logistics_order', 'logistics_driver', 'logistics_orderstatuscount'},
+        )
+        with override_settings(DASHBOARD_FRAGMENT_TIMEOUT=3600):
+            self.assertEqual([error.id for error in check_fragment_cache(None)], ['logistics.E003'])
+
+    @override_settings(DASHBOARD_DRIVERS=2)
+    def test_drivers_are_limited(self):
+        for name in ('anil', 'bala', 'chetan'):
+            Driver.objects.create(user=User.objects.create_user(name), phone_number=name)
+        response = self.client.get(reverse('logistics:dashboard'))
+        self.assertContains(response, 'anil')
+        self.assertContains(response, 'bala')
+        self.assertNotContains(response, 'chetan')
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        self.first, self.second = (
+            Driver.objects.create(user=User.objects.create_user(f'driver{i}'), phone_number=f'900000000{i}')
+            for i in range(2)
+        )
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def deliver(self, order_id, driver, cod, day=None):
+        delivered_at = timezone.now()
+        if day is not None:
+            delivered_at = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=12))
+        return Order.objects.create(
+            order_id=order_id, customer=self.customer, driver=driver, status='DELIVERED', delivered_at=delivered_at,
+            pickup_address='A', delivery_address='B', items_description='Box', cod_amount=Decimal(cod),
+        )
+
+    def settlements(self):
+        return {
+            (settlement.driver_id, settlement.day): (settlement.order_count, settlement.cod_total)
+            for settlement in Settlement.objects.all()
+        }
+
+    def test_full_range_counts_delivered_and_archived_orders(self):
+        self.deliver('ORD0', self.first, '100.00', day=self.yesterday)
+        self.deliver('ORD1', self.first, '50.50', day=self.yesterday)
+        archive_batch([self.deliver('ORD2', self.first, '9.50', day=self.yesterday).pk])
+        self.deliver('ORD3', self.second, '20.00')
+        Order.objects.create(
+            order_id='ORD4', customer=self.customer, driver=self.first, status='PENDING',
+            pickup_address='A', delivery_address='B', items_description='Box', cod_amount=Decimal('999'),
+        )
+
+        self.assertEqual(reconcile_days(self.yesterday, self.today), 2)
+        self.assertEqual(self.settlements(), {
+            (self.first.pk, self.yesterday): (3, Decimal('160.00')),
+            (self.second.pk, self.today): (1, Decimal('20.00')),
+        })
+        # Nothing changed, nothing written.
+        self.assertEqual(reconcile_days(self.yesterday, self.today), 0)
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_refresh_follows_late_corrections_and_keeps_cash_received(self):
+        order = self.deliver('ORD0', self.first, '100.00', day=self.yesterday)
+        self.deliver('ORD1', self.second, '40.00', day=self.yesterday)
+        self.assertEqual(refresh_settlements(), 2)
+        Settlement.objects.filter(driver=self.first).update(cash_received=Decimal('90.00'))
+
+        # The order was actually delivered by the other driver, for a different amount.
+        order.driver = self.second
+        order.cod_amount = Decimal('120.00')
+        order.save()
+        self.assertEqual(refresh_settlements(), 2)
+        self.assertEqual(self.settlements(), {
+            (self.first.pk, self.yesterday): (0, Decimal('0.00')),
+            (self.second.pk, self.yesterday): (2, Decimal('160.00')),
+        })
+        self.assertEqual(Settlement.objects.get(driver=self.first).discrepancy, Decimal('90.00'))
+        self.assertEqual(refresh_settlements(), 0)
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_refresh_follows_deleted_orders(self):
+        self.deliver('ORD0', self.first, '100.00', day=self.yesterday)
+        order = self.deliver('ORD1', self.first, '40.00', day=self.yesterday)
+        self.assertEqual(refresh_settlements(), 1)
+
+        order.delete()
+        self.assertEqual(refresh_settlements(), 1)
+        self.assertEqual(self.settlements(), {(self.first.pk, self.yesterday): (1, Decimal('100.00'))})
+
+    @override_settings(ANALYTICS_ROLLUP_OVERLAP=timedelta(0))
+    def test_refresh_follows_moved_and_undone_deliveries(self):
+        moved = self.deliver('ORD0', self.first, '100.00', day=self.yesterday)
+        undone = self.deliver('ORD1', self.second, '40.00', day=self.yesterday)
+        self.assertEqual(refresh_settlements(), 2)
+
+        # Actually delivered today, and by the other driver; the other order never was.
+        moved.delivered_at = timezone.now()
+        moved.driver = self.second
+        moved.save()
+        undone.status, undone.delivered_at = 'OUT_FOR_DELIVERY', None
+        undone.save()
+        refresh_settlements()
+        self.assertEqual(self.settlements(), {(self.second.pk, self.today): (1, Decimal('100.00'))})
+
+    def test_drivers_with_settlements_cannot_be_deleted(self):
+        self.deliver('ORD0', self.first, '100.00')
+        reconcile_days(self.today, self.today)
+        with self.assertRaises(ProtectedError):
+            self.first.delete()
+
+    def test_csv_export_is_staff_only_and_streamed(self):
+        self.deliver('ORD0', self.first, '100.00')
+        reconcile_days(self.today, self.today)
+        url = reverse('logistics:settlements_export')
+
+        self.client.force_login(self.first.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(url, {'from': self.today.isoformat(), 'to': self.today.isoformat()})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'day,driver,driver_phone,orders,cod_total,cash_received,discrepancy')
+        self.assertEqual(lines[1:], [f'{self.today},driver0,9000000000,1,100.00,,'])
+        self.assertEqual(self.client.get(url, {'from': 'yesterday'}).status_code, 400)
+
+
+def jpeg_with_exif(size=(1200, 800)):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+    exif[0x010F] = 'PhoneMaker'
+    exif.get_ifd(0x8825)[0x0001] = 'N'  # GPS latitude reference
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ProofOfDeliveryTests(TestCase):
+    def setUp(self):
+        self.storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage)
+        settings_override = override_settings(
+            PROOF_STORAGE_ROOT=self.storage, PROOF_THUMBNAIL_WORKERS=0, PROOF_MAX_UPLOAD_BYTES=1024 * 1024,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        customer = Customer.objects.create(name='Jane', phone_number='555', address='1 Main St')
+        self.driver = Driver.objects.create(user=User.objects.create_user('ramesh'), phone_number='9000000001')
+        other = Driver.objects.create(user=User.objects.create_user('suresh'), phone_number='9000000002')
+        for order_id, driver in (('ORD0', self.driver), ('ORD1', self.driver), ('ORD2', other)):
+            Order.objects.create(
+                order_id=order_id, customer=customer, driver=driver, status='DELIVERED',
+                pickup_address='A', delivery_address='B', items_description='Box',
+            )
+        self.client.force_login(self.driver.user)
+
+    def upload(self, order_id, content, name='proof.jpg', kind='photo'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('logistics:upload_proof', args=[order_id]),
+                {'file': SimpleUploadedFile(name, content, content_type='image/jpeg'), 'kind': kind},
+            )
+
+    def test_upload_is_stored_once_and_thumbnailed_without_exif(self):
+        content = jpeg_with_exif()
+        response = self.upload('ORD0', content)
+        self.assertEqual(response.status_code, 201)
+        sha256 = response.json()['sha256']
+        stored = original_path(sha256).read_bytes()
+        self.assertEqual(hashlib.sha256(stored).hexdigest(), sha256)
+        with Image.open(io.BytesIO(stored)) as original, Image.open(io.BytesIO(content)) as uploaded:
+            # Only the orientation is kept, and the image data is not re-encoded.
+            self.assertEqual(dict(original.getexif()), {0x0112: 6})
+            self.assertEqual(original.tobytes(), uploaded.tobytes())
+
+        image = ProofImage.objects.get(pk=sha256)
+        self.assertEqual((image.status, image.width, image.height), ('READY', 1200, 800))
+        with Image.open(thumbnail_path(sha256)) as thumbnail:
+            # Rotated upright, scaled to fit 320px, and no metadata carried over.
+            self.assertEqual(thumbnail.size, (213, 320))
+            self.assertEqual(dict(thumbnail.getexif()), {})
+
+        # The same photo for another order is linked, not stored again.
+        response = self.upload('ORD1', content, name='again.jpg')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['sha256'], sha256)
+        self.assertEqual(ProofImage.objects.count(), 1)
+        self.assertEqual(DeliveryProof.objects.filter(image=sha256).count(), 2)
+        # A retried upload of the same proof is recognised as a duplicate.
+        self.assertTrue(self.upload('ORD1', content).json()['duplicate'])
+        self.assertEqual(list((Path(self.storage) / 'tmp').iterdir()), [])
+
+    def test_rejected_uploads(self):
+        self.assertEqual(self.upload('ORD2', jpeg_with_exif()).status_code, 403)
+        self.assertEqual(self.upload('NOPE', jpeg_with_exif()).status_code, 404)
+        self.assertEqual(self.upload('ORD0', b'%PDF-1.4 not an image').status_code, 400)
+        self.assertEqual(self.upload('ORD0', jpeg_with_exif()[:100]).status_code, 400)
+        self.assertEqual(self.upload('ORD0', jpeg_with_exif(), kind='video').status_code, 400)
+        self.assertEqual(self.upload('ORD0', b'\xff\xd8\xff' + b'0' * 2 * 1024 * 1024).status_code, 413)
+        self.assertFalse(ProofImage.objects.exists())
+
+    def test_refused_uploads_are_not_read(self):
+        with mock.patch('logistics.views.ProofUploadHandler') as handler:
+            self.assertEqual(self.upload('ORD2', jpeg_with_exif()).status_code, 403)
+            self.client.logout()
+            self.assertEqual(self.upload('ORD0', jpeg_with_exif()).status_code, 302)
+        handler.assert_not_called()
+        self.assertFalse((Path(self.storage) / 'tmp').exists())
+
+    def test_dashboard_and_thumbnail_view_serve_only_thumbnails(self):
+        sha256 = self.upload('ORD0', jpeg_with_exif()).json()['sha256']
+        url = reverse('logistics:proof_thumbnail', args=[sha256])
+        self.assertContains(self.client.get(reverse('logistics:dashboard')), url)
+
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(b''.join(response.streaming_content), thumbnail_path(sha256).read_bytes())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('logistics:proof_thumbnail', args=['0' * 64])).status_code, 404)
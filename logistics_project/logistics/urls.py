@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'logistics'
@@ -9,6 +9,30 @@ urlpatterns = [
     
     # This points to the dashboard view
     path('dashboard/', views.dashboard_view, name='dashboard'),
+
+    # JSON data for the analytics charts, served from the rollup tables
+    path('analytics/data/', views.analytics_data_view, name='analytics_data'),
+
+    # Server-Sent Events stream of live order and driver location changes
+    path('live/', views.live_updates_view, name='live_updates'),
+
+    # Dashboard counters for dashboards that poll instead of streaming (WSGI servers)
+    path('live/counts/', views.live_counts_view, name='live_counts'),
+
+    # Bulk CSV/JSONL order import (staff only)
+    path('orders/import/', views.import_orders_view, name='import_orders'),
+
+    # Streamed CSV of COD settlements per driver per day (staff only)
+    path('settlements/export.csv', views.settlements_export_view, name='settlements_export'),
+
+    # Proof-of-delivery photo/signature upload by the assigned driver
+    path('orders/<str:order_id>/proof/', views.upload_proof_view, name='upload_proof'),
+
+    # Cached proof-of-delivery thumbnails (originals are never served)
+    re_path(r'^proofs/(?P<sha256>[0-9a-f]{64})\.jpg$', views.proof_thumbnail_view, name='proof_thumbnail'),
+
+    # Batched offline sync for the driver app
+    path('driver/sync/', views.driver_sync_view, name='driver_sync'),
     
     # This points to the logout view
     path('logout/', views.logout_view, name='logout'),
@@ -1,8 +1,29 @@
+import io
+import json
+from datetime import date
+
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import etag, require_POST
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib import messages
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from .analytics import analytics_summary
+from .fragments import fragment_versions
+from .importing import READERS, import_orders
+from .live import broadcaster, current_counts, event_stream
+from .models import DailyDeliveryCount, DeliveryProof, Driver, Order, OrderStatusCount
+from .proofs import ProofUploadHandler, add_proof, thumbnail_path
+from .reconciliation import settlement_csv_rows
+from .sync import SyncError, apply_driver_sync
 
 def login_register_view(request):
     """
@@ -53,8 +74,199 @@ def dashboard_view(request):
     """
     Renders the main manager dashboard page.
     The @login_required decorator protects this page.
+    Summary counts come from the denormalized counter tables, not from the orders table.
+    The partials are cached per fragment version (see logistics/fragments.py);
+    their data is loaded lazily, so a cached partial costs no queries at all.
+    """
+    return render(request, 'logistics/dashboard_base.html', {
+        'fragment_versions': fragment_versions() if settings.DASHBOARD_FRAGMENT_TIMEOUT else {},
+        'fragment_timeout': settings.DASHBOARD_FRAGMENT_TIMEOUT,
+        # "Completed today" starts over at midnight without any save.
+        'today': timezone.localdate().isoformat(),
+        # Only an ASGI server can hold the live stream open without tying up a worker.
+        'live_stream': isinstance(request, ASGIRequest),
+        'live_poll_interval': settings.LIVE_UPDATES_POLL_INTERVAL,
+        'status_counts': SimpleLazyObject(OrderStatusCount.as_dict),
+        'delivered_today': SimpleLazyObject(DailyDeliveryCount.for_day),
+        'recent_orders': SimpleLazyObject(lambda: list(
+            Order.objects.select_related('customer', 'driver__user')
+            .annotate(proof_thumbnail=Subquery(
+                DeliveryProof.objects.filter(order_id=OuterRef('order_id'), image__status='READY')
+                .order_by('-uploaded_at').values('image_id')[:1]
+            ))
+            .order_by('-created_at')[:settings.DASHBOARD_RECENT_ORDERS]
+        )),
+        'drivers': SimpleLazyObject(lambda: list(
+            Driver.objects.select_related('user', 'driverlocation')
+            .order_by('user__username')[:settings.DASHBOARD_DRIVERS]
+        )),
+    })
+
+@login_required(login_url='/logistics/login/')
+def analytics_data_view(request):
+    """
+    Returns the analytics dashboard data as JSON.
+    Everything is read from the precomputed rollups, never from the orders table.
+    """
+    try:
+        days = min(max(int(request.GET.get('days', 7)), 1), 366)
+    except ValueError:
+        days = 7
+    return JsonResponse(analytics_summary(days))
+
+@login_required(login_url='/logistics/login/')
+def live_counts_view(request):
+    """
+    Returns the dashboard counters as JSON, for dashboards served without
+    the live stream, which poll this instead.
+    """
+    return JsonResponse(current_counts())
+
+async def live_updates_view(request):
+    """
+    Streams order status and driver location changes to the dashboard as
+    Server-Sent Events, so open dashboards never need to poll.
+    Requires an ASGI server (see logistics_project/asgi.py). Under WSGI the
+    stream would hold a worker for as long as the page is open, so it answers
+    204 instead, which tells EventSource not to reconnect.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    subscriber = broadcaster.subscribe()
+    response = StreamingHttpResponse(event_stream(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@staff_member_required(login_url='/logistics/login/')
+@require_POST
+def import_orders_view(request):
+    """
+    Imports a CSV or JSONL file of orders uploaded as 'file'.
+    Large uploads are spooled to a temporary file by Django and read back
+    as a stream, so the whole file is never held in memory.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'detail': "Upload the orders file as 'file'."}, status=400)
+    fmt = request.POST.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+    if fmt not in READERS:
+        return JsonResponse({'detail': f"Unsupported format '{fmt}'."}, status=400)
+
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+    report = import_orders(stream, fmt=fmt)
+    # Chunks before an encoding error are committed, so always say what was imported.
+    return JsonResponse(report.as_dict(max_errors=1000), status=400 if report.aborted else 200)
+
+@staff_member_required(login_url='/logistics/login/')
+def settlements_export_view(request):
+    """
+    Streams the COD settlements from ?from= to ?to= (YYYY-MM-DD, both
+    inclusive, default: the current month so far) as CSV, row by row.
+    """
+    today = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.GET.get('from') or today.replace(day=1).isoformat())
+        end = date.fromisoformat(request.GET.get('to') or today.isoformat())
+    except ValueError:
+        return JsonResponse({'detail': "'from' and 'to' must be dates (YYYY-MM-DD)."}, status=400)
+
+    response = StreamingHttpResponse(settlement_csv_rows(start, end), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="settlements-{start}-{end}.csv"'
+    return response
+
+@csrf_exempt
+@login_required(login_url='/logistics/login/')
+@require_POST
+def upload_proof_view(request, order_id):
+    """
+    Receives a proof-of-delivery photo or signature for an order, uploaded
+    as 'file' (with 'kind': photo or signature) by the order's driver.
+    The file is streamed to disk and hashed as it arrives, and is never
+    decoded here; the thumbnail is made in the background.
+    """
+    # Login, method and ownership are checked from the session and the URL
+    # alone, so the body of a refused request is never read, let alone
+    # written to disk.
+    driver = Driver.objects.filter(user=request.user).first()
+    order = Order.objects.filter(order_id=order_id).values('driver_id').first()
+    if order is None:
+        return JsonResponse({'detail': 'Order not found.'}, status=404)
+    if driver is None or order['driver_id'] != driver.pk:
+        return JsonResponse({'detail': 'Only the assigned driver can upload proof of delivery.'}, status=403)
+
+    # The upload handlers must be replaced before anything reads the body,
+    # the CSRF check included, so that check runs in the inner view.
+    handler = ProofUploadHandler(request)
+    request.upload_handlers = [handler]
+    return _upload_proof(request, order_id, driver, handler)
+
+@csrf_protect
+def _upload_proof(request, order_id, driver, handler):
+    kind = request.POST.get('kind', 'photo').upper()
+    if kind not in dict(DeliveryProof.KIND_CHOICES):
+        return JsonResponse({'detail': f"Unknown kind '{kind.lower()}'."}, status=400)
+    upload = request.FILES.get('file')
+    if handler.too_large:
+        return JsonResponse({'detail': f'The file is larger than {settings.PROOF_MAX_UPLOAD_BYTES} bytes.'}, status=413)
+    if upload is None:
+        return JsonResponse({'detail': "Upload the photo or signature as 'file'."}, status=400)
+    if upload.content_type is None:
+        upload.close()
+        return JsonResponse({'detail': 'Only JPEG, PNG and WebP images are accepted.'}, status=400)
+
+    try:
+        proof, created = add_proof(order_id, upload, kind=kind, driver=driver)
+    except ValueError:
+        return JsonResponse({'detail': 'The image is damaged or truncated.'}, status=400)
+    return JsonResponse({
+        'sha256': proof.image_id,
+        'kind': proof.kind.lower(),
+        'duplicate': not created,
+        'thumbnail': proof.image.status.lower(),
+    }, status=201 if created else 200)
+
+@login_required(login_url='/logistics/login/')
+@etag(lambda request, sha256: sha256)
+def proof_thumbnail_view(request, sha256):
+    """
+    Serves a proof-of-delivery thumbnail. Thumbnails are written once, under
+    the sha256 of their original, so browsers may cache them for good.
+    """
+    try:
+        thumbnail = open(thumbnail_path(sha256), 'rb')
+    except FileNotFoundError:
+        raise Http404('No thumbnail yet.')
+    response = FileResponse(thumbnail, content_type='image/jpeg')
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@login_required(login_url='/logistics/login/')
+@require_POST
+def driver_sync_view(request):
+    """
+    Receives a batch of status updates and location fixes queued by the
+    driver app while offline, applies them in one transaction and returns
+    the results plus the driver's route changes. One request per sync
+    replaces one request per order update.
     """
-    return render(request, 'logistics/dashboard_base.html')
+    driver = Driver.objects.filter(user=request.user).first()
+    if driver is None:
+        return JsonResponse({'detail': 'Only drivers can sync.'}, status=403)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid JSON.'}, status=400)
+    try:
+        return JsonResponse(apply_driver_sync(driver, payload))
+    except SyncError as e:
+        # max_items lets the app split an oversized queue into acceptable batches.
+        return JsonResponse({'detail': str(e), 'max_items': settings.DRIVER_SYNC_MAX_ITEMS}, status=400)
 
 def home_redirect_view(request):
     """
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The live dashboard stream (/logistics/live/) needs this entry point, e.g.:
+    gunicorn logistics_project.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+Under the WSGI entry point the dashboard polls the counters instead. With
+several workers, configure a shared cache so changes reach every worker.
 """
 
 import os
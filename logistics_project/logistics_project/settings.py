@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -53,6 +56,8 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'logistics_project.urls'
 
+# Django wraps the filesystem and app-directories loaders in the cached loader
+# whenever 'loaders' is not set, so templates are compiled once per process.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -69,19 +74,66 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'logistics_project.wsgi.application'
+ASGI_APPLICATION = 'logistics_project.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Set DATABASE_URL to use Postgres; see logistics_project/database.py for the
+# connection reuse, health check, SQLite pragma and pooling settings.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
 
+# Cache, sessions and authentication
+# Set CACHE_LOCATION to a directory to share the cache between the worker
+# processes on one host.
+# With a shared cache, sessions are read from the cache and written through to
+# the database, and the logged-in user is cached by
+# logistics.auth.CachedModelBackend, so a page view with a warm session needs
+# no database queries for authentication. The default cache is per process, and
+# a logout or deactivation handled by one worker would not evict the session or
+# user cached by the others, so without a shared cache both come from the
+# database (logistics/checks.py rejects the combination).
+
+if os.getenv('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+SHARED_CACHE = CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['logistics.auth.CachedModelBackend']
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Dashboard partials are cached until the data they show changes (see
+# logistics/fragments.py); the timeout only bounds how long unused versions linger.
+# Only with a shared cache: a version bumped in one process's cache never
+# reaches the others, which would keep serving stale partials. A timeout of 0
+# renders the partials on every request.
+DASHBOARD_FRAGMENT_TIMEOUT = int(os.getenv('DASHBOARD_FRAGMENT_TIMEOUT', '3600')) if SHARED_CACHE else 0
+DASHBOARD_RECENT_ORDERS = int(os.getenv('DASHBOARD_RECENT_ORDERS', '20'))
+DASHBOARD_DRIVERS = int(os.getenv('DASHBOARD_DRIVERS', '50'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -128,4 +180,59 @@ STATICFILES_DIRS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/logistics/login/'
-LOGIN_REDIRECT_URL = '/logistics/dashboard/'
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/logistics/dashboard/'
+
+# Geocoding
+# The provider is loaded with import_string, so any GeocodingProvider subclass can be plugged in.
+
+GEOCODING_PROVIDER = os.getenv('GEOCODING_PROVIDER', 'logistics.geocoding.GazetteerProvider')
+GEOCODING_GAZETTEER_PATH = os.getenv('GEOCODING_GAZETTEER_PATH', os.path.join(BASE_DIR, 'data', 'gazetteer.csv'))
+GEOCODING_MAX_WORKERS = int(os.getenv('GEOCODING_MAX_WORKERS', '8'))
+# Addresses the provider could not resolve are retried once this much time has passed.
+GEOCODING_MISS_TTL = timedelta(hours=int(os.getenv('GEOCODING_MISS_TTL_HOURS', '24')))
+
+
+# Analytics rollups and COD settlements
+# How far before the last watermark each incremental run re-reads, to catch late commits.
+
+ANALYTICS_ROLLUP_OVERLAP = timedelta(minutes=5)
+
+
+# Live dashboard updates (Server-Sent Events)
+# Each client receives at most one batch of coalesced deltas per interval.
+# Dashboards served over WSGI poll the counters every LIVE_UPDATES_POLL_INTERVAL seconds instead.
+
+LIVE_UPDATES_MIN_INTERVAL = float(os.getenv('LIVE_UPDATES_MIN_INTERVAL', '1.0'))
+LIVE_UPDATES_KEEPALIVE = float(os.getenv('LIVE_UPDATES_KEEPALIVE', '15'))
+LIVE_UPDATES_POLL_INTERVAL = float(os.getenv('LIVE_UPDATES_POLL_INTERVAL', '30'))
+
+
+# Bulk order import
+# Rows are parsed and inserted IMPORT_CHUNK_SIZE at a time, one transaction per chunk.
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '2000'))
+IMPORT_CUSTOMER_CACHE_SIZE = int(os.getenv('IMPORT_CUSTOMER_CACHE_SIZE', '200000'))
+IMPORT_ORDER_ID_PREFIX = os.getenv('IMPORT_ORDER_ID_PREFIX', 'IMP')
+
+
+# Driver app sync
+# Upper bound on queued status updates plus location fixes accepted in one sync request.
+
+DRIVER_SYNC_MAX_ITEMS = int(os.getenv('DRIVER_SYNC_MAX_ITEMS', '500'))
+
+
+# Order archival
+# Delivered and canceled orders untouched for this many days move to the archive table.
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+
+
+# Proof of delivery
+# Uploads are streamed to PROOF_STORAGE_ROOT and stored once per distinct content (see logistics/proofs.py).
+# Thumbnails are made by PROOF_THUMBNAIL_WORKERS background threads per process; 0 makes them inline.
+
+PROOF_STORAGE_ROOT = os.getenv('PROOF_STORAGE_ROOT', os.path.join(BASE_DIR, 'media', 'proofs'))
+PROOF_MAX_UPLOAD_BYTES = int(os.getenv('PROOF_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+PROOF_THUMBNAIL_SIZE = int(os.getenv('PROOF_THUMBNAIL_SIZE', '320'))
+PROOF_THUMBNAIL_WORKERS = int(os.getenv('PROOF_THUMBNAIL_WORKERS', '2'))
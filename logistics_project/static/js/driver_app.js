@@ -0,0 +1,121 @@
+// Offline-first sync for the driver app.
+// Status changes and location fixes are queued in localStorage and sent to
+// the server in one batch whenever the phone has signal, instead of one
+// request (and one retry loop) per order. A long queue is sent in batches
+// no larger than the server accepts (it reports its limit as max_items).
+
+const DriverSync = (() => {
+  const QUEUE_KEY = "driverSyncQueue";
+  const STATE_KEY = "driverSyncState";
+  const REJECTED_KEY = "driverSyncRejected";
+  const MAX_LOCATIONS = 50;
+  const DEFAULT_BATCH_SIZE = 100;
+
+  const load = (key, fallback) => JSON.parse(localStorage.getItem(key) || "null") || fallback;
+  const save = (key, value) => localStorage.setItem(key, JSON.stringify(value));
+
+  let syncing = false;
+
+  function queueStatus(orderId, status) {
+    const queue = load(QUEUE_KEY, { updates: [], locations: [] });
+    queue.updates.push({
+      client_id: crypto.randomUUID(),
+      order_id: orderId,
+      status: status,
+      timestamp: new Date().toISOString(),
+    });
+    save(QUEUE_KEY, queue);
+    sync();
+  }
+
+  function queueLocation(latitude, longitude) {
+    const queue = load(QUEUE_KEY, { updates: [], locations: [] });
+    // Only the newest fixes matter; keep the queue small while offline.
+    queue.locations = queue.locations.slice(-(MAX_LOCATIONS - 1));
+    queue.locations.push({ latitude, longitude, timestamp: new Date().toISOString() });
+    save(QUEUE_KEY, queue);
+  }
+
+  async function sync(config = DriverSync.config) {
+    if (syncing || !navigator.onLine) return;
+    syncing = true;
+    try {
+      // Keep going while whole batches were sent and more is waiting.
+      while (await sendBatch(config)) {}
+    } catch (error) {
+      // Offline or server unreachable: keep the queue and try again later.
+    } finally {
+      syncing = false;
+    }
+  }
+
+  // Sends the oldest queued updates plus the newest location fix (the only
+  // one the server keeps). Returns true when more updates are waiting.
+  async function sendBatch({ syncUrl, csrfToken, onRoute, onRejected }) {
+    const queue = load(QUEUE_KEY, { updates: [], locations: [] });
+    const state = load(STATE_KEY, { since: null, route: {}, maxItems: DEFAULT_BATCH_SIZE });
+    const maxItems = state.maxItems || DEFAULT_BATCH_SIZE;
+    const locations = maxItems > 1 ? queue.locations.slice(-1) : [];
+    const updates = queue.updates.slice(0, maxItems - locations.length);
+    const response = await fetch(syncUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken },
+      body: JSON.stringify({
+        updates: updates,
+        locations: locations,
+        since: state.since,
+        known_order_ids: Object.keys(state.route).slice(0, maxItems),
+      }),
+    });
+    if (response.status === 400) {
+      const error = await response.json();
+      if (error.max_items && error.max_items < maxItems) {
+        // The server's limit went down; retry with smaller batches.
+        state.maxItems = error.max_items;
+        save(STATE_KEY, state);
+        return true;
+      }
+      // The server will refuse this batch on every retry: set it aside so the rest can drain.
+      const sent = new Set(updates.map((update) => update.client_id));
+      const current = load(QUEUE_KEY, { updates: [], locations: [] });
+      current.updates = current.updates.filter((update) => !sent.has(update.client_id));
+      current.locations = current.locations.filter((fix) => !locations.length || fix.timestamp > locations[0].timestamp);
+      save(QUEUE_KEY, current);
+      save(REJECTED_KEY, load(REJECTED_KEY, []).concat(updates.map((update) => ({ ...update, detail: error.detail }))));
+      if (onRejected) onRejected(updates, error.detail);
+      return current.updates.length > 0;
+    }
+    if (!response.ok) return false;
+    const data = await response.json();
+
+    // Drop what the server has acknowledged; anything queued meanwhile stays.
+    // Updates it rejected for good come back with result "rejected" and are dropped too.
+    const current = load(QUEUE_KEY, { updates: [], locations: [] });
+    current.updates = current.updates.filter((update) => !(update.client_id in data.results));
+    const sentUntil = locations.length ? locations[0].timestamp : null;
+    current.locations = current.locations.filter((fix) => !sentUntil || fix.timestamp > sentUntil);
+    save(QUEUE_KEY, current);
+
+    data.route.orders.forEach((order) => (state.route[order.order_id] = order));
+    data.route.removed.forEach((orderId) => delete state.route[orderId]);
+    state.since = data.server_time;
+    state.maxItems = data.max_items || maxItems;
+    save(STATE_KEY, state);
+    if (onRoute) onRoute(Object.values(state.route), data.results);
+    return updates.length > 0 && current.updates.length > 0;
+  }
+
+  function start(config) {
+    DriverSync.config = config;
+    window.addEventListener("online", () => sync());
+    setInterval(() => sync(), config.intervalMs || 30000);
+    if (navigator.geolocation) {
+      navigator.geolocation.watchPosition((position) =>
+        queueLocation(position.coords.latitude, position.coords.longitude)
+      );
+    }
+    sync();
+  }
+
+  return { start, sync, queueStatus, queueLocation, config: {} };
+})();